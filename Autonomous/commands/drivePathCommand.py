@@ -3,14 +3,14 @@ import wpilib
 from jormungandr import choreo
 from AutoSequencerV2.command import Command
 from drivetrain.drivetrainControl import DrivetrainControl
-from utils.allianceTransformUtils import transform
+from utils.allianceTransformUtils import onRed
 
 class DrivePathCommand(Command):
     def __init__(self, pathFile):
         self.name = pathFile
 
         # Get the internal path file
-        absPath = os.path.abspath(
+        self.absPath = os.path.abspath(
             os.path.join(
                 os.path.dirname(__file__),
                 "..",
@@ -21,24 +21,35 @@ class DrivePathCommand(Command):
             )
         )
 
-        self.path = choreo.fromFile(absPath)
+        # Loaded the first time someone asks for it - usually when our mode gets selected
+        self._path = None
         self.done = False
         self.startTime = (
             -1
         )  # we'll populate these for real later, just declare they'll exist
-        self.duration = self.path.getTotalTime()
+        self.duration = 0.0
         self.drivetrain = DrivetrainControl()
         self.poseTelem = DrivetrainControl().poseEst.telemetry
+        self.trackingStats = DrivetrainControl().trajCtrl.trackingStats
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = choreo.fromFile(self.absPath, hermite=True)
+            # Do this now, rather than as autonomous starts
+            self._path.precomputeDisplayTrajectories()
+            self.duration = self._path.getTotalTime()
+        return self._path
 
     def initialize(self):
         self.startTime = wpilib.Timer.getFPGATimestamp()
         self.poseTelem.setTrajectory(self.path)
+        self.trackingStats.reset(self.name)
+        self.done = False
 
     def execute(self):
         curTime = wpilib.Timer.getFPGATimestamp() - self.startTime
-        curState = self.path.sample(curTime)
-
-        curState = transform(curState)
+        curState = self.path.sample(curTime, onRed())
 
         self.drivetrain.setCmdTrajectory(curState)
 
@@ -47,6 +58,12 @@ class DrivePathCommand(Command):
         if self.done:
             self.drivetrain.setCmdRobotRelative(0, 0, 0)
             self.poseTelem.setTrajectory(None)
+            self.trackingStats.publishSummary()
+
+    def end(self, interrupted):
+        if interrupted and not self.done:
+            # Cut short (ex: autonomous ended) - still report how it went up to now
+            self.trackingStats.publishSummary(interrupted=True)
 
     def isDone(self):
         return self.done
@@ -76,7 +76,7 @@ class ClimberMotorControl():
             self.motor.setVoltage(0.0)
             self.velCmdFraction = 0
 
-        log(f'Climber Control Zeroed {self.name}', self.hasZeroed == "yes", "bool")
+        log(f'Climber Control Zeroed {self.name}', self.hasZeroed == "yes", "bool", deadband=0)
         self.motor.getVelRPS()
         self.motor.getAppliedOutput()
 
@@ -13,6 +13,7 @@ from drivetrain.poseEstimation.drivetrainPoseEstimator import DrivetrainPoseEsti
 from drivetrain.swerveModuleControl import SwerveModuleControl
 from drivetrain.swerveModuleGainSet import SwerveModuleGainSet
 from drivetrain.drivetrainTrajectoryControl import DrivetrainTrajectoryControl
+from drivetrain.swerveKinematicsKernel import SwerveKinematicsKernel
 from drivetrain.drivetrainPhysical import MAX_FWD_REV_SPEED_MPS, MAX_ROTATE_SPEED_RAD_PER_SEC
 from drivetrain.drivetrainPhysical import FL_ENCODER_MOUNT_OFFSET_RAD
 from drivetrain.drivetrainPhysical import FR_ENCODER_MOUNT_OFFSET_RAD
@@ -25,6 +26,7 @@ from drivetrain.drivetrainPhysical import BR_INVERT_WHEEL_MOTOR
 from drivetrain.drivetrainPhysical import INVERT_AZMTH_MOTOR
 from drivetrain.drivetrainPhysical import INVERT_AZMTH_ENCODER
 from drivetrain.drivetrainPhysical import kinematics
+from drivetrain.drivetrainPhysical import robotToModuleTranslations
 
 
 class DrivetrainControl(metaclass=Singleton):
@@ -38,6 +40,9 @@ class DrivetrainControl(metaclass=Singleton):
         self.markDesModStatesName          = self.stt.makePaddedMarkName("desModStates")
         self.markDesaturateWheelSpeedsName = self.stt.makePaddedMarkName("desaturateWheelSpeeds")
         self.markSendToModulesName         = self.stt.makePaddedMarkName("SendCommandsToModuleAndUpdate")
+        self.markModReadSensorsName        = self.stt.makePaddedMarkName("modules.readSensors")
+        self.markModComputeCommandsName    = self.stt.makePaddedMarkName("modules.computeCommands")
+        self.markModWriteOutputsName       = self.stt.makePaddedMarkName("modules.writeOutputs")
         self.markPoseEstUpdateName         = self.stt.makePaddedMarkName("poseEst.update")
         self.markGainsHasChangedName       = self.stt.makePaddedMarkName("gains.hasChanged")
 
@@ -53,11 +58,39 @@ class DrivetrainControl(metaclass=Singleton):
 
         self.coastCmd = False
 
+        # When we're not moving, "toe in" the wheels to resist getting pushed around.
+        # The same objects are handed to every module's setDesiredState() each loop, so they must never be changed.
+        self.toeInModStates = (
+            SwerveModuleState(angle=Rotation2d.fromDegrees(45), speed=0),
+            SwerveModuleState(angle=Rotation2d.fromDegrees(-45), speed=0),
+            SwerveModuleState(angle=Rotation2d.fromDegrees(45), speed=0),
+            SwerveModuleState(angle=Rotation2d.fromDegrees(-45), speed=0),
+        )
+
+        # Switch between our own plain-float kinematics math, and wpimath's kinematics object.
+        # Both produce the same module commands - the kernel just doesn't allocate as much.
+        self.useKinematicsKernel = True
+        self.kinematicsKernel = SwerveKinematicsKernel(
+            [(trans.X(), trans.Y()) for trans in robotToModuleTranslations], MAX_FWD_REV_SPEED_MPS
+        )
+        # Kernel results are written into these same objects every loop, and each module keeps
+        # a reference to its entry as its desired state. Anything that needs a command to stay
+        # put across loops (ex: SwerveModuleControl.getDesiredState()) has to copy it.
+        self.kernelModStates = tuple(SwerveModuleState() for _ in self.modules)
+        # Angle each kernelModStates entry's Rotation2d was made from - it's only re-made when that changes
+        self.kernelModAnglesRad = [0.0 for _ in self.modules]
+
+        # Update the modules in three phases - all sensor reads, then all the math, then all
+        # motor writes - so every module's sensors are read at nearly the same time.
+        # Turn off to fully update each module before moving on to the next one.
+        self.usePhasedModuleUpdate = True
+
         self.desChSpd = ChassisSpeeds()
         self.curDesPose = Pose2d()
 
         self.gains = SwerveModuleGainSet()
 
+        # On a real robot, the odometry thread gets started once the motors are configured - see robotInit()
         self.poseEst = DrivetrainPoseEstimator(self.getModulePositions())
 
         self.trajCtrl = DrivetrainTrajectoryControl()
@@ -123,31 +156,12 @@ class DrivetrainControl(metaclass=Singleton):
         Main periodic update, should be called every 20ms
         """
 
-        if (abs(self.desChSpd.vx) < 0.01 and
-            abs(self.desChSpd.vy) < 0.01 and
-            abs(self.desChSpd.omega) < 0.01 and
-            not self.coastCmd):
-            # When we're not moving, "toe in" the wheels to resist getting pushed around
-            flModState = SwerveModuleState(angle=Rotation2d.fromDegrees(45), speed=0)
-            frModState = SwerveModuleState(angle=Rotation2d.fromDegrees(-45), speed=0)
-            blModState = SwerveModuleState(angle=Rotation2d.fromDegrees(45), speed=0)
-            brModState = SwerveModuleState(angle=Rotation2d.fromDegrees(-45), speed=0)
-            desModStates = (flModState, frModState, blModState, brModState)
-        else:
-            # Given the current desired chassis speeds, convert to module states
-            desModStates = kinematics.toSwerveModuleStates(self.desChSpd)
-
-        self.stt.perhapsMark(self.markDesModStatesName)
-
-        # Scale back commands if one corner of the robot is going too fast
-        kinematics.desaturateWheelSpeeds(desModStates, MAX_FWD_REV_SPEED_MPS)
-        self.stt.perhapsMark(self.markDesaturateWheelSpeedsName)
+        desModStates = self._getDesModStates()
 
         # Send commands to modules and update
-        for idx, module in enumerate(self.modules):
-            module.setDesiredState(desModStates[idx])
-            module.update()
-        self.stt.perhapsMark(self.markSendToModulesName)
+        for module, desModState in zip(self.modules, desModStates):
+            module.setDesiredState(desModState)
+        self._updateModules()
 
         # Update the estimate of our pose
         self.poseEst.update(self.getModulePositions(), self.getModuleSpeeds())
@@ -164,6 +178,57 @@ class DrivetrainControl(metaclass=Singleton):
             )
         self.stt.perhapsMark(self.markGainsHasChangedName)
 
+    def _getDesModStates(self):
+        # Given the current desired chassis speeds, find each module's desired state
+        if (abs(self.desChSpd.vx) < 0.01 and
+            abs(self.desChSpd.vy) < 0.01 and
+            abs(self.desChSpd.omega) < 0.01 and
+            not self.coastCmd):
+            self.stt.perhapsMark(self.markDesModStatesName)
+            return self.toeInModStates
+        elif self.useKinematicsKernel:
+            return self._getKernelModStates()
+        else:
+            return self._getWpimathModStates()
+
+    def _getKernelModStates(self):
+        # Kernel does the desaturation too
+        kernel = self.kinematicsKernel
+        kernel.calculate(self.desChSpd.vx, self.desChSpd.vy, self.desChSpd.omega)
+        for idx, modState in enumerate(self.kernelModStates):
+            modState.speed = kernel.speedsMps[idx]
+            angleRad = kernel.anglesRad[idx]
+            if angleRad != self.kernelModAnglesRad[idx]:
+                modState.angle = Rotation2d(angleRad)
+                self.kernelModAnglesRad[idx] = angleRad
+        self.stt.perhapsMark(self.markDesModStatesName)
+        return self.kernelModStates
+
+    def _getWpimathModStates(self):
+        desModStates = kinematics.toSwerveModuleStates(self.desChSpd)
+        self.stt.perhapsMark(self.markDesModStatesName)
+
+        # Scale back commands if one corner of the robot is going too fast
+        desModStates = kinematics.desaturateWheelSpeeds(desModStates, MAX_FWD_REV_SPEED_MPS)
+        self.stt.perhapsMark(self.markDesaturateWheelSpeedsName)
+        return desModStates
+
+    def _updateModules(self):
+        if self.usePhasedModuleUpdate:
+            for module in self.modules:
+                module.readSensors()
+            self.stt.perhapsMark(self.markModReadSensorsName)
+            for module in self.modules:
+                module.computeCommands()
+            self.stt.perhapsMark(self.markModComputeCommandsName)
+            for module in self.modules:
+                module.writeOutputs()
+            self.stt.perhapsMark(self.markModWriteOutputsName)
+        else:
+            for module in self.modules:
+                module.update()
+            self.stt.perhapsMark(self.markSendToModulesName)
+
     def _updateAllCals(self):
         # Helper function - updates all calibration on request
         for module in self.modules:
@@ -1,12 +1,13 @@
 import math
 from wpimath.controller import PIDController
 from wpimath.kinematics import ChassisSpeeds
+from drivetrain.trajectoryTrackingStats import TrajectoryTrackingStats
 from drivetrain.drivetrainPhysical import (
     MAX_FWD_REV_SPEED_MPS,
     MAX_ROTATE_SPEED_RAD_PER_SEC,
 )
 from utils.calibration import Calibration
-from utils.signalLogging import log
+from utils.signalLogging import Signal
 from utils.mathUtils import limit
 
 
@@ -24,6 +25,16 @@ class DrivetrainTrajectoryControl:
         self.curVy = 0
         self.curVtheta = 0
 
+        self.xFFSig = Signal("Drivetrain HDC xFF", "mps")
+        self.yFFSig = Signal("Drivetrain HDC yFF", "mps")
+        self.tFFSig = Signal("Drivetrain HDC tFF", "radpersec")
+        self.xFBSig = Signal("Drivetrain HDC xFB", "mps")
+        self.yFBSig = Signal("Drivetrain HDC yFB", "mps")
+        self.tFBSig = Signal("Drivetrain HDC tFB", "radpersec")
+
+        # How well the current trajectory is being followed
+        self.trackingStats = TrajectoryTrackingStats()
+
         self.transP = Calibration("Drivetrain HDC Translation kP", 6.0)
         self.transI = Calibration("Drivetrain HDC Translation kI", 0.0)
         self.transD = Calibration("Drivetrain HDC Translation kD", 0.0)
@@ -63,7 +74,7 @@ class DrivetrainTrajectoryControl:
         """Main periodic update, call this whenever you need new commands
 
         Args:
-            trajCmd (PathPlannerState): Current trajectory state
+            trajCmd (ChoreoTrajectoryState): Current trajectory state
             curEstPose (Pose2d): Current best-estimate of where the robot is at on the field
 
         Returns:
@@ -78,24 +89,27 @@ class DrivetrainTrajectoryControl:
 
         # Feed-Back - Apply additional correction if we're not quite yet at the spot on the field we
         #             want to be at.
-        xFB = self.xCtrl.calculate(curEstPose.X(), trajCmd.getPose().X())
-        yFB = self.yCtrl.calculate(curEstPose.Y(), trajCmd.getPose().Y())
+        xFB = self.xCtrl.calculate(curEstPose.X(), trajCmd.x)
+        yFB = self.yCtrl.calculate(curEstPose.Y(), trajCmd.y)
         tFB = self.tCtrl.calculate(
-            curEstPose.rotation().radians(), trajCmd.getPose().rotation().radians()
+            curEstPose.rotation().radians(), trajCmd.heading
         )
 
-        log("Drivetrain HDC xFF", xFF, "mps")
-        log("Drivetrain HDC yFF", yFF, "mps")
-        log("Drivetrain HDC tFF", tFF, "radpersec")
+        self.xFFSig.set(xFF)
+        self.yFFSig.set(yFF)
+        self.tFFSig.set(tFF)
 
-        log("Drivetrain HDC xFB", xFB, "mps")
-        log("Drivetrain HDC yFB", yFB, "mps")
-        log("Drivetrain HDC tFB", tFB, "radpersec")
+        self.xFBSig.set(xFB)
+        self.yFBSig.set(yFB)
+        self.tFBSig.set(tFB)
 
         vXCmd = limit(xFF + xFB, MAX_FWD_REV_SPEED_MPS)
         vYCmd = limit(yFF + yFB, MAX_FWD_REV_SPEED_MPS)
         vTCmd = limit(tFF + tFB, MAX_ROTATE_SPEED_RAD_PER_SEC)
 
+        saturated = vXCmd != xFF + xFB or vYCmd != yFF + yFB or vTCmd != tFF + tFB
+        self.trackingStats.update(trajCmd, curEstPose, saturated)
+
         return ChassisSpeeds.fromFieldRelativeSpeeds(
             vXCmd, vYCmd, vTCmd, curEstPose.rotation()
         )
@@ -1,16 +1,22 @@
+import math
 import random
+import time
+from threading import Lock, Thread
 import wpilib
 from wpimath.estimator import SwerveDrive4PoseEstimator
 from wpimath.geometry import Pose2d, Rotation2d, Twist2d
+from wpimath.kinematics import ChassisSpeeds, SwerveModulePosition
 from drivetrain.drivetrainPhysical import (
     kinematics,
     #ROBOT_TO_LEFT_CAM,
     #ROBOT_TO_RIGHT_CAM,
 )
 from drivetrain.poseEstimation.drivetrainPoseTelemetry import DrivetrainPoseTelemetry
+from drivetrain.poseEstimation.poseHistory import PoseHistory
 from wrappers.wrapperedGyro import wrapperedGyro
 from utils.faults import Fault
 from utils.signalLogging import log
+from utils.signalLogging import Signal
 
 #from spiresRobot2024.wrappers.wrapperedLimelightCamera import WrapperedLimelightCamera
 
@@ -18,7 +24,14 @@ from utils.signalLogging import log
 class DrivetrainPoseEstimator:
     """Wrapper class for all sensors and logic responsible for estimating where the robot is on the field"""
 
-    def __init__(self, initialModuleStates):
+    def __init__(self, initialModuleStates, clock=None):
+        """
+        Args:
+            initialModuleStates (tuple[SwerveModulePosition]): Module positions to start from
+            clock (Callable[[], float] | None): Where timestamps come from, in seconds. Defaults to
+            FPGA time. Tests pass in something that keeps moving while simulation time is paused.
+        """
+        self.clock = clock if clock is not None else wpilib.Timer.getFPGATimestamp
         self.curEstPose = Pose2d()
         self.curDesPose = Pose2d()
         self.gyro = wrapperedGyro()
@@ -41,6 +54,92 @@ class DrivetrainPoseEstimator:
 
         self.useAprilTags = False
 
+        # Where we've been recently, see getPoseAt()
+        self.poseHistory = PoseHistory()
+        self.curEstPoseTime = self.clock()
+
+        # Optional high-rate odometry, see startOdometryThread()
+        self.lock = Lock()
+        self.odoModules = None
+        self.odoThread = None
+        self.odoRunCmd = False
+        self.odoPeriodS = 0.01
+        self.numOdometrySamples = 0
+        self.numStaleOdometryWheels = 0
+        self.lastOdometryTime = self.curEstPoseTime
+        self.odoSamplesSig = Signal("PE Odometry Samples Per Loop", "count")
+        self.odoStaleWheelFault = Fault("Odometry Wheel Position Unavailable")
+
+    def startOdometryThread(self, modules, rateHz=100):
+        """Move odometry off the main loop and onto its own thread. It reads the gyro
+        and every wheel's position back-to-back, timestamps them, and feeds them to the
+        estimator at rateHz - so the estimate doesn't depend on when in the main loop
+        the sensors happened to be read, or on the main loop running on time.
+        update() then just picks up the latest estimate.
+
+        Only the wheel positions are read fresh. Each module's azimuth angle is the one the
+        main loop read most recently (up to a loop old), since it changes slowly compared
+        to how far the wheels roll. While a wheel motor is not configured, that wheel's last
+        good position is used instead, and a fault is raised.
+        Start this after MotorConfigManager().configureAll(), so the first samples aren't all zero.
+
+        Args:
+            modules (list[SwerveModuleControl]): The drivetrain's modules, in kinematics order
+            rateHz (float): How often to sample
+        """
+        if self.odoThread is not None:
+            return
+        with self.lock:
+            # Own copies - the ones passed in at startup can belong to the modules, which change them every loop
+            self.lastModulePositions = tuple(
+                SwerveModulePosition(position.distance, position.angle) for position in self.lastModulePositions
+            )
+        self.odoModules = modules
+        self.odoPeriodS = 1.0 / rateHz
+        self.odoRunCmd = True
+        self.odoThread = Thread(target=self._odometryThreadMain, daemon=True)
+        self.odoThread.start()
+
+    def stopOdometryThread(self):
+        if self.odoThread is not None:
+            self.odoRunCmd = False
+            self.odoThread.join()
+            self.odoThread = None
+
+    def _odometryThreadMain(self):
+        nextSampleTime = time.perf_counter()
+        while self.odoRunCmd:
+            self._odometrySample()
+
+            nextSampleTime += self.odoPeriodS
+            sleepS = nextSampleTime - time.perf_counter()
+            if sleepS > 0:
+                time.sleep(sleepS)
+            else:
+                # Fell behind - don't try to catch up with a burst of samples
+                nextSampleTime = time.perf_counter()
+
+    def _odometrySample(self):
+        gyroAngle = self._getGyroAngle()
+        modulePositions = [module.sampleOdometryPosition() for module in self.odoModules]
+        timestamp = self.clock()
+        numStale = 0
+        for idx, position in enumerate(modulePositions):
+            if position is None:
+                # Wheel motor isn't configured (yet) - a zero position would look like a big jump.
+                # Only this thread replaces lastModulePositions, so it's safe to read here.
+                modulePositions[idx] = self.lastModulePositions[idx]
+                numStale += 1
+        modulePositions = tuple(modulePositions)
+
+        with self.lock:
+            self.curRawGyroAngle = gyroAngle
+            self.poseEst.updateWithTime(timestamp, gyroAngle, modulePositions)
+            self.lastModulePositions = modulePositions
+            self.lastOdometryTime = timestamp
+            self.numOdometrySamples += 1
+            self.numStaleOdometryWheels = numStale
+
     def setKnownPose(self, knownPose):
         """Reset the robot's estimated pose to some specific position. This is useful if we know with certanty
         we are at some specific spot (Ex: start of autonomous)
@@ -48,13 +147,15 @@ class DrivetrainPoseEstimator:
         Args:
             knownPose (Pose2d): The pose we know we're at
         """
-        if wpilib.TimedRobot.isSimulation():
-            self._simPose = knownPose
-            self.curRawGyroAngle = knownPose.rotation()
-
-        self.poseEst.resetPosition(
-            self.curRawGyroAngle, self.lastModulePositions, knownPose
-        )
+        with self.lock:
+            if wpilib.TimedRobot.isSimulation():
+                self._simPose = knownPose
+                self.curRawGyroAngle = knownPose.rotation()
+            self.poseEst.resetPosition(
+                self.curRawGyroAngle, self.lastModulePositions, knownPose
+            )
+        # We didn't really jump here, history from before doesn't line up with it
+        self.poseHistory.clear()
 
     def update(self, curModulePositions, curModuleSpeeds):
         """Periodic update, call this every 20ms.
@@ -72,16 +173,34 @@ class DrivetrainPoseEstimator:
                 cam.update(self.curEstPose)
                 observations = cam.getPoseEstimates()
                 for observation in observations:
-                    self.poseEst.addVisionMeasurement(
-                        observation.estFieldPose, observation.time
-                    )
+                    with self.lock:
+                        self.poseEst.addVisionMeasurement(
+                            observation.estFieldPose, observation.time
+                        )
                     self.camTargetsVisible = True
                 self.telemetry.addVisionObservations(observations)
 
-        log("PE Vision Targets Seen", self.camTargetsVisible, "bool")
+        log("PE Vision Targets Seen", self.camTargetsVisible, "bool", deadband=0)
 
-        # Read the gyro angle
         self.gyroDisconFault.set(not self.gyro.isConnected())
+
+        if self.odoThread is not None:
+            # Odometry thread has been keeping the estimate up to date, just grab the latest
+            with self.lock:
+                self.curEstPose = self.poseEst.getEstimatedPosition()
+                curEstPoseTime = self.lastOdometryTime
+                gyroAngle = self.curRawGyroAngle
+                numSamples = self.numOdometrySamples
+                self.numOdometrySamples = 0
+                numStaleWheels = self.numStaleOdometryWheels
+            self.odoSamplesSig.set(numSamples)
+            self.odoStaleWheelFault.set(numStaleWheels > 0)
+            self._addToHistory(curEstPoseTime)
+            log("PE Gyro Angle", gyroAngle.degrees(), "deg")
+            self.telemetry.update(self.curEstPose)
+            return
+
+        # Read the gyro angle
         if wpilib.TimedRobot.isSimulation():
             # Simulate an angle based on (simulated) motor speeds with some noise
             chSpds = kinematics.toChassisSpeeds(curModuleSpeeds)
@@ -97,6 +216,7 @@ class DrivetrainPoseEstimator:
         # Update the WPILib Pose Estimate
         self.poseEst.update(self.curRawGyroAngle, curModulePositions)
         self.curEstPose = self.poseEst.getEstimatedPosition()
+        self._addToHistory(self.clock())
 
         # Record the estimate to telemetry/logging-
         log("PE Gyro Angle", self.curRawGyroAngle.degrees(), "deg")
@@ -105,6 +225,54 @@ class DrivetrainPoseEstimator:
         # Remember the module positions for next loop
         self.lastModulePositions = curModulePositions
 
+    def _addToHistory(self, timestamp):
+        # Velocities are the change in estimated pose since the last entry, in the field frame
+        x = self.curEstPose.X()
+        y = self.curEstPose.Y()
+        theta = self.curEstPose.rotation().radians()
+        prevPose = self.poseHistory.getNewestPose()
+        if prevPose is not None:
+            dt = timestamp - self.curEstPoseTime
+            if dt <= 0.0:
+                # Nothing new since last time (ex: odometry thread hasn't run)
+                return
+            prevX, prevY, prevTheta = prevPose
+            vx = (x - prevX) / dt
+            vy = (y - prevY) / dt
+            omega = math.remainder(theta - prevTheta, 2.0 * math.pi) / dt
+        else:
+            vx = vy = omega = 0.0
+        self.poseHistory.add(timestamp, x, y, theta, vx, vy, omega)
+        self.curEstPoseTime = timestamp
+
+    def getPoseAt(self, timestamp):
+        """Where we think the robot was at some time in the last several seconds
+
+        Args:
+            timestamp (float): FPGA time (or the clock passed in), in seconds
+
+        Returns:
+            Pose2d | None: Estimated pose at that time, or None if there's no history yet.
+            Times outside the history get the oldest or newest pose.
+        """
+        if not self.poseHistory.lookup(timestamp):
+            return None
+        return Pose2d(self.poseHistory.outX, self.poseHistory.outY, Rotation2d(self.poseHistory.outTheta))
+
+    def getVelocityAt(self, timestamp):
+        """How fast the robot was moving at some time in the last several seconds
+
+        Args:
+            timestamp (float): FPGA time (or the clock passed in), in seconds
+
+        Returns:
+            ChassisSpeeds | None: Estimated field-relative velocity at that time, or None if there's
+            no history yet. Times outside the history get the oldest or newest velocity.
+        """
+        if not self.poseHistory.lookup(timestamp):
+            return None
+        return ChassisSpeeds(self.poseHistory.outVx, self.poseHistory.outVy, self.poseHistory.outOmega)
+
     def getCurEstPose(self):
         """
         Returns:
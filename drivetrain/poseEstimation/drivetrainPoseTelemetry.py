@@ -1,11 +1,9 @@
-import math
-
 import wpilib
 from wpimath.units import metersToFeet
 from wpimath.trajectory import Trajectory
 from wpimath.geometry import Pose2d
-from utils.signalLogging import log
-from utils.allianceTransformUtils import transform
+from utils.signalLogging import Signal
+from utils.allianceTransformUtils import onRed
 from wrappers.wrapperedPhotonCamera import CameraPoseObservation
 
 
@@ -18,11 +16,21 @@ class DrivetrainPoseTelemetry:
     def __init__(self):
         self.field = wpilib.Field2d()
         wpilib.SmartDashboard.putData("DT Pose 2D", self.field)
-        self.curTraj = Trajectory()
+        self.desTrajObj = self.field.getObject("desTraj")
+        self.noTraj = Trajectory()
+        self.curTraj = self.noTraj
+        self.publishedTraj = None
         self.desPose = Pose2d()
 
         self.visionPoses = []
 
+        self.estXSig = Signal("DT Pose Est X", "ft")
+        self.estYSig = Signal("DT Pose Est Y", "ft")
+        self.estTSig = Signal("DT Pose Est T", "deg")
+        self.desXSig = Signal("DT Pose Des X", "ft")
+        self.desYSig = Signal("DT Pose Des Y", "ft")
+        self.desTSig = Signal("DT Pose Des T", "deg")
+
     def setDesiredPose(self, desPose):
         self.desPose = desPose
 
@@ -37,47 +45,26 @@ class DrivetrainPoseTelemetry:
     def update(self, estPose):
         self.field.getRobotObject().setPose(estPose)
         self.field.getObject("desPose").setPose(self.desPose)
-        self.field.getObject("desTraj").setTrajectory(self.curTraj)
-
-        log("DT Pose Est X", metersToFeet(estPose.X()), "ft")
-        log("DT Pose Est Y", metersToFeet(estPose.Y()), "ft")
-        log("DT Pose Est T", estPose.rotation().degrees(), "deg")
-        log("DT Pose Des X", metersToFeet(self.desPose.X()), "ft")
-        log("DT Pose Des Y", metersToFeet(self.desPose.Y()), "ft")
-        log("DT Pose Des T", self.desPose.rotation().degrees(), "deg")
+        if self.curTraj is not self.publishedTraj:
+            # Only sent when it changes - NT keeps the last value for any dashboard that connects later
+            self.desTrajObj.setTrajectory(self.curTraj)
+            self.publishedTraj = self.curTraj
+
+        self.estXSig.set(metersToFeet(estPose.X()))
+        self.estYSig.set(metersToFeet(estPose.Y()))
+        self.estTSig.set(estPose.rotation().degrees())
+        self.desXSig.set(metersToFeet(self.desPose.X()))
+        self.desYSig.set(metersToFeet(self.desPose.Y()))
+        self.desTSig.set(self.desPose.rotation().degrees())
 
     def setTrajectory(self, trajIn):
         """Display a specific trajectory on the robot Field2d
 
         Args:
-            trajIn (PathPlannerTrajectory): The trajectory to display
+            trajIn (ChoreoTrajectory): The trajectory to display, or None to clear it
         """
-        # Transform choreo state list into useful trajectory for telemetry
+        # The downsampled display version is cached on the trajectory, so this is just a pointer swap
         if trajIn is not None:
-            stateList = []
-
-            # For visual appearance and avoiding sending too much over NT,
-            # make sure we only send a sampled subset of the positions
-            sampTime = 0
-            while sampTime < trajIn.getTotalTime():
-                stateList.append(
-                    self._choreoToWPIState(transform(trajIn.sample(sampTime)))
-                )
-                sampTime += 0.5
-
-            # Make sure final pose is in the list
-            stateList.append(self._choreoToWPIState(transform(trajIn.samples[-1])))
-
-            self.curTraj = Trajectory(stateList)
+            self.curTraj = trajIn.getDisplayTrajectory(onRed())
         else:
-            self.curTraj = Trajectory()
-
-    # PathPlanner has a built in "to-wpilib" representation, but it doesn't
-    # account for holonomic heading. Fix that.
-    def _choreoToWPIState(self, inVal):
-        return Trajectory.State(
-            acceleration=0,
-            pose=inVal.getPose(),
-            t=inVal.timestamp,
-            velocity=math.hypot(inVal.velocityX, inVal.velocityY),
-        )
+            self.curTraj = self.noTraj
@@ -0,0 +1,129 @@
+import math
+from array import array
+
+TWO_PI = 2.0 * math.pi
+
+
+class PoseHistory:
+    """
+    Fixed-size history of where the robot was, for answering "where was the robot at time t"
+    (ex: lining up a delayed vision measurement, or shooting while moving).
+    Stored as a ring of plain float arrays, so adding an entry never allocates.
+    Entries must be added in increasing time order. Lookups binary search for the
+    two entries around the requested time and interpolate between them.
+    """
+
+    def __init__(self, capacity=512):
+        """
+        Args:
+            capacity (int): Number of entries kept. Rounded up to a power of two.
+        """
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.xs = array("d", bytes(8 * capacity))
+        self.ys = array("d", bytes(8 * capacity))
+        self.thetas = array("d", bytes(8 * capacity))
+        self.vxs = array("d", bytes(8 * capacity))
+        self.vys = array("d", bytes(8 * capacity))
+        self.omegas = array("d", bytes(8 * capacity))
+        self.startIdx = 0
+        self.count = 0
+
+        # Lookup results
+        self.outX = 0.0
+        self.outY = 0.0
+        self.outTheta = 0.0
+        self.outVx = 0.0
+        self.outVy = 0.0
+        self.outOmega = 0.0
+
+    def clear(self):
+        self.startIdx = 0
+        self.count = 0
+
+    def add(self, timestamp, x, y, theta, vx, vy, omega):
+        """Record the robot's pose (field frame, meters and radians) and velocity at timestamp (seconds)"""
+        if self.count < self.capacity:
+            idx = (self.startIdx + self.count) & self.mask
+            self.count += 1
+        else:
+            # Full - overwrite the oldest
+            idx = self.startIdx
+            self.startIdx = (self.startIdx + 1) & self.mask
+        self.timestamps[idx] = timestamp
+        self.xs[idx] = x
+        self.ys[idx] = y
+        self.thetas[idx] = theta
+        self.vxs[idx] = vx
+        self.vys[idx] = vy
+        self.omegas[idx] = omega
+
+    def getOldestTime(self):
+        return self.timestamps[self.startIdx] if self.count > 0 else None
+
+    def getNewestTime(self):
+        return self.timestamps[self._newestIdx()] if self.count > 0 else None
+
+    def getNewestPose(self):
+        """
+        Returns:
+            tuple[float, float, float] | None: x, y and theta of the most recent entry, or None if there isn't one
+        """
+        if self.count == 0:
+            return None
+        idx = self._newestIdx()
+        return self.xs[idx], self.ys[idx], self.thetas[idx]
+
+    def _newestIdx(self):
+        return (self.startIdx + self.count - 1) & self.mask
+
+    def lookup(self, timestamp):
+        """Find the pose and velocity at timestamp, and put them in outX, outY, outTheta, outVx, outVy and outOmega.
+        Times before the oldest or after the newest entry get that entry.
+
+        Returns:
+            bool: False if there's no history yet
+        """
+        if self.count == 0:
+            return False
+        timestamps = self.timestamps
+        mask = self.mask
+        startIdx = self.startIdx
+
+        # Binary search for the first entry after timestamp, by position in the ring (0 = oldest)
+        lo = 0
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if timestamps[(startIdx + mid) & mask] <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo in (0, self.count):
+            idx = (startIdx + min(lo, self.count - 1)) & mask
+            self._copyOut(idx)
+            return True
+
+        prevIdx = (startIdx + lo - 1) & mask
+        nextIdx = (startIdx + lo) & mask
+        frac = (timestamp - timestamps[prevIdx]) / (timestamps[nextIdx] - timestamps[prevIdx])
+        self.outX = self.xs[prevIdx] + (self.xs[nextIdx] - self.xs[prevIdx]) * frac
+        self.outY = self.ys[prevIdx] + (self.ys[nextIdx] - self.ys[prevIdx]) * frac
+        # Shortest way around the circle
+        thetaDelta = math.remainder(self.thetas[nextIdx] - self.thetas[prevIdx], TWO_PI)
+        self.outTheta = math.remainder(self.thetas[prevIdx] + thetaDelta * frac, TWO_PI)
+        self.outVx = self.vxs[prevIdx] + (self.vxs[nextIdx] - self.vxs[prevIdx]) * frac
+        self.outVy = self.vys[prevIdx] + (self.vys[nextIdx] - self.vys[prevIdx]) * frac
+        self.outOmega = self.omegas[prevIdx] + (self.omegas[nextIdx] - self.omegas[prevIdx]) * frac
+        return True
+
+    def _copyOut(self, idx):
+        self.outX = self.xs[idx]
+        self.outY = self.ys[idx]
+        self.outTheta = self.thetas[idx]
+        self.outVx = self.vxs[idx]
+        self.outVy = self.vys[idx]
+        self.outOmega = self.omegas[idx]
@@ -0,0 +1,73 @@
+import math
+from array import array
+
+# Below this, a wheel's direction is undefined - same cutoff as wpimath's Rotation2d(x, y)
+_MIN_MODULE_SPEED_MPS = 1.0e-6
+
+
+class SwerveKinematicsKernel:
+    """
+    Swerve drive inverse kinematics and wheel speed desaturation in plain floats.
+    Does the same math as wpimath's SwerveDrive4Kinematics.toSwerveModuleStates()
+    followed by desaturateWheelSpeeds(), but without creating any objects -
+    results are written into preallocated arrays, one entry per module.
+
+    Each module's velocity is a fixed 2x3 block of the inverse kinematics matrix
+    times the chassis speeds (vx, vy, omega):
+        [vxMod]   [1  0  -y] [vx   ]
+        [vyMod] = [0  1   x] [vy   ]
+                             [omega]
+    where (x, y) is the module's position relative to the robot's center.
+    Like wpimath, when the whole robot is commanded to stop, every module keeps
+    pointing where it was last commanded. A single module with no speed while
+    the others move gets an angle of zero.
+    """
+
+    def __init__(self, moduleTranslations, maxWheelSpeedMps):
+        """
+        Args:
+            moduleTranslations (list[tuple[float, float]]): (x, y) of each module, in meters
+            maxWheelSpeedMps (float): No wheel will be commanded faster than this
+        """
+        self.numModules = len(moduleTranslations)
+        self.modX = array("d", [trans[0] for trans in moduleTranslations])
+        self.modY = array("d", [trans[1] for trans in moduleTranslations])
+        self.maxWheelSpeedMps = maxWheelSpeedMps
+
+        # Outputs
+        self.speedsMps = array("d", [0.0] * self.numModules)
+        self.anglesRad = array("d", [0.0] * self.numModules)
+
+    def calculate(self, vx, vy, omega):
+        """Find each module's speed and angle for the given chassis speeds.
+        Results are in speedsMps and anglesRad.
+
+        Args:
+            vx (float): Desired robot-relative forward speed, in meters per second
+            vy (float): Desired robot-relative leftward speed, in meters per second
+            omega (float): Desired rotational speed, in radians per second
+        """
+        speeds = self.speedsMps
+        angles = self.anglesRad
+        modX = self.modX
+        modY = self.modY
+
+        if vx == 0.0 and vy == 0.0 and omega == 0.0:
+            for idx in range(self.numModules):
+                speeds[idx] = 0.0
+            return
+
+        maxSpeed = 0.0
+        for idx in range(self.numModules):
+            vxMod = vx - omega * modY[idx]
+            vyMod = vy + omega * modX[idx]
+            speed = math.hypot(vxMod, vyMod)
+            speeds[idx] = speed
+            angles[idx] = math.atan2(vyMod, vxMod) if speed > _MIN_MODULE_SPEED_MPS else 0.0
+            maxSpeed = max(maxSpeed, speed)
+
+        # Scale back all wheels together if one corner of the robot is going too fast
+        if maxSpeed > self.maxWheelSpeedMps:
+            scale = self.maxWheelSpeedMps / maxSpeed
+            for idx in range(self.numModules):
+                speeds[idx] *= scale
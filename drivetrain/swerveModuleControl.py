@@ -8,10 +8,11 @@ from wpimath.geometry import Rotation2d
 import wpilib
 
 from wrappers.wrapperedSparkMax import WrapperedSparkMax
+from wrappers.sparkMaxFrameProfiles import FRAME_PROFILE_ODOMETRY_WHEEL, FRAME_PROFILE_AZIMUTH
 from dashboardWidgets.swerveState import getAzmthDesTopicName, getAzmthActTopicName
 from dashboardWidgets.swerveState import getSpeedDesTopicName, getSpeedActTopicName
 from utils.calibration import Calibration
-from utils.signalLogging import log
+from utils.signalLogging import Signal
 from utils.units import rad2Deg
 from utils.faults import Fault
 from utils.segmentTimeTracker import SegmentTimeTracker
@@ -50,9 +51,10 @@ class SwerveModuleControl:
         """
         self.wheelCurLimitACal = Calibration(f'SwerveModule {moduleName} Current Limit', 40, "Amps", 0)
         self.wheelMotor = WrapperedSparkMax(
-            wheelMotorCanID, moduleName + "_wheel", brakeMode=False, curLimitA=int(self.wheelCurLimitACal.get()))
+            wheelMotorCanID, moduleName + "_wheel", brakeMode=False, curLimitA=int(self.wheelCurLimitACal.get()),
+            frameProfile=FRAME_PROFILE_ODOMETRY_WHEEL)
         self.azmthMotor = WrapperedSparkMax(
-            azmthMotorCanID, moduleName + "_azmth", True
+            azmthMotorCanID, moduleName + "_azmth", True, frameProfile=FRAME_PROFILE_AZIMUTH
         )
 
         self.azmthEnc = wrapperedSwerveDriveAzmthEncoder(
@@ -75,8 +77,21 @@ class SwerveModuleControl:
 
         self._prevMotorDesSpeed = 0
 
+        # Passed between the update phases. azmthAngleRad is also read by the odometry thread -
+        # it's only ever replaced as a whole, never changed in place.
+        self.azmthAngleRad = 0.0
+        self.azmthAngleRotation2d = Rotation2d()
+        self.azmthVoltage = 0.0
+        self.motorDesSpd = 0.0
+
         self.moduleName = moduleName
 
+        self.azmthDesSig = Signal(getAzmthDesTopicName(moduleName), "deg")
+        self.azmthActSig = Signal(getAzmthActTopicName(moduleName), "deg")
+        self.speedDesSig = Signal(getSpeedDesTopicName(moduleName), "frac")
+        self.speedActSig = Signal(getSpeedActTopicName(moduleName), "frac")
+        self.wheelFFSig = Signal(f"Dt_{moduleName}_FF_V", "V")
+
         self.serialFault = Fault(f"Serial Number Unknown")
         self.rId = RobotIdentification()
         self.stt = SegmentTimeTracker()
@@ -93,31 +108,11 @@ class SwerveModuleControl:
         """
         Helper function to put all relevant data to logs and dashboards for this module
         """
-        log(
-            getAzmthDesTopicName(self.moduleName),
-            self.optimizedDesiredState.angle.degrees(),
-            "deg",
-        )
-        log(
-            getAzmthActTopicName(self.moduleName),
-            self.actualState.angle.degrees(),
-            "deg",
-        )
-        log(
-            getSpeedDesTopicName(self.moduleName),
-            self.optimizedDesiredState.speed / MAX_FWD_REV_SPEED_MPS,
-            "frac",
-        )
-        log(
-            getSpeedActTopicName(self.moduleName),
-            (self.actualState.speed) / MAX_FWD_REV_SPEED_MPS,
-            "frac",
-        )
-        log(
-            f"Dt_{self.moduleName}_FF_V",
-            self.wheelMotorVoltageFF,
-            "V"
-        )
+        self.azmthDesSig.set(self.optimizedDesiredState.angle.degrees())
+        self.azmthActSig.set(self.actualState.angle.degrees())
+        self.speedDesSig.set(self.optimizedDesiredState.speed / MAX_FWD_REV_SPEED_MPS)
+        self.speedActSig.set(self.actualState.speed / MAX_FWD_REV_SPEED_MPS)
+        self.wheelFFSig.set(self.wheelMotorVoltageFF)
 
         if self.rId.getSerialFaulted():
             self.serialFault.setFaulted()
@@ -169,37 +164,62 @@ class SwerveModuleControl:
         """
         self.desiredState = desState
 
-    def update(self):
-        """Main update function, call every 20ms"""
-        if self.wheelCurLimitACal.isChanged():
-            self.wheelMotor.setSmartCurrentLimit(int(self.wheelCurLimitACal.get()))
+    def sampleOdometryPosition(self):
+        """Read the wheel position right now, for the odometry thread. The azimuth angle changes
+        slowly compared to the wheel distance, so the main loop's most recent reading is used.
+
+        Safe to call from another thread while the main loop runs: wheelMotor.readMotorPositionRad()
+        only reads the latest status frame REV's library received, and azmthAngleRad is a single
+        float that readSensors() replaces. The azimuth encoder wrapper itself is main loop only.
+
+        Returns:
+            SwerveModulePosition | None: New position object, safe to hand to another thread.
+            None if the wheel motor isn't configured, since its position would just read zero.
+        """
+        if not self.wheelMotor.connected:
+            return None
+        return SwerveModulePosition(
+            dtMotorRotToLinear(self.wheelMotor.readMotorPositionRad()),
+            Rotation2d(self.azmthAngleRad),
+        )
 
+    def readSensors(self):
+        """First phase of the update - read all sensors for this module"""
         # Read from the azimuth angle sensor (encoder)
         self.azmthEnc.update()
 
-        azmthAngleRad = self.azmthEnc.getAngleRad()
-        azmthAngleRotation2d = Rotation2d(azmthAngleRad)
+        self.azmthAngleRad = self.azmthEnc.getAngleRad()
+        self.azmthAngleRotation2d = Rotation2d(self.azmthAngleRad)
         self.stt.perhapsMark(self.markAzmthEncUpdateName)
 
+        if not wpilib.TimedRobot.isSimulation():
+            # Real Robot
+            # Update this module's actual state with measurements from the sensors
+            self.actualState.angle = self.azmthAngleRotation2d
+            self.actualState.speed = dtMotorRotToLinear(
+                self.wheelMotor.getMotorVelocityRadPerSec()
+            )
+            self.actualPosition.distance = dtMotorRotToLinear(
+                self.wheelMotor.getMotorPositionRad()
+            )
+            self.actualPosition.angle = self.actualState.angle
+            self.stt.perhapsMark(self.markUpdateActualStateName)
+
+    def computeCommands(self):
+        """Second phase of the update - work out motor commands from the sensor readings. No CAN traffic."""
         # Optimize our incoming swerve command to minimize motion
         self.optimizedDesiredState = SwerveModuleState.optimize(self.desiredState, 
-                                                                azmthAngleRotation2d)
+                                                                self.azmthAngleRotation2d)
         self.stt.perhapsMark(self.markOptimizedDesiredName)
         # Use a PID controller to calculate the voltage for the azimuth motor
         self.azmthCtrl.setSetpoint(self.optimizedDesiredState.angle.degrees()) # type: ignore
-        azmthVoltage = self.azmthCtrl.calculate(rad2Deg(azmthAngleRad))
-        self.azmthMotor.setVoltage(azmthVoltage)
-        self.stt.perhapsMark(self.markAzmthMotorSetVoltageName)
+        self.azmthVoltage = self.azmthCtrl.calculate(rad2Deg(self.azmthAngleRad))
 
-        # Send voltage and speed commands to the wheel motor
-        
-        motorDesSpd = dtLinearToMotorRot(self.optimizedDesiredState.speed)
-        motorDesAccel = (motorDesSpd - self._prevMotorDesSpeed)/ 0.02
-        self.wheelMotorVoltageFF = self.wheelMotorFF.calculate(motorDesSpd, motorDesAccel)
-        self.wheelMotor.setVelCmd(motorDesSpd, self.wheelMotorVoltageFF)
-        self.stt.perhapsMark(self.markWheelMotorSetVelCmdName)
-        
-        self._prevMotorDesSpeed = motorDesSpd # save for next loop
+        # Voltage and speed commands for the wheel motor
+        self.motorDesSpd = dtLinearToMotorRot(self.optimizedDesiredState.speed)
+        motorDesAccel = (self.motorDesSpd - self._prevMotorDesSpeed)/ 0.02
+        self.wheelMotorVoltageFF = self.wheelMotorFF.calculate(self.motorDesSpd, motorDesAccel)
+        self._prevMotorDesSpeed = self.motorDesSpd # save for next loop
 
         if wpilib.TimedRobot.isSimulation():
             # Simulation - assume module is almost perfect but with some noise
@@ -212,18 +232,24 @@ class SwerveModuleControl:
             )
             self.actualPosition.distance += self.actualState.speed * 0.02
             self.actualPosition.angle = self.actualState.angle
-        else:
-            # Real Robot
-            # Update this module's actual state with measurements from the sensors
-            self.actualState.angle = azmthAngleRotation2d
-            self.actualState.speed = dtMotorRotToLinear(
-                self.wheelMotor.getMotorVelocityRadPerSec()
-            )
-            self.actualPosition.distance = dtMotorRotToLinear(
-                self.wheelMotor.getMotorPositionRad()
-            )
-            self.actualPosition.angle = self.actualState.angle
-            self.stt.perhapsMark(self.markUpdateActualStateName)
+
+    def writeOutputs(self):
+        """Last phase of the update - send the computed commands to the motors"""
+        if self.wheelCurLimitACal.isChanged():
+            self.wheelMotor.setSmartCurrentLimit(int(self.wheelCurLimitACal.get()))
+
+        self.azmthMotor.setVoltage(self.azmthVoltage)
+        self.stt.perhapsMark(self.markAzmthMotorSetVoltageName)
+
+        self.wheelMotor.setVelCmd(self.motorDesSpd, self.wheelMotorVoltageFF)
+        self.stt.perhapsMark(self.markWheelMotorSetVelCmdName)
 
         self._updateTelemetry()
         self.stt.perhapsMark(self.markUpdateTelemetryName)
+
+    def update(self):
+        """Main update function, call every 20ms.
+        Runs all three update phases back to back, for just this module."""
+        self.readSensors()
+        self.computeCommands()
+        self.writeOutputs()
@@ -0,0 +1,119 @@
+import math
+from utils.signalLogging import Signal
+
+# Below this desired speed, the path has no well-defined direction, so position
+# error isn't split into along-track and cross-track parts
+MIN_SPEED_FOR_DIRECTION_MPS = 0.05
+
+
+class _ErrorAccumulator:
+    """Running RMS and max-magnitude of one error term"""
+
+    __slots__ = "count", "sumSq", "maxAbs"
+
+    def __init__(self):
+        self.count = 0
+        self.sumSq = 0.0
+        self.maxAbs = 0.0
+
+    def reset(self):
+        self.count = 0
+        self.sumSq = 0.0
+        self.maxAbs = 0.0
+
+    def append(self, err):
+        self.count += 1
+        self.sumSq += err * err
+        self.maxAbs = max(self.maxAbs, abs(err))
+
+    def rms(self):
+        return math.sqrt(self.sumSq / self.count) if self.count > 0 else 0.0
+
+
+class TrajectoryTrackingStats:
+    """
+    Measures how well the drivetrain followed one trajectory.
+    Position error is split into along-track (ahead of or behind the desired pose,
+    along the direction of travel) and cross-track (off to the side of the path) parts,
+    since they usually point at different problems - along-track error at
+    feed-forward/velocity tracking, cross-track error at feedback gains.
+    Everything is kept in running sums, so update() allocates nothing.
+    """
+
+    def __init__(self):
+        self.pathName = ""
+        self.alongTrack = _ErrorAccumulator()
+        self.crossTrack = _ErrorAccumulator()
+        self.heading = _ErrorAccumulator()
+        self.durationS = 0.0
+        self.saturatedS = 0.0
+        self.prevTrajTime = None
+
+        self.alongTrackSig = Signal("Drivetrain HDC Along Track Err", "m")
+        self.crossTrackSig = Signal("Drivetrain HDC Cross Track Err", "m")
+        self.headingSig = Signal("Drivetrain HDC Heading Err", "rad")
+        self.saturatedSig = Signal("Drivetrain HDC Saturated", "bool")
+
+        self.summaryAlongRmsSig = Signal("Drivetrain HDC Path Along Track RMS", "m", deadband=0)
+        self.summaryCrossRmsSig = Signal("Drivetrain HDC Path Cross Track RMS", "m", deadband=0)
+        self.summaryCrossMaxSig = Signal("Drivetrain HDC Path Cross Track Max", "m", deadband=0)
+        self.summaryHeadingRmsSig = Signal("Drivetrain HDC Path Heading RMS", "rad", deadband=0)
+        self.summarySaturatedSig = Signal("Drivetrain HDC Path Saturated Time", "sec", deadband=0)
+
+    def reset(self, pathName=""):
+        """Start measuring a new trajectory"""
+        self.pathName = pathName
+        self.alongTrack.reset()
+        self.crossTrack.reset()
+        self.heading.reset()
+        self.durationS = 0.0
+        self.saturatedS = 0.0
+        self.prevTrajTime = None
+
+    def update(self, trajCmd, curEstPose, saturated):
+        """Record one loop of trajectory following
+
+        Args:
+            trajCmd (ChoreoTrajectoryState): Current trajectory state
+            curEstPose (Pose2d): Current best-estimate of where the robot is at on the field
+            saturated (bool): True if any command was limited this loop
+        """
+        errX = curEstPose.X() - trajCmd.x
+        errY = curEstPose.Y() - trajCmd.y
+        speed = math.hypot(trajCmd.velocityX, trajCmd.velocityY)
+        if speed > MIN_SPEED_FOR_DIRECTION_MPS:
+            dirX = trajCmd.velocityX / speed
+            dirY = trajCmd.velocityY / speed
+            alongErr = errX * dirX + errY * dirY
+            # Positive when the robot is to the left of the path
+            crossErr = dirX * errY - dirY * errX
+            self.alongTrack.append(alongErr)
+            self.crossTrack.append(crossErr)
+            self.alongTrackSig.set(alongErr)
+            self.crossTrackSig.set(crossErr)
+
+        headingErr = math.remainder(curEstPose.rotation().radians() - trajCmd.heading, 2.0 * math.pi)
+        self.heading.append(headingErr)
+        self.headingSig.set(headingErr)
+
+        # Time steps come from the trajectory, so they're right even if a loop runs long
+        if self.prevTrajTime is not None:
+            dt = max(trajCmd.timestamp - self.prevTrajTime, 0.0)
+            self.durationS += dt
+            if saturated:
+                self.saturatedS += dt
+        self.prevTrajTime = trajCmd.timestamp
+        self.saturatedSig.set(saturated)
+
+    def publishSummary(self, interrupted=False):
+        """Log and print the stats for the trajectory just finished"""
+        self.summaryAlongRmsSig.set(self.alongTrack.rms())
+        self.summaryCrossRmsSig.set(self.crossTrack.rms())
+        self.summaryCrossMaxSig.set(self.crossTrack.maxAbs)
+        self.summaryHeadingRmsSig.set(self.heading.rms())
+        self.summarySaturatedSig.set(self.saturatedS)
+        print(f"[Traj] {self.pathName}{' (interrupted)' if interrupted else ''}: "
+              f"along-track RMS {self.alongTrack.rms():.3f}m max {self.alongTrack.maxAbs:.3f}m, "
+              f"cross-track RMS {self.crossTrack.rms():.3f}m max {self.crossTrack.maxAbs:.3f}m, "
+              f"heading RMS {math.degrees(self.heading.rms()):.1f}deg max {math.degrees(self.heading.maxAbs):.1f}deg, "
+              f"saturated {self.saturatedS:.2f}s of {self.durationS:.2f}s")
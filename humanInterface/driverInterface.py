@@ -106,16 +106,16 @@ class DriverInterface:
             self.ctrl.resetControllerMapping()
             self.connectedFault.setFaulted()
 
-        log("DI fieldR Cmd", self.fieldRelative, "bool")
-        log("DI MAX_FWD_REV_SPEED_MPS", MAX_FWD_REV_SPEED_MPS, "mps")
+        log("DI fieldR Cmd", self.fieldRelative, "bool", deadband=0)
+        log("DI MAX_FWD_REV_SPEED_MPS", MAX_FWD_REV_SPEED_MPS, "mps", deadband=0)
         log("DI FwdRev Raw", self.velXCmdRaw, "mps")
         log("DI Strafe Raw", self.velYCmdRaw, "mps")
         log("DI Rotate Raw", rad2Deg(self.velTCmdRaw), "degPerSec")
         log("DI FwdRev Cmd", self.velXCmd, "mps")
         log("DI Strafe Cmd", self.velYCmd, "mps")
         log("DI Rotate Cmd", rad2Deg(self.velTCmd), "degPerSec")
-        log("DI Coast Cmd", self.coastCmd, "bool")
-        log("DI connected", self.ctrl.isConnected(), "bool")
+        log("DI Coast Cmd", self.coastCmd, "bool", deadband=0)
+        log("DI connected", self.ctrl.isConnected(), "bool", deadband=0)
 
     def getVxCmd(self):
         """
@@ -1,23 +1,123 @@
+import hashlib
 import json
-from jormungandr.choreoTrajectory import ChoreoTrajectoryState
+import os
+import struct
+from array import array
 from jormungandr.choreoTrajectory import ChoreoTrajectory
 
+# Parsing a .traj file's JSON and resampling it is slow, so the first load of each
+# trajectory saves its samples in a compact binary cache file next to it. Later
+# loads just copy the arrays back out of the cache.
+#
+# Cache layout (little-endian):
+#   header:       magic, source file size, source file mtime (ns), sha1 of the source file,
+#                 grid interpolation flags, number of samples, time grid spacing, number of grid points
+#   columns:      timestamp, x, y, heading, velocityX, velocityY, angularVelocity -
+#                 each one a contiguous block of float64's
+#   grid columns: x through angularVelocity, resampled onto the trajectory's time grid
+CACHE_EXT = ".trajcache"
+CACHE_MAGIC = b"CHORTRJ3"
+_CACHE_HEADER = struct.Struct("<8sQq20sIQdQ")
+_FLAG_HERMITE = 0x1
+_SAMPLE_FIELDS = ("timestamp", "x", "y", "heading", "velocityX", "velocityY", "angularVelocity")
 
-def fromFile(file: str) -> ChoreoTrajectory:
-    samples = []
-    with open(file, "r", encoding="utf-8") as trajFile:
-        data = json.load(trajFile)
-        for sample in data["samples"]:
-            samples.append(
-                ChoreoTrajectoryState(
-                    float(sample["timestamp"]),
-                    float(sample["x"]),
-                    float(sample["y"]),
-                    float(sample["heading"]),
-                    float(sample["velocityX"]),
-                    float(sample["velocityY"]),
-                    float(sample["angularVelocity"]),
-                )
-            )
-
-    return ChoreoTrajectory(samples)
+
+def _parseTraj(rawData):
+    data = json.loads(rawData)
+    return tuple(
+        array("d", [float(sample[field]) for sample in data["samples"]])
+        for field in _SAMPLE_FIELDS
+    )
+
+
+def _checkCacheHeader(data, srcStat, srcDigest):
+    # Returns the cache's (grid flags, column lengths) if it's for this source file, or None if not
+    if len(data) < _CACHE_HEADER.size:
+        return None
+    magic, srcSize, srcMtimeNs, digest, gridFlags, numSamples, _, numGridPoints = _CACHE_HEADER.unpack_from(data, 0)
+    if magic != CACHE_MAGIC:
+        return None
+    statMatches = srcSize == srcStat.st_size and srcMtimeNs == srcStat.st_mtime_ns
+    if not statMatches and digest != srcDigest:
+        return None
+    colLens = [numSamples] * len(_SAMPLE_FIELDS) + [numGridPoints] * (len(_SAMPLE_FIELDS) - 1)
+    if len(data) != _CACHE_HEADER.size + 8 * sum(colLens):
+        return None
+    return gridFlags, colLens
+
+
+def _readCache(cachePath, srcStat, srcDigest=None):
+    # Returns the cached (columns, grid flags, grid columns), or None if there's no cache or it's out of date.
+    # The cache is up to date if the source file's size and mtime match, or if its contents do.
+    try:
+        with open(cachePath, "rb") as cacheFile:
+            data = cacheFile.read()
+    except OSError:
+        return None
+    header = _checkCacheHeader(data, srcStat, srcDigest)
+    if header is None:
+        return None
+    gridFlags, colLens = header
+
+    columns = []
+    start = _CACHE_HEADER.size
+    for colLen in colLens:
+        col = array("d")
+        col.frombytes(data[start:start + 8 * colLen])
+        columns.append(col)
+        start += 8 * colLen
+    return tuple(columns[:len(_SAMPLE_FIELDS)]), gridFlags, tuple(columns[len(_SAMPLE_FIELDS):])
+
+
+def _writeCache(cachePath, srcStat, srcDigest, traj):
+    tmpPath = cachePath + ".tmp"
+    try:
+        with open(tmpPath, "wb") as cacheFile:
+            gridFlags = _FLAG_HERMITE if traj.hermite else 0
+            cacheFile.write(_CACHE_HEADER.pack(CACHE_MAGIC, srcStat.st_size, srcStat.st_mtime_ns, srcDigest,
+                                               gridFlags, len(traj.srcCols[0]), traj.gridDt, traj.lastGridIdx + 1))
+            for col in traj.srcCols + traj.blueCols:
+                cacheFile.write(col.tobytes())
+        os.replace(tmpPath, cachePath)
+    except OSError as err:
+        # Read-only deploy directory or similar - not a problem, just slower next time
+        print(f"Could not write trajectory cache {cachePath}: {err}")
+
+
+def _fromCached(cached, hermite):
+    columns, gridFlags, gridColumns = cached
+    if gridFlags != (_FLAG_HERMITE if hermite else 0):
+        gridColumns = None # Cached grid was interpolated differently, make a new one
+    return ChoreoTrajectory(columns=columns, gridColumns=gridColumns, hermite=hermite)
+
+
+def fromFile(file: str, useCache: bool = True, hermite: bool = False) -> ChoreoTrajectory:
+    """Load a Choreo .traj file
+
+    Args:
+        file: Path to the .traj file
+        useCache: Use (and update) the binary cache file next to the .traj file
+        hermite: Use cubic Hermite interpolation between samples, see ChoreoTrajectory
+    """
+    if not useCache:
+        with open(file, "rb") as trajFile:
+            return ChoreoTrajectory(columns=_parseTraj(trajFile.read()), hermite=hermite)
+
+    cachePath = os.path.splitext(file)[0] + CACHE_EXT
+    srcStat = os.stat(file)
+    cached = _readCache(cachePath, srcStat)
+    if cached is not None and cached[1] == (_FLAG_HERMITE if hermite else 0):
+        return _fromCached(cached, hermite)
+
+    # Stale, interpolated differently, or copied somewhere that changed its mtime (ex: deploying) - check the contents
+    with open(file, "rb") as trajFile:
+        rawData = trajFile.read()
+    srcDigest = hashlib.sha1(rawData).digest()
+    cached = _readCache(cachePath, srcStat, srcDigest)
+    if cached is not None:
+        traj = _fromCached(cached, hermite)
+    else:
+        traj = ChoreoTrajectory(columns=_parseTraj(rawData), hermite=hermite)
+    # Either way, re-write the cache so next time the quick size/mtime check passes
+    _writeCache(cachePath, srcStat, srcDigest, traj)
+    return traj
@@ -1,18 +1,51 @@
 from __future__ import annotations
 import math
+from array import array
+from bisect import bisect_right
 
 from wpimath.geometry import Pose2d, Rotation2d
 from wpimath.kinematics import ChassisSpeeds
+from wpimath.trajectory import Trajectory
 from utils.constants import FIELD_LENGTH_FT
 
 from utils.units import ft2m
 
+# Spacing of the uniform time grid trajectories are resampled onto at load time
+TRAJ_GRID_DT = 0.01
+TWO_PI = 2.0 * math.pi
+# Spacing of the poses in the trajectory shown on dashboards - sparse, to keep NT traffic down
+DISPLAY_SAMPLE_DT = 0.5
+
 
 # Doesn't appear to be pulled into python from Interpolatable
 def _floatInterp(start, end, frac) -> float:
     return start + (end - start) * frac
 
 
+def _angleInterp(start, end, frac) -> float:
+    # Go the short way around the circle - from 179 deg to -179 deg is 2 deg, not 358
+    return start + math.remainder(end - start, 2.0 * math.pi) * frac
+
+
+def _hermiteInterp(start, startVel, end, endVel, span, frac) -> float:
+    # Cubic Hermite spline - matches both endpoints' values and rates of change,
+    # so curves between sparse samples stay curved
+    fracSq = frac * frac
+    fracCu = fracSq * frac
+    return ((2.0 * fracCu - 3.0 * fracSq + 1.0) * start
+            + (fracCu - 2.0 * fracSq + frac) * span * startVel
+            + (-2.0 * fracCu + 3.0 * fracSq) * end
+            + (fracCu - fracSq) * span * endVel)
+
+
+def _unwrapAngles(angles) -> array:
+    # Remove jumps of 2pi between consecutive angles, so plain interpolation between them takes the short way
+    retVal = array("d", angles[:1])
+    for angle in angles[1:]:
+        retVal.append(_angleInterp(retVal[-1], angle, 1.0))
+    return retVal
+
+
 class ChoreoTrajectoryState:
     def __init__(
         self,
@@ -35,6 +68,9 @@ class ChoreoTrajectoryState:
     def getPose(self) -> Pose2d:
         return Pose2d(self.x, self.y, Rotation2d(value=self.heading))
 
+    def copy(self) -> ChoreoTrajectoryState:
+        return ChoreoTrajectoryState(*self.asArray())
+
     def getChassisSpeeds(self) -> ChassisSpeeds:
         return ChassisSpeeds(self.velocityX, self.velocityY, self.angularVelocity)
 
@@ -58,7 +94,7 @@ class ChoreoTrajectoryState:
             t,
             _floatInterp(self.x, endValue.x, scale),
             _floatInterp(self.y, endValue.y, scale),
-            _floatInterp(self.heading, endValue.heading, scale),
+            _angleInterp(self.heading, endValue.heading, scale),
             _floatInterp(self.velocityX, endValue.velocityX, scale),
             _floatInterp(self.velocityY, endValue.velocityY, scale),
             _floatInterp(self.angularVelocity, endValue.angularVelocity, scale),
@@ -76,61 +112,244 @@ class ChoreoTrajectoryState:
         )
 
 
+def _timeGrid(duration, gridDt) -> tuple[int, float]:
+    # Number of points and actual spacing of an evenly spaced time grid covering duration, no coarser than gridDt.
+    # Always at least two grid points, so sampling can always interpolate between idx and idx+1.
+    numGridPoints = max(2, int(math.ceil(duration / gridDt - 1.0e-9)) + 1)
+    return numGridPoints, duration / (numGridPoints - 1)
+
+
+def _mirrorGridColumns(blueCols) -> tuple:
+    # The red alliance's copy of x through angularVelocity - y and velocityY don't change, so they're shared
+    x, y, heading, velX, velY, angVel = blueCols
+    fieldLengthM = ft2m(FIELD_LENGTH_FT)
+    return (
+        array("d", [fieldLengthM - val for val in x]),
+        y,
+        array("d", [math.pi - val for val in heading]),
+        array("d", [-val for val in velX]),
+        velY,
+        array("d", [-val for val in angVel]),
+    )
+
+
 class ChoreoTrajectory:
-    def __init__(self, samples: list[ChoreoTrajectoryState]):
-        self.samples = samples
+    """
+    A Choreo trajectory, stored for fast sampling in the periodic loop.
+    At load time, the samples are resampled onto a uniform time grid and stored
+    as flat float arrays, one per state field. The red-alliance mirrored copy is
+    computed at the same time. Sampling is then just an index calculation and a
+    linear interpolation into a single reusable output state - no searching,
+    and no new objects.
 
-    def _sampleImpl(self, timestamp) -> ChoreoTrajectoryState:
-        # Handle timestamps outside the trajectory range
-        if timestamp < self.samples[0].timestamp:
-            return self.samples[0]
-        if timestamp > self.getTotalTime():
-            return self.samples[-1]
-
-        # Binary search to find the two states on either side of the requested timestamps
-        low = 0
-        high = len(self.samples) - 1
-        while low != high:
-            mid = math.floor((low + high) / 2)
-            if self.samples[mid].timestamp < timestamp:
-                low = mid + 1
+    Headings are interpolated the short way around the circle. With hermite set,
+    positions and headings between the source samples follow a cubic curve that
+    also matches the samples' velocities, so sparse trajectories stay accurate.
+    """
+
+    def __init__(
+        self,
+        samples: list[ChoreoTrajectoryState] = None,
+        gridDt: float = TRAJ_GRID_DT,
+        columns: tuple = None,
+        gridColumns: tuple = None,
+        hermite: bool = False,
+    ):
+        """
+        Args:
+            samples: The trajectory's states, in time order
+            gridDt: Spacing of the time grid to resample onto, in seconds
+            columns: Instead of samples, seven same-length float sequences - timestamp, x, y,
+            heading, velocityX, velocityY and angularVelocity (ex: loaded from a trajectory cache file)
+            gridColumns: Optionally, x through angularVelocity already resampled onto the time
+            grid, as array('d')'s (ex: loaded from a trajectory cache file). Ignored if
+            they don't have the number of points gridDt calls for.
+            hermite: Use cubic Hermite instead of linear interpolation between source samples
+        """
+        if columns is None:
+            columns = tuple(array("d", vals) for vals in zip(*(state.asArray() for state in samples)))
+        self.srcCols = columns
+        self.srcHeading = _unwrapAngles(columns[3])
+        self.hermite = hermite
+        self._samples = samples
+        self.startTime = columns[0][0]
+        self.totalTime = columns[0][-1]
+        numGridPoints, self.gridDt = _timeGrid(self.totalTime - self.startTime, gridDt)
+        self.lastGridIdx = numGridPoints - 1
+        self.invGridDt = 1.0 / self.gridDt if self.gridDt > 0.0 else 0.0
+
+        if gridColumns is not None and all(len(col) == numGridPoints for col in gridColumns):
+            self.blueCols = tuple(gridColumns)
+        else:
+            self.blueCols = tuple(array("d") for _ in range(6))
+            self._resample(self.blueCols)
+        self.redCols = _mirrorGridColumns(self.blueCols)
+
+        # Returned by every call to sample(), and overwritten by the next one
+        self.outState = ChoreoTrajectoryState(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        # Dashboard versions of this trajectory, blue then red - see getDisplayTrajectory()
+        self._displayTrajs = [None, None]
+
+    def _resample(self, cols):
+        gridTimes = [self.startTime + gridIdx * self.gridDt for gridIdx in range(self.lastGridIdx + 1)]
+        for gridCol, interpCol in zip(cols, self._interpolateAt(gridTimes)):
+            gridCol[:] = interpCol
+
+    def _interpolateAt(self, sampleTimes):
+        # Interpolate between the source samples at each of the given times. Returns x through angularVelocity.
+        times = self.srcCols[0]
+        lastSrcIdx = len(times) - 1
+        outCols = tuple(array("d") for _ in range(6))
+        for sampTime in sampleTimes:
+            ahead = min(max(bisect_right(times, sampTime), 1), lastSrcIdx)
+            behind = max(ahead - 1, 0)
+            span = times[ahead] - times[behind]
+            if span < 1e-6:
+                # meh states are so close, just use one of them
+                self._appendLinear(outCols, behind, ahead, 1.0)
             else:
-                high = mid
+                frac = min(max((sampTime - times[behind]) / span, 0.0), 1.0)
+                if self.hermite:
+                    self._appendHermite(outCols, behind, ahead, span, frac)
+                else:
+                    self._appendLinear(outCols, behind, ahead, frac)
+        return outCols
 
-        # Handle case near start of trajectory
-        if low == 0:
-            return self.samples[0]
+    def _appendLinear(self, outCols, behind, ahead, frac):
+        x, y = self.srcCols[1:3]
+        heading = self.srcHeading
+        outCols[0].append(_floatInterp(x[behind], x[ahead], frac))
+        outCols[1].append(_floatInterp(y[behind], y[ahead], frac))
+        outCols[2].append(_floatInterp(heading[behind], heading[ahead], frac))
+        self._appendVelocities(outCols, behind, ahead, frac)
 
-        # Find the states on either side of the requested time
-        behindState = self.samples[low - 1]
-        aheadState = self.samples[low]
+    def _appendHermite(self, outCols, behind, ahead, span, frac):
+        _, x, y, _, velX, velY, angVel = self.srcCols
+        heading = self.srcHeading
+        outCols[0].append(_hermiteInterp(x[behind], velX[behind], x[ahead], velX[ahead], span, frac))
+        outCols[1].append(_hermiteInterp(y[behind], velY[behind], y[ahead], velY[ahead], span, frac))
+        outCols[2].append(_hermiteInterp(heading[behind], angVel[behind], heading[ahead], angVel[ahead], span, frac))
+        self._appendVelocities(outCols, behind, ahead, frac)
 
-        if aheadState.timestamp - behindState.timestamp < 1e-6:
-            # meh states are so close, just give back one of them
-            return aheadState
+    def _appendVelocities(self, outCols, behind, ahead, frac):
+        # Velocities are always interpolated linearly
+        velX, velY, angVel = self.srcCols[4:]
+        outCols[3].append(_floatInterp(velX[behind], velX[ahead], frac))
+        outCols[4].append(_floatInterp(velY[behind], velY[ahead], frac))
+        outCols[5].append(_floatInterp(angVel[behind], angVel[ahead], frac))
 
-        # Perform the actual interpolation
-        return behindState.interpolate(aheadState, timestamp)
+    def sampleMany(self, sampleTimes, mirrorForRedAlliance: bool = False) -> tuple:
+        """Sample the trajectory at many times in one call, straight from the source
+        samples rather than the time grid. For analysis, plotting and telemetry - not
+        for use in the periodic loop.
+
+        Args:
+            sampleTimes: Times to sample at, in any order. Times outside the trajectory get its first or last state.
+            mirrorForRedAlliance: Mirror the results for the red alliance
+
+        Returns:
+            tuple[array, ...]: timestamp, x, y, heading, velocityX, velocityY, angularVelocity
+            columns as array('d')'s, one entry per sample time
+        """
+        timestamps = array("d", [min(max(sampTime, self.startTime), self.totalTime) for sampTime in sampleTimes])
+        x, y, heading, velX, velY, angVel = self._interpolateAt(timestamps)
+        if mirrorForRedAlliance:
+            fieldLengthM = ft2m(FIELD_LENGTH_FT)
+            x = array("d", [fieldLengthM - val for val in x])
+            heading = array("d", [math.remainder(math.pi - val, TWO_PI) for val in heading])
+            velX = array("d", [-val for val in velX])
+            angVel = array("d", [-val for val in angVel])
+        else:
+            heading = array("d", [math.remainder(val, TWO_PI) for val in heading])
+        return timestamps, x, y, heading, velX, velY, angVel
 
     def sample(
         self, timestamp: float, mirrorForRedAlliance: bool = False
     ) -> ChoreoTrajectoryState:
-        tmp = self._sampleImpl(timestamp)
+        """Get the trajectory state at a given time. Times outside the
+        trajectory get its first or last state.
 
-        if mirrorForRedAlliance:
-            return tmp.flipped()
+        Note the returned state is re-used - it's only valid until the next call to sample()
+        on this trajectory. Anything that needs to keep it longer (ex: to compare against
+        a later sample) should keep a copy() of it instead.
+        """
+        x, y, heading, velX, velY, angVel = self.redCols if mirrorForRedAlliance else self.blueCols
+
+        # Handle timestamps outside the trajectory range
+        if timestamp <= self.startTime:
+            timestamp = self.startTime
+            idx = 0
+            frac = 0.0
+        elif timestamp >= self.totalTime:
+            timestamp = self.totalTime
+            idx = self.lastGridIdx - 1
+            frac = 1.0
         else:
-            # no mirroring
-            return tmp
+            pos = (timestamp - self.startTime) * self.invGridDt
+            idx = min(int(pos), self.lastGridIdx - 1)
+            frac = pos - idx
+        nxt = idx + 1
+
+        out = self.outState
+        out.timestamp = timestamp
+        out.x = x[idx] + (x[nxt] - x[idx]) * frac
+        out.y = y[idx] + (y[nxt] - y[idx]) * frac
+        # Grid headings are unwrapped, so plain interpolation works - wrap back to +/-pi after
+        out.heading = math.remainder(heading[idx] + (heading[nxt] - heading[idx]) * frac, TWO_PI)
+        out.velocityX = velX[idx] + (velX[nxt] - velX[idx]) * frac
+        out.velocityY = velY[idx] + (velY[nxt] - velY[idx]) * frac
+        out.angularVelocity = angVel[idx] + (angVel[nxt] - angVel[idx]) * frac
+        return out
+
+    @property
+    def samples(self) -> list[ChoreoTrajectoryState]:
+        # Only built if someone asks for them - sampling works straight from the arrays
+        if self._samples is None:
+            self._samples = [ChoreoTrajectoryState(*vals) for vals in zip(*self.srcCols)]
+        return self._samples
+
+    def _getSrcPose(self, idx) -> Pose2d:
+        return Pose2d(self.srcCols[1][idx], self.srcCols[2][idx], Rotation2d(value=self.srcCols[3][idx]))
+
+    def getDisplayTrajectory(self, mirrorForRedAlliance: bool = False) -> Trajectory:
+        """A downsampled wpimath Trajectory for showing this trajectory on a Field2d.
+        Built the first time it's asked for, and kept after that."""
+        idx = 1 if mirrorForRedAlliance else 0
+        if self._displayTrajs[idx] is None:
+            self._displayTrajs[idx] = self._buildDisplayTrajectory(mirrorForRedAlliance)
+        return self._displayTrajs[idx]
+
+    def precomputeDisplayTrajectories(self):
+        """Build the display trajectories for both alliances now, so getting them later is free"""
+        self.getDisplayTrajectory(False)
+        self.getDisplayTrajectory(True)
+
+    def _buildDisplayTrajectory(self, mirrorForRedAlliance):
+        # Every DISPLAY_SAMPLE_DT, and make sure the final pose is in the list.
+        # wpimath's Trajectory doesn't know about holonomic heading, so the pose carries it.
+        numDisplayPoints = int(math.ceil((self.totalTime - self.startTime) / DISPLAY_SAMPLE_DT))
+        sampTimes = [self.startTime + idx * DISPLAY_SAMPLE_DT for idx in range(numDisplayPoints)]
+        sampTimes.append(self.totalTime)
+        timestamps, x, y, heading, velX, velY, _ = self.sampleMany(sampTimes, mirrorForRedAlliance)
+        return Trajectory([
+            Trajectory.State(
+                acceleration=0,
+                pose=Pose2d(x[idx], y[idx], Rotation2d(value=heading[idx])),
+                t=timestamps[idx],
+                velocity=math.hypot(velX[idx], velY[idx]),
+            )
+            for idx in range(len(timestamps))
+        ])
 
     def getInitialPose(self):
-        return self.samples[0].getPose()
+        return self._getSrcPose(0)
 
     def getFinalPose(self):
-        return self.samples[-1].getPose()
+        return self._getSrcPose(-1)
 
     def getTotalTime(self):
-        return self.samples[-1].timestamp
+        return self.totalTime
 
     def getPoses(self):
         return [x.getPose() for x in self.samples]
@@ -0,0 +1 @@
+# No one here but us chickens
@@ -0,0 +1,142 @@
+import argparse
+from array import array
+
+from utils.flightRecorder import DUMP_HEADER, DUMP_MAGIC, DUMP_STR_LEN, DUMP_VERSION
+
+# Offline viewer for the flightRecorder_*.bin dumps written by `FlightRecorder`
+# when a loop overruns or a fault goes active.
+# Not robot code - run this on a laptop against dumps pulled off the USB drive.
+
+
+class FlightRecorderLoop:
+    """One recorded robot loop"""
+
+    def __init__(self, startNs, durNs, cpuNs, gcCounts, segments):
+        self.startNs = startNs
+        self.durNs = durNs
+        self.cpuNs = cpuNs
+        self.gcCounts = gcCounts
+        # list of (mark name, start offset from loop start ns, duration ns)
+        self.segments = segments
+
+
+class FlightRecorderDump:
+    """One flight recorder dump, read back from disk"""
+
+    def __init__(self, filePath):
+        with open(filePath, "rb") as dumpFile:
+            data = dumpFile.read()
+
+        magic, version, numNames, numLoops, numMarks = DUMP_HEADER.unpack_from(data, 0)
+        if magic != DUMP_MAGIC or version != DUMP_VERSION:
+            raise ValueError(f"{filePath} is not a version {DUMP_VERSION} flight recorder dump")
+        self._data = data
+        self._pos = DUMP_HEADER.size
+
+        strings = [self._readString() for _ in range(numNames + 1)]
+        self.reason = strings[0]
+        self.markNames = strings[1:]
+
+        self.loops = self._readLoops(numLoops, numMarks)
+
+    def _readLoops(self, numLoops, numMarks):
+        startNs = self._readArray("q", numLoops)
+        durNs = self._readArray("q", numLoops)
+        cpuNs = self._readArray("q", numLoops)
+        gcCounts = [self._readArray("i", numLoops) for _ in range(3)]
+        markCounts = self._readArray("i", numLoops)
+        markIds = self._readArray("i", numMarks)
+        markTimesNs = self._readArray("q", numMarks)
+
+        loops = []
+        markIdx = 0
+        for loopIdx in range(numLoops):
+            segments = self._loopSegments(markIds, markTimesNs, markIdx, markCounts[loopIdx])
+            markIdx += markCounts[loopIdx]
+            loops.append(FlightRecorderLoop(startNs[loopIdx], durNs[loopIdx], cpuNs[loopIdx],
+                                            tuple(gen[loopIdx] for gen in gcCounts), segments))
+        return loops
+
+    def _loopSegments(self, markIds, markTimesNs, firstMarkIdx, markCount):
+        # The first mark of each loop is the loop start, every mark after it ends a segment
+        loopStartNs = markTimesNs[firstMarkIdx]
+        return [(self._markName(markIds[segIdx]),
+                 markTimesNs[segIdx - 1] - loopStartNs,
+                 markTimesNs[segIdx] - markTimesNs[segIdx - 1])
+                for segIdx in range(firstMarkIdx + 1, firstMarkIdx + markCount)]
+
+    def _readString(self):
+        (strLen,) = DUMP_STR_LEN.unpack_from(self._data, self._pos)
+        self._pos += DUMP_STR_LEN.size
+        retVal = self._data[self._pos:self._pos + strLen].decode("utf-8", errors="replace")
+        self._pos += strLen
+        return retVal
+
+    def _readArray(self, typecode, count):
+        buf = array(typecode)
+        numBytes = buf.itemsize * count
+        buf.frombytes(self._data[self._pos:self._pos + numBytes])
+        self._pos += numBytes
+        return buf
+
+    def _markName(self, markId):
+        if markId < len(self.markNames):
+            return self.markNames[markId].rstrip("_")
+        return f"mark{markId}"
+
+    def render(self, lastLoops=None, barWidth=50, minSegmentUs=0.0):
+        """Render the dump as a text timeline - one block per loop, one bar per segment,
+        with each bar's position and length scaled to the longest loop in the dump
+
+        Args:
+            lastLoops (int | None): Only show this many loops, counting back from the trigger.
+            None shows all of them, 0 shows none.
+            barWidth (int): Width of the timeline column, in characters
+            minSegmentUs (float): Hide segments shorter than this
+
+        Returns:
+            list[str]: lines of text
+        """
+        numLoops = len(self.loops) if lastLoops is None else min(max(lastLoops, 0), len(self.loops))
+        loops = self.loops[len(self.loops) - numLoops:]
+        lines = [f"Flight recorder dump - trigger: {self.reason}, {len(self.loops)} loops recorded"]
+        if numLoops == 0:
+            return lines
+
+        nameWidth = max([len(name) for loop in loops for name, _, _ in loop.segments] + [4])
+        scaleNs = max(loop.durNs for loop in loops) / barWidth
+        firstStartNs = loops[0].startNs
+        for loop in loops:
+            lines.append(f"t={(loop.startNs - firstStartNs) * 1.0e-6:9.3f}ms "
+                         f"dur={loop.durNs * 1.0e-6:7.3f}ms cpu={loop.cpuNs * 1.0e-6:7.3f}ms "
+                         f"gc={loop.gcCounts[0]}/{loop.gcCounts[1]}/{loop.gcCounts[2]}")
+            for name, offsetNs, segDurNs in loop.segments:
+                if segDurNs < minSegmentUs * 1000.0:
+                    continue
+                timeline = _segmentTimeline(offsetNs, segDurNs, scaleNs, barWidth)
+                lines.append(f"    {name.ljust(nameWidth)} |{timeline}| {segDurNs * 1.0e-3:9.1f}us")
+        return lines
+
+
+def _segmentTimeline(offsetNs, segDurNs, scaleNs, barWidth):
+    # One row of the timeline - blank up to where the segment started, then a bar as long as it took
+    barStart = int(offsetNs / scaleNs)
+    barLen = max(1, int(round(segDurNs / scaleNs)))
+    return (" " * barStart + "#" * barLen)[:barWidth].ljust(barWidth)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a flight recorder dump as a per-segment timeline")
+    parser.add_argument("dumpFile", help="Path to the flightRecorder_*.bin file")
+    parser.add_argument("-n", "--lastLoops", type=int, default=None,
+                        help="Only show this many loops before the trigger (default: all)")
+    parser.add_argument("-m", "--minSegmentUs", type=float, default=0.0,
+                        help="Hide segments shorter than this many microseconds")
+    parser.add_argument("-w", "--width", type=int, default=50, help="Width of the timeline bars")
+    args = parser.parse_args()
+
+    dump = FlightRecorderDump(args.dumpFile)
+    print("\n".join(dump.render(args.lastLoops, args.width, args.minSegmentUs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+import argparse
+import csv
+import fnmatch
+import mmap
+import os
+import struct
+from array import array
+
+# Offline reader for the .wpilog files written by `SignalWrangler` (via wpilib.DataLogManager)
+# Not robot code - run this on a laptop against logs pulled off the USB drive.
+#
+# Format reference: https://github.com/wpilibsuite/allwpilib/blob/main/wpiutil/doc/datalog.adoc
+
+HEADER_MAGIC = b"WPILOG"
+SUPPORTED_VERSION = 0x0100
+
+CONTROL_ENTRY_ID = 0
+CONTROL_START = 0
+CONTROL_FINISH = 1
+CONTROL_SET_METADATA = 2
+
+# Numeric types we know how to turn into columns, and how to decode their payloads
+_NUMERIC_TYPES = {
+    "double": struct.Struct("<d"),
+    "float": struct.Struct("<f"),
+    "int64": struct.Struct("<q"),
+    "boolean": struct.Struct("<?"),
+}
+
+# Every record starts with a bitfield byte giving the length of the entry ID,
+# payload size and timestamp fields that follow it. There are only 256 possible
+# bitfields, so work out how to parse each one up front.
+_INT_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+def _makeIdSizeUnpacker(idLen, sizeLen):
+    if idLen in _INT_FORMATS and sizeLen in _INT_FORMATS:
+        return struct.Struct("<" + _INT_FORMATS[idLen] + _INT_FORMATS[sizeLen]).unpack_from
+
+    # 3-byte fields have no struct format, decode them by hand
+    def unpackFrom(buf, pos):
+        entryId = int.from_bytes(buf[pos:pos + idLen], "little")
+        payloadSize = int.from_bytes(buf[pos + idLen:pos + idLen + sizeLen], "little")
+        return (entryId, payloadSize)
+    return unpackFrom
+
+
+def _bitfieldLens(bitfield):
+    # (entry ID length, payload size length, timestamp length) in bytes
+    return ((bitfield & 0x3) + 1, ((bitfield >> 2) & 0x3) + 1, ((bitfield >> 4) & 0x7) + 1)
+
+
+_ID_SIZE_UNPACKERS = tuple(_makeIdSizeUnpacker(*_bitfieldLens(x)[0:2]) for x in range(256))
+_TIMESTAMP_LENS = tuple(_bitfieldLens(x)[2] for x in range(256))
+_HEADER_LENS = tuple(1 + sum(_bitfieldLens(x)) for x in range(256))
+
+# Longest run of same-length records looked at in one go, see _findRecordRuns()
+_MAX_RUN_RECORDS = 1024
+
+
+def _runLength(buf, pos, bitfield, recLen):
+    # Records after this one are the same length for as long as their bitfield and
+    # payload size bytes match this one's. Only checked for records with a 1 or 2 byte
+    # entry ID and a 1 byte payload size, which is nearly all of them.
+    count = min(_MAX_RUN_RECORDS, (len(buf) - pos) // recLen)
+    end = pos + count * recLen
+    bitfields = buf[pos:end:recLen]
+    payloadSizes = buf[pos + 2 + (bitfield & 0x1):end:recLen]
+    count -= max(len(bitfields.lstrip(bitfields[:1])), len(payloadSizes.lstrip(payloadSizes[:1])))
+    if bitfield & 0x1 == 0:
+        # Control records always have a 1 byte ID - stop in front of the first one
+        controlIdx = buf[pos + 1:pos + count * recLen:recLen].find(CONTROL_ENTRY_ID)
+        if controlIdx >= 0:
+            count = controlIdx
+    return count
+
+
+def _findRecordRuns(buf, pos):
+    """Find where every record in buf starts, from pos on.
+    Logs are mostly long stretches of records with the same header layout and payload
+    size (ex: one double from each signal, every loop), and so the same total length.
+    For those, a strided slice of the buffer pulls out every record's header bitfield
+    and payload size at once, so the per-record work happens in C rather than Python.
+
+    Returns:
+        tuple[array, array, array]: start offset, record length and number of records of each run
+    """
+    bufLen = len(buf)
+    runStarts = array("q")
+    runLens = array("q")
+    runCounts = array("q")
+    while pos < bufLen:
+        bitfield = buf[pos]
+        entryId, payloadSize = _ID_SIZE_UNPACKERS[bitfield](buf, pos + 1)
+        recLen = _HEADER_LENS[bitfield] + payloadSize
+        if pos + recLen > bufLen:
+            break # Truncated final record, log was probably still being written
+        count = 1
+        if entryId != CONTROL_ENTRY_ID and bitfield & 0xE == 0:
+            count = _runLength(buf, pos, bitfield, recLen)
+        runStarts.append(pos)
+        runLens.append(recLen)
+        runCounts.append(count)
+        pos += count * recLen
+    return runStarts, runLens, runCounts
+
+
+def _recordPositions(np, runStarts, runLens, runCounts):
+    # Offset of every record - each run's start, then its record length after that
+    starts = np.frombuffer(runStarts, dtype=np.int64)
+    lens = np.frombuffer(runLens, dtype=np.int64)
+    counts = np.frombuffer(runCounts, dtype=np.int64)
+    steps = np.repeat(lens, counts)
+    steps[np.cumsum(counts) - counts] = starts - np.concatenate(([0], starts[:-1] + lens[:-1] * (counts[:-1] - 1)))
+    return np.cumsum(steps)
+
+
+def _groupByEntryId(np, positions, entryIds):
+    # Yields each entry ID with the offsets of all its records, in file order
+    order = np.argsort(entryIds, kind="stable")
+    sortedIds = entryIds[order]
+    sortedPositions = positions[order]
+    groupStarts = np.concatenate(([0], np.flatnonzero(np.diff(sortedIds)) + 1))
+    groupEnds = np.concatenate((groupStarts[1:], [len(sortedIds)]))
+    for groupStart, groupEnd in zip(groupStarts.tolist(), groupEnds.tolist()):
+        yield int(sortedIds[groupStart]), sortedPositions[groupStart:groupEnd]
+
+class WpilogEntry:
+    """
+    One named entry (signal) in a log file, along with the file offsets
+    of all of its data records
+    """
+
+    def __init__(self, name, typeStr, metadata):
+        self.name = name
+        self.type = typeStr
+        self.metadata = metadata
+        self.recordOffsets = array("q")
+
+    def isNumeric(self):
+        return self.type in _NUMERIC_TYPES
+
+    def __len__(self):
+        return len(self.recordOffsets)
+
+
+class WpilogReader:
+    """
+    Streaming reader for .wpilog files.
+    The file is memory-mapped, and a single pass on open indexes where every
+    data record lives. Values are only decoded for the entries actually asked for.
+    """
+
+    def __init__(self, filePath):
+        self.filePath = filePath
+        self._file = open(filePath, "rb") # pylint: disable=consider-using-with
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.extraHeader = ""
+        self.entries = {}
+        self._dataStart = self._readHeader()
+        self._buildIndex()
+
+    def close(self):
+        self._buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback): #pylint: disable=invalid-name
+        self.close()
+
+    def _readHeader(self):
+        buf = self._buf
+        if len(buf) < 12 or buf[0:6] != HEADER_MAGIC:
+            raise ValueError(f"{self.filePath} is not a wpilog file")
+        version, extraLen = struct.unpack_from("<HI", buf, 6)
+        if version != SUPPORTED_VERSION:
+            raise ValueError(f"{self.filePath} has unsupported wpilog version 0x{version:04x}")
+        self.extraHeader = buf[12:12 + extraLen].decode("utf-8", errors="replace")
+        return 12 + extraLen
+
+    def _buildIndex(self):
+        runs = _findRecordRuns(self._buf, self._dataStart)
+        try:
+            import numpy as np # pylint: disable=import-outside-toplevel
+        except ImportError:
+            np = None
+        if np is None or not self._indexRunsNumpy(np, *runs):
+            self.entries = {}
+            self._indexRuns(*runs)
+
+    def _indexRuns(self, runStarts, runLens, runCounts):
+        # Sort every record into its entry, one at a time, in file order
+        buf = self._buf
+        entriesById = {}
+        appendersById = {}
+        for runStart, recLen, count in zip(runStarts, runLens, runCounts):
+            unpacker = _ID_SIZE_UNPACKERS[buf[runStart]]
+            for pos in range(runStart, runStart + count * recLen, recLen):
+                entryId, payloadSize = unpacker(buf, pos + 1)
+                appender = appendersById.get(entryId)
+                if appender is not None:
+                    appender(pos)
+                elif entryId == CONTROL_ENTRY_ID:
+                    self._handleControlRecord(entriesById, pos + _HEADER_LENS[buf[pos]], payloadSize)
+                    appendersById = {key: val.recordOffsets.append for key, val in entriesById.items()}
+
+    def _indexRunsNumpy(self, np, runStarts, runLens, runCounts):
+        """Same as _indexRuns(), but sorts all records into entries at once with NumPy.
+        Only works if each entry ID means the same entry for the whole log (true for logs
+        DataLogManager writes, which never re-use IDs).
+
+        Returns:
+            bool: False if some entry ID got re-used, and nothing was indexed
+        """
+        # Control records are never part of a longer run
+        singleStarts = [start for start, count in zip(runStarts, runCounts) if count == 1]
+        startedEntries = self._indexControlRecords(singleStarts)
+        if startedEntries is None:
+            return False
+        entriesById, entryStartPos = startedEntries
+        if len(runStarts) == 0:
+            return True
+
+        positions = _recordPositions(np, runStarts, runLens, runCounts)
+        filledEntries = set()
+        for entryId, groupPositions in _groupByEntryId(np, positions, self._readEntryIds(np, positions)):
+            entry = entriesById.get(entryId)
+            if entry is None:
+                continue # Control records, or data for an entry that was never started
+            # Data from before the entry was started doesn't belong to it
+            groupPositions = groupPositions[groupPositions > entryStartPos[entryId]]
+            entry.recordOffsets.frombytes(groupPositions.tobytes())
+            if entry in filledEntries:
+                # Several IDs were started with the same name - merge them back into file order
+                entry.recordOffsets = array("q", sorted(entry.recordOffsets))
+            filledEntries.add(entry)
+        return True
+
+    def _indexControlRecords(self, recordStarts):
+        # Returns the entry each ID maps to and where it was started, or None if an ID got re-used
+        buf = self._buf
+        entriesById = {}
+        entryStartPos = {}
+        for pos in recordStarts:
+            bitfield = buf[pos]
+            entryId, payloadSize = _ID_SIZE_UNPACKERS[bitfield](buf, pos + 1)
+            if entryId != CONTROL_ENTRY_ID:
+                continue
+            prevEntries = dict(entriesById)
+            self._handleControlRecord(entriesById, pos + _HEADER_LENS[bitfield], payloadSize)
+            if any(entriesById.get(key) is not entry for key, entry in prevEntries.items()):
+                return None # An entry ID got finished or re-started
+            for key in entriesById.keys() - prevEntries.keys():
+                entryStartPos[key] = pos
+        return entriesById, entryStartPos
+
+    def _readEntryIds(self, np, positions):
+        # Entry ID of the record at each of the given offsets
+        data = np.frombuffer(self._buf, dtype=np.uint8)
+        entryIds = data[positions + 1].astype(np.uint32)
+        longIdx = np.flatnonzero(data[positions] & 0x3)
+        if len(longIdx) > 0:
+            longPositions = positions[longIdx]
+            idLens = (data[longPositions] & 0x3) + 1
+            for byteIdx in range(1, 4):
+                hasByte = idLens > byteIdx
+                idBytes = data[longPositions[hasByte] + 1 + byteIdx].astype(np.uint32)
+                entryIds[longIdx[hasByte]] |= idBytes << (8 * byteIdx)
+        return entryIds
+
+    def _handleControlRecord(self, entriesById, payloadStart, payloadSize):
+        buf = self._buf
+        if payloadSize < 5:
+            return
+        controlType = buf[payloadStart]
+        (entryId,) = struct.unpack_from("<I", buf, payloadStart + 1)
+        if controlType == CONTROL_START:
+            pos = payloadStart + 5
+            name, pos = self._readString(pos)
+            typeStr, pos = self._readString(pos)
+            metadata, pos = self._readString(pos)
+            # Re-use an existing entry of the same name, so a signal that gets
+            # re-started mid-log still comes out as one column
+            entry = self.entries.get(name)
+            if entry is None:
+                entry = WpilogEntry(name, typeStr, metadata)
+                self.entries[name] = entry
+            entriesById[entryId] = entry
+        elif controlType == CONTROL_FINISH:
+            entriesById.pop(entryId, None)
+        elif controlType == CONTROL_SET_METADATA:
+            entry = entriesById.get(entryId)
+            if entry is not None:
+                entry.metadata, _ = self._readString(payloadStart + 5)
+
+    def _readString(self, pos):
+        (strLen,) = struct.unpack_from("<I", self._buf, pos)
+        pos += 4
+        return self._buf[pos:pos + strLen].decode("utf-8", errors="replace"), pos + strLen
+
+    def getEntryNames(self):
+        return list(self.entries.keys())
+
+    def findEntries(self, patterns):
+        """Find entries whose names match any of the given glob-style patterns.
+        Patterns are matched against both the full entry name (ex: "/SmartDashboard/LoopDuration")
+        and the name without its leading table (ex: "LoopDuration").
+
+        Args:
+            patterns (list[str]): Patterns like "LoopDuration" or "*_outputCurrent"
+
+        Returns:
+            list[WpilogEntry]: the matching entries, in the order they appear in the log
+        """
+        retList = []
+        for entry in self.entries.values():
+            shortName = entry.name.rsplit("/", 1)[-1]
+            if any(fnmatch.fnmatchcase(entry.name, pat) or fnmatch.fnmatchcase(shortName, pat)
+                   for pat in patterns):
+                retList.append(entry)
+        return retList
+
+    def readColumns(self, entry):
+        """Decode all samples of one numeric entry
+
+        Args:
+            entry (WpilogEntry | str): the entry, or its full name
+
+        Returns:
+            tuple[array, array]: timestamps in seconds, and values, as array('d')s
+        """
+        if isinstance(entry, str):
+            entry = self.entries[entry]
+        if not entry.isNumeric():
+            raise TypeError(f"Entry {entry.name} has non-numeric type {entry.type}")
+
+        buf = self._buf
+        timestampLens = _TIMESTAMP_LENS
+        headerLens = _HEADER_LENS
+        fromBytes = int.from_bytes
+        valueUnpack = _NUMERIC_TYPES[entry.type].unpack_from
+        times = array("d", bytes(8 * len(entry.recordOffsets)))
+        values = array("d", bytes(8 * len(entry.recordOffsets)))
+        for idx, pos in enumerate(entry.recordOffsets):
+            bitfield = buf[pos]
+            payloadStart = pos + headerLens[bitfield]
+            times[idx] = fromBytes(buf[payloadStart - timestampLens[bitfield]:payloadStart], "little") * 1.0e-6
+            values[idx] = valueUnpack(buf, payloadStart)[0]
+        return times, values
+
+    def toNumpy(self, patterns):
+        """Decode all matching numeric entries into NumPy arrays.
+        NumPy is not installed on the robot, so it's only imported here.
+
+        Returns:
+            dict[str, tuple[ndarray, ndarray]]: timestamps (sec) and values, keyed by entry name
+        """
+        import numpy as np # pylint: disable=import-outside-toplevel
+
+        retDict = {}
+        for entry in self.findEntries(patterns):
+            if entry.isNumeric():
+                times, values = self.readColumns(entry)
+                retDict[entry.name] = (np.frombuffer(times, dtype=np.float64),
+                                       np.frombuffer(values, dtype=np.float64))
+        return retDict
+
+    def exportCsv(self, patterns, outDir):
+        """Write one two-column (time, value) CSV file per matching numeric entry
+
+        Returns:
+            list[str]: paths of the files written
+        """
+        os.makedirs(outDir, exist_ok=True)
+        writtenFiles = []
+        for entry in self.findEntries(patterns):
+            if not entry.isNumeric():
+                continue
+            times, values = self.readColumns(entry)
+            fileName = entry.name.strip("/").replace("/", "__").replace(" ", "_") + ".csv"
+            filePath = os.path.join(outDir, fileName)
+            with open(filePath, "w", newline="", encoding="utf-8") as outFile:
+                writer = csv.writer(outFile)
+                writer.writerow(("time_s", entry.name))
+                writer.writerows(zip(times, values))
+            writtenFiles.append(filePath)
+        return writtenFiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export signals from a .wpilog file")
+    parser.add_argument("logFile", help="Path to the .wpilog file")
+    parser.add_argument("-s", "--signal", action="append", default=None,
+                        help="Signal name or glob pattern to export, may be repeated (default: all)")
+    parser.add_argument("-o", "--outDir", default=None,
+                        help="Directory to write one CSV per signal into (default: just list signals)")
+    args = parser.parse_args()
+
+    patterns = args.signal if args.signal is not None else ["*"]
+    with WpilogReader(args.logFile) as reader:
+        if args.outDir is None:
+            for entry in reader.findEntries(patterns):
+                print(f"{entry.name} ({entry.type}): {len(entry)} samples")
+        else:
+            for filePath in reader.exportCsv(patterns, args.outDir):
+                print(f"Wrote {filePath}")
+
+
+if __name__ == "__main__":
+    main()
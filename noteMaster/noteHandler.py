@@ -2,6 +2,7 @@ from wpilib import DigitalInput
 from utils.singleton import Singleton
 from utils.units import in2m
 from wrappers.wrapperedSparkMax import WrapperedSparkMax
+from wrappers.sparkMaxFrameProfiles import FRAME_PROFILE_VELOCITY_FLYWHEEL
 from debugMaster.debug import Debug
 
 
@@ -60,9 +61,11 @@ class Intake(metaclass=Singleton):
 class Transfer(metaclass=Singleton):
     def __init__(self):
         self.motor1 = WrapperedSparkMax(canID=Constants.TRANSFER1_SPARK_MAX_ID,
-                                        name="Transfer1", brakeMode=True, curLimitA=6)
+                                        name="Transfer1", brakeMode=True, curLimitA=6,
+                                        frameProfile=FRAME_PROFILE_VELOCITY_FLYWHEEL)
         self.motor2 = WrapperedSparkMax(canID=Constants.TRANSFER2_SPARK_MAX_ID,
-                                        name="Transfer2", brakeMode=True, curLimitA=6)
+                                        name="Transfer2", brakeMode=True, curLimitA=6,
+                                        frameProfile=FRAME_PROFILE_VELOCITY_FLYWHEEL)
         self.motor1.setPID(kP=1.5e-4, kI=0.0, kD=0.0)
         self.motor2.setPID(kP=1.5e-4, kI=0.0, kD=0.0)
 
@@ -77,8 +80,10 @@ class Transfer(metaclass=Singleton):
 
 class Shooter(metaclass=Singleton):
     def __init__(self):
-        self.motor1 = WrapperedSparkMax(canID=Constants.SHOOTER1_SPARK_MAX_ID, name="Shooter1")
-        self.motor2 = WrapperedSparkMax(canID=Constants.SHOOTER2_SPARK_MAX_ID, name="Shooter2")
+        self.motor1 = WrapperedSparkMax(canID=Constants.SHOOTER1_SPARK_MAX_ID, name="Shooter1",
+                                        frameProfile=FRAME_PROFILE_VELOCITY_FLYWHEEL)
+        self.motor2 = WrapperedSparkMax(canID=Constants.SHOOTER2_SPARK_MAX_ID, name="Shooter2",
+                                        frameProfile=FRAME_PROFILE_VELOCITY_FLYWHEEL)
         self.motor1.setPID(kP=1.5e-4, kI=0.0, kD=0.0)
         self.motor2.setPID(kP=1.5e-4, kI=0.0, kD=0.0)
 
@@ -1,5 +1,4 @@
 import sys
-import gc
 import wpilib
 from Autonomous.modes.driveOut import DriveOut
 from robotConfig import webserverConstructorOrNone
@@ -12,12 +11,15 @@ from utils.segmentTimeTracker import SegmentTimeTracker
 from utils.signalLogging import SignalWrangler
 from utils.calibration import CalibrationWrangler
 from utils.faults import FaultWrangler
+from utils.gcController import GCController
 from utils.crashLogger import CrashLogger
 from utils.rioMonitor import RIOMonitor
 from utils.rioMonitor import DiskStats, RUN_PERIODIC_LOOP
 from utils.singleton import destroyAllSingletonInstances
 from AutoSequencerV2.autoSequencer import AutoSequencer
 from debugMaster.debug import Debug
+from wrappers.wrapperedSparkMax import WrapperedSparkMax
+from wrappers.motorConfigManager import MotorConfigManager
 
 class MyRobot(wpilib.TimedRobot):
     #########################################################
@@ -32,8 +34,10 @@ class MyRobot(wpilib.TimedRobot):
         wpilib.LiveWindow.disableAllTelemetry()
         
         self.stt = SegmentTimeTracker()
+        # self.stt.useProfiler = False # Uncomment this line to use wpilib.Tracer epochs instead of the stt profiler
         # self.stt.doOptionalPerhapsMarks = True # Uncomment this line to turn on optional stt perhapsMark methods
         # self.stt.longLoopThresh = 0.020 # Uncomment this line adjust the stt logging time threshold in seconds
+        # self.stt.enableAllocationTracking() # Uncomment this line to log allocations per stt segment (simulation only)
         #                                                                        1         2         3
         #                                                               12345678901234567890123456789012345
         self.markStartCrashName = self.stt.makePaddedMarkName("start-crashLogger")
@@ -43,6 +47,9 @@ class MyRobot(wpilib.TimedRobot):
         self.markSignalWranglerName = self.stt.makePaddedMarkName("SignalWrangler().publishPeriodic")
         self.markCalibrationWranglerName = self.stt.makePaddedMarkName("CalibrationWrangler().update")
         self.markFautWranglerName = self.stt.makePaddedMarkName("FaultWrangler().update()")
+        self.markRioMonitorName = self.stt.makePaddedMarkName("rioMonitor.updateFromPerioidLoop()")
+        self.markGcName = self.stt.makePaddedMarkName("GCController().update()")
+        # SignalWrangler().enableWriterThread() # Uncomment this line to move signal NT and disk I/O off the main loop
         self.webserver = webserverConstructorOrNone()
 
         self.dbg = Debug()
@@ -74,15 +81,19 @@ class MyRobot(wpilib.TimedRobot):
             runStyle=RUN_PERIODIC_LOOP,
             enableDiskUpdates=False
         )
-        self.count=0
 
-        #print(f"before:0:{len(gc.get_objects(generation=0))}")
-        #print(f"before:1:{len(gc.get_objects(generation=1))}")
-        #print(f"before:2:{len(gc.get_objects(generation=2))}")
-        gc.freeze()
-        #print(f"after:0:{len(gc.get_objects(generation=0))}")
-        #print(f"after:1:{len(gc.get_objects(generation=1))}")
-        #print(f"after:2:{len(gc.get_objects(generation=2))}")
+        # Every motor controller has been constructed by now - configure them all together
+        MotorConfigManager().configureAll()
+
+        # Wheel positions read as zero until their motors are configured, so odometry can't start any earlier.
+        # Simulated module positions only move when the main loop updates them,
+        # so a faster odometry thread would just repeat samples
+        if not wpilib.TimedRobot.isSimulation():
+            self.driveTrain.poseEst.startOdometryThread(self.driveTrain.modules)
+
+        # Garbage collection only runs when the loop has time to spare - see GCController
+        self.gcCtrl = GCController()
+        self.gcCtrl.freeze()
 
         # self.noteHandler = NoteHandler()
 
@@ -93,12 +104,9 @@ class MyRobot(wpilib.TimedRobot):
 
 
     def robotPeriodic(self):
-        #gc.disable()
         self.stt.start()
 
         self.stt.perhapsMark(self.markStartCrashName)
-        if self.count == 10:
-            gc.freeze()
         self.crashLogger.update()
         self.stt.perhapsMark(self.markCrashName)
 
@@ -114,6 +122,7 @@ class MyRobot(wpilib.TimedRobot):
 
         # self.noteHandler.update()
 
+        MotorConfigManager().update()
         SignalWrangler().publishPeriodic()
         self.stt.perhapsMark(self.markSignalWranglerName)
         CalibrationWrangler().update()
@@ -123,24 +132,13 @@ class MyRobot(wpilib.TimedRobot):
         self.stt.perhapsMark(self.markFautWranglerName)
         if self.rioMonitor is not None:
             self.rioMonitor.updateFromPerioidLoop()
-        self.stt.mark("rioMonitor.updateFromPerioidLoop()_")
-        # print(f"before:{gc.get_stats()}")
-        #gc.enable()
-        # gc.collect(generation=0)
-        # self.stt.mark("gc.collect(0)______________________")
-        # gc.collect(generation=1)
-        # self.stt.mark("gc.collect(1)______________________")
-        # gc.collect()
-        self.stt.mark("gc.collect()_______________________")
-        #gc.disable()
-        # print(f"after:{gc.get_stats()}")
-        # print(
-        #    f"after:0:{len(gc.get_objects(generation=0)):5} "
-        #    f"1:{len(gc.get_objects(generation=1)):5} "
-        #    f"2:{len(gc.get_objects(generation=2)):5}"
-        # )
-
-        self.count += 1
+        self.stt.mark(self.markRioMonitorName)
+        self.gcCtrl.update()
+        self.stt.mark(self.markGcName)
+
+        # Mode-specific periodic functions run before this one, so this is the end of the loop
+        WrapperedSparkMax.startNewLoop()
+
         self.stt.end()
 
     #########################################################
@@ -218,6 +216,12 @@ class MyRobot(wpilib.TimedRobot):
     def endCompetition(self):
         if hasattr(self, 'rioMonitor') and self.rioMonitor is not None:
             self.rioMonitor.stopThreads()
+        SignalWrangler().stopWriterThread()
+        CalibrationWrangler().stop()
+        GCController().stop()
+        if hasattr(self, 'driveTrain'):
+            self.driveTrain.poseEst.stopOdometryThread()
+        MotorConfigManager().stop()
         destroyAllSingletonInstances()
         super().endCompetition()
 
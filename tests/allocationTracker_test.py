@@ -0,0 +1,51 @@
+# pylint: disable-all
+from utils.allocationTracker import AllocationTracker
+
+
+class _Node:
+    pass
+
+
+def test_attributes_allocations_to_segments():
+    dut = AllocationTracker(useTracemalloc=True)
+    dut.start()
+    kept = []
+    try:
+        for _ in range(10):
+            dut.beginLoop()
+            kept.append([_Node() for _ in range(100)])
+            dut.sample("leaky")
+            scratch = [_Node() for _ in range(100)]
+            del scratch
+            dut.sample("clean")
+    finally:
+        dut.stop()
+
+    leaky = dut.segments["leaky"]
+    clean = dut.segments["clean"]
+    assert leaky.count == 10
+    assert leaky.meanGcObjs() >= 100
+    assert leaky.meanBlocks() >= 100
+    assert leaky.meanBytes() > 0
+    # Everything made in the clean segment was freed again before the sample
+    assert clean.maxGcObjs <= 0
+    assert dut.report()[0].startswith("leaky")
+
+
+def test_allocation_budget():
+    # Example of a budget on a hot path - this one shouldn't leave any new objects behind
+    values = [0.0] * 100
+    dut = AllocationTracker()
+    dut.start()
+    try:
+        for loopIdx in range(10):
+            dut.beginLoop()
+            for idx in range(len(values)):
+                values[idx] = values[idx] * 0.5
+            dut.sample("scaleValues")
+            if loopIdx == 0:
+                dut.reset() # First loop fills up Python's internal free lists, only judge the steady state
+    finally:
+        dut.stop()
+    assert dut.segments["scaleValues"].count == 9
+    assert dut.segments["scaleValues"].maxGcObjs <= 0
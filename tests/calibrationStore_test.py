@@ -0,0 +1,64 @@
+# pylint: disable-all
+import time
+from utils.calibrationStore import CalibrationStore
+
+
+def test_save_and_load(tmp_path):
+    filePath = str(tmp_path / "cals.json")
+    dut = CalibrationStore(filePath=filePath, saveDelayS=0.0)
+    assert dut.get("Drivetrain HDC Translation kP") is None
+
+    dut.put("Drivetrain HDC Translation kP", 7.5)
+    dut.put("SwerveModule FL Current Limit", 35)
+    dut.stop()
+    assert dut.numSaves >= 1
+
+    dut = CalibrationStore(filePath=filePath)
+    assert dut.get("Drivetrain HDC Translation kP") == 7.5
+    assert dut.get("SwerveModule FL Current Limit") == 35.0
+
+
+def test_load_many_is_fast(tmp_path):
+    filePath = str(tmp_path / "cals.json")
+    dut = CalibrationStore(filePath=filePath, saveDelayS=0.0)
+    for idx in range(500):
+        dut.put(f"Test Calibration {idx}", idx * 0.5)
+    dut.stop()
+
+    startTime = time.perf_counter()
+    dut = CalibrationStore(filePath=filePath)
+    loadTime = time.perf_counter() - startTime
+    assert len(dut.values) == 500
+    assert loadTime < 0.05
+
+
+def test_corrupt_file_ignored(tmp_path):
+    filePath = tmp_path / "cals.json"
+    filePath.write_text("{not json", encoding="utf-8")
+    dut = CalibrationStore(filePath=str(filePath))
+    assert dut.values == {}
+
+
+def test_clear(tmp_path):
+    filePath = str(tmp_path / "cals.json")
+    dut = CalibrationStore(filePath=filePath, saveDelayS=0.0)
+    dut.put("Cal A", 1.0)
+    dut.put("Cal B", 2.0)
+    dut.clear("Cal A")
+    dut.stop()
+    assert CalibrationStore(filePath=filePath).values == {"Cal B": 2.0}
+
+    dut = CalibrationStore(filePath=filePath, saveDelayS=0.0)
+    dut.clear()
+    dut.stop()
+    assert CalibrationStore(filePath=filePath).values == {}
+
+
+def test_put_after_stop(tmp_path):
+    filePath = str(tmp_path / "cals.json")
+    dut = CalibrationStore(filePath=filePath, saveDelayS=0.0)
+    dut.put("Cal A", 1.0)
+    dut.stop()
+    dut.put("Cal B", 2.0)
+    assert dut.thread is None
+    assert CalibrationStore(filePath=filePath).values == {"Cal A": 1.0, "Cal B": 2.0}
@@ -0,0 +1,45 @@
+# pylint: disable-all
+import ntcore as nt
+from utils.calibration import Calibration, CalibrationWrangler
+
+
+def _publishDesValue(name, value):
+    table = nt.NetworkTableInstance.getDefault().getTable("Calibrations")
+    pub = table.getDoubleTopic(name + "/desValue").publish()
+    pub.set(value)
+    return pub
+
+
+def test_update_applies_nt_value():
+    cal = Calibration("Test Cal Update", 1.0, minVal=0.0, maxVal=10.0)
+    CalibrationWrangler().update()
+    assert not cal.isChanged()
+
+    pub = _publishDesValue("Test Cal Update", 3.0)
+    CalibrationWrangler().update()
+    assert cal.isChanged()
+    assert cal.get() == 3.0
+    assert not cal.isChanged()
+
+    # Out of range values are skipped
+    pub.set(20.0)
+    CalibrationWrangler().update()
+    assert cal.get() == 3.0
+    pub.close()
+
+
+def test_value_published_before_calibration_created():
+    pub = _publishDesValue("Test Cal Early", 5.0)
+    cal = Calibration("Test Cal Early", 1.0)
+    CalibrationWrangler().update()
+    assert cal.get() == 5.0
+    pub.close()
+
+
+def test_revert_to_default():
+    cal = Calibration("Test Cal Revert", 1.0)
+    cal.set(2.0)
+    assert cal.get() == 2.0
+    CalibrationWrangler().clearSaved("Test Cal Revert")
+    assert cal.isChanged()
+    assert cal.get() == 1.0
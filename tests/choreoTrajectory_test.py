@@ -0,0 +1,131 @@
+# pylint: disable-all
+import math
+from jormungandr.choreoTrajectory import ChoreoTrajectory, ChoreoTrajectoryState
+from utils.constants import FIELD_LENGTH_FT
+from utils.units import ft2m
+
+
+def _makeTraj():
+    # Uneven source timestamps, like Choreo produces
+    return ChoreoTrajectory([
+        ChoreoTrajectoryState(0.0, 1.0, 2.0, 0.0, 0.0, 0.0, 0.0),
+        ChoreoTrajectoryState(0.13, 1.5, 2.0, 0.2, 1.0, 0.0, 0.5),
+        ChoreoTrajectoryState(0.5, 2.0, 3.0, 0.4, 1.0, 1.0, 0.5),
+        ChoreoTrajectoryState(1.0, 2.0, 4.0, 0.4, 0.0, 0.0, 0.0),
+    ])
+
+
+def test_sample_matches_source_interpolation():
+    traj = _makeTraj()
+    for idx in range(-10, 120):
+        sampTime = idx * 0.01
+        expected = None
+        for behind, ahead in zip(traj.samples, traj.samples[1:]):
+            if behind.timestamp <= sampTime <= ahead.timestamp:
+                expected = behind.interpolate(ahead, sampTime)
+                break
+        if expected is None:
+            expected = traj.samples[0] if sampTime < 0.5 else traj.samples[-1]
+        actual = traj.sample(sampTime)
+        # Grid points don't always land on source samples, so corners get cut slightly
+        assert math.isclose(actual.x, expected.x, abs_tol=0.02)
+        assert math.isclose(actual.y, expected.y, abs_tol=0.02)
+        assert math.isclose(actual.heading, expected.heading, abs_tol=0.01)
+
+
+def test_endpoints_exact():
+    traj = _makeTraj()
+    assert traj.sample(-1.0).x == 1.0
+    assert traj.sample(0.0).y == 2.0
+    assert traj.sample(5.0).y == 4.0
+    assert traj.sample(5.0).timestamp == 1.0
+    assert traj.getTotalTime() == 1.0
+
+
+def test_red_mirror():
+    traj = _makeTraj()
+    for sampTime in (0.0, 0.31, 0.77, 1.0):
+        blueX = traj.sample(sampTime).x
+        expected = traj.sample(sampTime).flipped()
+        actual = traj.sample(sampTime, mirrorForRedAlliance=True)
+        assert math.isclose(actual.x, expected.x)
+        assert math.isclose(actual.x, ft2m(FIELD_LENGTH_FT) - blueX)
+        assert math.isclose(actual.heading, expected.heading)
+        assert math.isclose(actual.velocityX, expected.velocityX)
+        assert math.isclose(actual.angularVelocity, expected.angularVelocity)
+
+
+def test_sample_reuses_state():
+    traj = _makeTraj()
+    kept = traj.sample(0.2).copy()
+    assert traj.sample(0.2) is traj.sample(0.4, mirrorForRedAlliance=True)
+    assert kept.timestamp == 0.2
+    assert kept.asArray() != traj.outState.asArray()
+
+
+def test_single_sample():
+    traj = ChoreoTrajectory([ChoreoTrajectoryState(0.0, 1.0, 2.0, 3.0, 0.0, 0.0, 0.0)])
+    assert traj.sample(0.5).x == 1.0
+    assert traj.getTotalTime() == 0.0
+
+
+def test_heading_wraps_short_way():
+    traj = ChoreoTrajectory([
+        ChoreoTrajectoryState(0.0, 0.0, 0.0, math.pi - 0.1, 0.0, 0.0, 0.0),
+        ChoreoTrajectoryState(1.0, 0.0, 0.0, -math.pi + 0.1, 0.0, 0.0, 0.0),
+    ])
+    # Halfway between 174 deg and -174 deg is 180 deg, not 0
+    assert math.isclose(abs(traj.sample(0.5).heading), math.pi, abs_tol=1e-6)
+    assert -math.pi <= traj.sample(0.75).heading <= math.pi
+    midState = traj.samples[0].interpolate(traj.samples[1], 0.5)
+    assert math.isclose(abs(midState.heading), math.pi, abs_tol=1e-6)
+
+
+def _makeCircleTraj(numSamples, hermite):
+    # Drive around a 1m radius circle in 2 seconds, facing along the path
+    omega = math.pi
+    samples = []
+    for idx in range(numSamples):
+        t = 2.0 * idx / (numSamples - 1)
+        samples.append(ChoreoTrajectoryState(
+            t, math.cos(omega * t), math.sin(omega * t), math.remainder(omega * t + math.pi / 2, 2 * math.pi),
+            -omega * math.sin(omega * t), omega * math.cos(omega * t), omega))
+    return ChoreoTrajectory(samples, hermite=hermite)
+
+
+def _maxRadiusErr(traj):
+    _, xs, ys, _, _, _, _ = traj.sampleMany([idx * 0.01 for idx in range(201)])
+    return max(abs(math.hypot(x, y) - 1.0) for x, y in zip(xs, ys))
+
+
+def test_hermite_more_accurate_on_sparse_traj():
+    linearErr = _maxRadiusErr(_makeCircleTraj(9, hermite=False))
+    hermiteErr = _maxRadiusErr(_makeCircleTraj(9, hermite=True))
+    assert hermiteErr < linearErr / 10.0
+    assert hermiteErr < 0.01
+
+
+def test_sample_many_matches_sample():
+    traj = _makeCircleTraj(21, hermite=True)
+    sampTimes = [2.5, -1.0, 0.37, 1.99, 0.0]
+    for mirror in (False, True):
+        cols = traj.sampleMany(sampTimes, mirror)
+        for idx, sampTime in enumerate(sampTimes):
+            state = traj.sample(sampTime, mirror)
+            assert cols[0][idx] == state.timestamp
+            assert math.isclose(cols[1][idx], state.x, abs_tol=1e-3)
+            assert math.isclose(cols[2][idx], state.y, abs_tol=1e-3)
+            assert math.isclose(math.remainder(cols[3][idx] - state.heading, 2 * math.pi), 0.0, abs_tol=1e-3)
+            assert math.isclose(cols[6][idx], state.angularVelocity, abs_tol=1e-6)
+
+
+def test_display_trajectory_cached():
+    traj = _makeTraj()
+    blueDisplay = traj.getDisplayTrajectory(False)
+    redDisplay = traj.getDisplayTrajectory(True)
+    assert traj.getDisplayTrajectory(False) is blueDisplay
+    assert redDisplay is not blueDisplay
+    states = blueDisplay.states()
+    assert len(states) == 3 # 0.0, 0.5 and the final 1.0
+    assert math.isclose(states[-1].pose.Y(), 4.0)
+    assert math.isclose(redDisplay.states()[0].pose.X(), ft2m(FIELD_LENGTH_FT) - 1.0)
@@ -0,0 +1,61 @@
+# pylint: disable-all
+import json
+import os
+from jormungandr import choreo
+
+
+def _writeTraj(path, xOffset=0.0):
+    samples = [
+        {"timestamp": idx * 0.1, "x": xOffset + idx * 0.05, "y": 1.0, "heading": 0.0,
+         "velocityX": 0.5, "velocityY": 0.0, "angularVelocity": 0.0}
+        for idx in range(20)
+    ]
+    with open(path, "w", encoding="utf-8") as trajFile:
+        json.dump({"samples": samples}, trajFile)
+
+
+def test_cache_roundtrip(tmp_path):
+    trajPath = str(tmp_path / "test.traj")
+    cachePath = str(tmp_path / ("test" + choreo.CACHE_EXT))
+    _writeTraj(trajPath)
+
+    fromJson = choreo.fromFile(trajPath)
+    assert os.path.isfile(cachePath)
+    fromCache = choreo.fromFile(trajPath)
+    uncached = choreo.fromFile(trajPath, useCache=False)
+    for traj in (fromCache, uncached):
+        assert traj.getTotalTime() == fromJson.getTotalTime()
+        assert list(traj.srcCols[1]) == list(fromJson.srcCols[1])
+    assert fromCache.sample(0.55).x == fromJson.sample(0.55).x
+
+
+def test_cache_invalidation(tmp_path):
+    trajPath = str(tmp_path / "test.traj")
+    _writeTraj(trajPath)
+    choreo.fromFile(trajPath)
+
+    # Same contents with a new mtime (ex: after deploying) is still a cache hit
+    os.utime(trajPath, ns=(0, 12345))
+    assert choreo.fromFile(trajPath).srcCols[1][0] == 0.0
+
+    # New contents get re-parsed
+    _writeTraj(trajPath, xOffset=1.0)
+    assert choreo.fromFile(trajPath).srcCols[1][0] == 1.0
+
+
+def test_corrupt_cache_ignored(tmp_path):
+    trajPath = str(tmp_path / "test.traj")
+    _writeTraj(trajPath)
+    with open(str(tmp_path / ("test" + choreo.CACHE_EXT)), "wb") as cacheFile:
+        cacheFile.write(b"garbage")
+    assert abs(choreo.fromFile(trajPath).getTotalTime() - 1.9) < 1e-9
+
+
+def test_cache_tracks_interpolation(tmp_path):
+    trajPath = str(tmp_path / "test.traj")
+    _writeTraj(trajPath)
+    assert not choreo.fromFile(trajPath).hermite
+    assert choreo.fromFile(trajPath, hermite=True).hermite
+    fromCache = choreo.fromFile(trajPath, hermite=True)
+    uncached = choreo.fromFile(trajPath, useCache=False, hermite=True)
+    assert list(fromCache.blueCols[0]) == list(uncached.blueCols[0])
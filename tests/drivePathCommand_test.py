@@ -0,0 +1,46 @@
+# pylint: disable-all
+import json
+import math
+import time
+from Autonomous.commands.drivePathCommand import DrivePathCommand
+
+
+def _writeLongTraj(path, durationS):
+    # A wandering path, sampled like Choreo does
+    samples = []
+    numSamples = int(durationS / 0.05) + 1
+    for idx in range(numSamples):
+        t = idx * 0.05
+        samples.append({"timestamp": t, "x": 2.0 + 0.1 * t, "y": 4.0 + math.sin(t), "heading": math.remainder(t, 2 * math.pi),
+                        "velocityX": 0.1, "velocityY": math.cos(t), "angularVelocity": 1.0})
+    with open(path, "w", encoding="utf-8") as trajFile:
+        json.dump({"samples": samples}, trajFile)
+
+
+def test_initialize_benchmark(tmp_path):
+    trajPath = str(tmp_path / "long.traj")
+    _writeLongTraj(trajPath, 60.0)
+
+    cmd = DrivePathCommand("DriveOut")
+    cmd.absPath = trajPath
+    startTime = time.perf_counter()
+    path = cmd.path # Same as what happens when the mode gets selected
+    loadTimeMs = (time.perf_counter() - startTime) * 1000.0
+
+    # What every initialize() used to pay: downsampling the path for the dashboard
+    startTime = time.perf_counter()
+    path._buildDisplayTrajectory(False)
+    buildTimeMs = (time.perf_counter() - startTime) * 1000.0
+
+    initTimesMs = []
+    for _ in range(20):
+        startTime = time.perf_counter()
+        cmd.initialize()
+        initTimesMs.append((time.perf_counter() - startTime) * 1000.0)
+    initTimesMs.sort()
+    medianInitMs = initTimesMs[len(initTimesMs) // 2]
+
+    print(f"\n60s path: load {loadTimeMs:.2f}ms, display build {buildTimeMs:.3f}ms, "
+          f"initialize() median {medianInitMs:.4f}ms")
+    assert cmd.poseTelem.curTraj is path.getDisplayTrajectory(False)
+    assert medianInitMs < buildTimeMs
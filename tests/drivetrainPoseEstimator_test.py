@@ -0,0 +1,111 @@
+# pylint: disable-all
+import time
+from wpimath.geometry import Rotation2d
+from wpimath.kinematics import SwerveModulePosition
+from drivetrain.drivetrainControl import DrivetrainControl
+from drivetrain.poseEstimation.drivetrainPoseEstimator import DrivetrainPoseEstimator
+from wrappers.motorConfigManager import MotorConfigManager
+
+WHEEL_SPEED_MPS = 1.0
+
+
+class _StubModule:
+    # All four wheels roll straight forward at a steady speed, measured off the clock
+    def __init__(self, startTime):
+        self.startTime = startTime
+        self.connected = True
+
+    def sampleOdometryPosition(self):
+        if not self.connected:
+            return None
+        return SwerveModulePosition(WHEEL_SPEED_MPS * (time.perf_counter() - self.startTime), Rotation2d())
+
+
+def _makeDut():
+    startTime = time.perf_counter()
+    modules = [_StubModule(startTime) for _ in range(4)]
+    # Simulation time is paused under test, so timestamps come from the wall clock
+    dut = DrivetrainPoseEstimator(tuple(SwerveModulePosition() for _ in modules), clock=time.perf_counter)
+    return dut, modules
+
+
+def _waitForSamples(dut, numSamples):
+    for _ in range(200):
+        with dut.lock:
+            if dut.numOdometrySamples >= numSamples:
+                return True
+        time.sleep(0.005)
+    return False
+
+
+def test_odometry_thread_updates_estimate():
+    dut, modules = _makeDut()
+    dut.startOdometryThread(modules, rateHz=200)
+    try:
+        assert _waitForSamples(dut, 20)
+
+        # While the main loop holds the lock, the thread can't change the estimate
+        with dut.lock:
+            numSamples = dut.numOdometrySamples
+            sampleTime = dut.lastOdometryTime
+            time.sleep(0.05)
+            assert dut.numOdometrySamples == numSamples
+            assert dut.lastOdometryTime == sampleTime
+
+        # The main loop picks up the latest estimate and starts a new count
+        dut.update(None, None)
+        assert dut.numOdometrySamples < numSamples
+        assert dut.getCurEstPose().X() > 0.0
+        assert abs(dut.getCurEstPose().Y()) < 1e-6
+        assert dut.poseHistory.count == 1
+
+        # Velocity comes from the change in pose between main loop updates
+        time.sleep(0.05)
+        dut.update(None, None)
+        velocity = dut.getVelocityAt(dut.poseHistory.getNewestTime())
+        assert abs(velocity.vx - WHEEL_SPEED_MPS) < 0.2 * WHEEL_SPEED_MPS
+        assert dut.getPoseAt(dut.poseHistory.getNewestTime()).X() > 0.0
+    finally:
+        dut.stopOdometryThread()
+
+
+def test_odometry_thread_holds_unconfigured_wheel():
+    dut, modules = _makeDut()
+    modules[2].connected = False
+    dut.startOdometryThread(modules, rateHz=200)
+    try:
+        # Estimation carries on with the last good position for that wheel, and says so
+        assert _waitForSamples(dut, 5)
+        with dut.lock:
+            assert dut.numStaleOdometryWheels == 1
+            assert dut.lastModulePositions[2].distance == 0.0
+        dut.update(None, None)
+        assert dut.odoStaleWheelFault.isActive
+
+        modules[2].connected = True
+        # The first sample after this might have read the wheels before the reconnect
+        with dut.lock:
+            dut.numOdometrySamples = 0
+        assert _waitForSamples(dut, 2)
+        dut.update(None, None)
+        assert not dut.odoStaleWheelFault.isActive
+    finally:
+        dut.stopOdometryThread()
+
+
+def test_odometry_thread_alongside_main_loop():
+    drivetrain = DrivetrainControl()
+    MotorConfigManager().configureAll()
+    drivetrain.poseEst.startOdometryThread(drivetrain.modules, rateHz=500)
+    try:
+        # Main loop keeps reading sensors and commanding modules while the thread samples them
+        drivetrain.setCmdRobotRelative(1.0, 0.0, 1.0)
+        for _ in range(50):
+            drivetrain.update()
+            time.sleep(0.002)
+        assert drivetrain.poseEst.odoThread.is_alive()
+        with drivetrain.poseEst.lock:
+            assert drivetrain.poseEst.numOdometrySamples > 0
+    finally:
+        drivetrain.poseEst.stopOdometryThread()
+        MotorConfigManager().stop()
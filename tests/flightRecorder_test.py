@@ -0,0 +1,95 @@
+# pylint: disable-all
+import time
+from array import array
+from utils.flightRecorder import FlightRecorder, LOOP_RING_SIZE
+from logAnalysis.flightRecorderTimeline import FlightRecorderDump
+
+RING_SIZE = 64
+
+
+def _recordLoops(dut, numLoops, marksPerLoop):
+    # Stand-in for the SegmentTimeTracker profiler ring: loop start mark, then one mark per segment
+    ringIds = array("i", [0] * RING_SIZE)
+    ringTimesNs = array("q", [0] * RING_SIZE)
+    ringIdx = 0
+    timeNs = 1000000
+    for _ in range(numLoops):
+        startIdx = ringIdx
+        for markId in range(marksPerLoop + 1):
+            ringIds[ringIdx] = markId
+            ringTimesNs[ringIdx] = timeNs
+            timeNs += 1000 * (markId + 1)
+            ringIdx = (ringIdx + 1) % RING_SIZE
+        dut.startLoop()
+        dut.recordLoop(ringIds, ringTimesNs, startIdx, ringIdx, RING_SIZE - 1, 20000000)
+
+
+def _waitForDump(tmp_path):
+    for _ in range(100):
+        dumps = list(tmp_path.glob("flightRecorder_*.bin"))
+        if len(dumps) > 0:
+            return dumps
+        time.sleep(0.01)
+    return []
+
+
+def test_dump_roundtrip(tmp_path):
+    dut = FlightRecorder(["loopStart", "segA____", "segB____"], str(tmp_path))
+    _recordLoops(dut, LOOP_RING_SIZE * 2, 2)
+    dut.trigger("overrun 35.0ms")
+
+    dumps = _waitForDump(tmp_path)
+    assert len(dumps) == 1
+    dump = FlightRecorderDump(str(dumps[0]))
+    assert dump.reason == "overrun 35.0ms"
+    assert len(dump.loops) == dut.windowLoops
+    lastLoop = dump.loops[-1]
+    assert lastLoop.durNs == 20000000
+    assert [name for name, _, _ in lastLoop.segments] == ["segA", "segB"]
+    assert [durNs for _, _, durNs in lastLoop.segments] == [1000, 2000]
+    assert lastLoop.segments[1][1] == 1000
+    assert len(dump.render(lastLoops=3)) == 1 + 3 * 3
+    assert len(dump.render(lastLoops=0)) == 1
+    assert len(dump.render()) == 1 + 3 * dut.windowLoops
+
+
+def test_dump_while_writing(tmp_path):
+    # Marks keep going into a spare set of buffers while a dump is written
+    dut = FlightRecorder(["loopStart", "segA"], str(tmp_path))
+    _recordLoops(dut, 20, 1)
+    dut.trigger("fault")
+    _recordLoops(dut, dut.windowLoops, 1)
+    assert len(_waitForDump(tmp_path)) == 1
+    for _ in range(100):
+        if dut.spareRings.qsize() > 0:
+            break
+        time.sleep(0.01)
+    dut.trigger("overrun")
+
+    for _ in range(100):
+        dumps = sorted(tmp_path.glob("flightRecorder_*.bin"), key=lambda path: int(path.stem.rsplit("_", 1)[1]))
+        if len(dumps) == 2:
+            break
+        time.sleep(0.01)
+    assert [len(FlightRecorderDump(str(path)).loops) for path in dumps] == [20, dut.windowLoops]
+
+
+def test_triggers_debounced(tmp_path):
+    dut = FlightRecorder(["loopStart", "segA"], str(tmp_path))
+    _recordLoops(dut, 10, 1)
+    dut.trigger("fault")
+    dut.trigger("fault")
+    _recordLoops(dut, 10, 1)
+    dut.trigger("fault")
+
+    dumps = _waitForDump(tmp_path)
+    assert len(dumps) == 1
+    assert dut.numSuppressedTriggers == 2
+    assert len(FlightRecorderDump(str(dumps[0])).loops) == 10
+
+
+def test_no_dump_dir():
+    dut = FlightRecorder(["loopStart", "segA"], None)
+    _recordLoops(dut, 10, 1)
+    dut.trigger("fault")
+    assert dut.thread is None
@@ -0,0 +1,57 @@
+# pylint: disable-all
+import gc
+import wpilib
+from utils.gcController import GCController
+
+
+def _makeCycles(count):
+    # Reference cycles are only ever freed by the garbage collector
+    for _ in range(count):
+        node = {}
+        node["self"] = node
+
+
+def test_disables_automatic_gc():
+    dut = GCController()
+    try:
+        assert not gc.isenabled()
+        _makeCycles(dut.gen0Threshold * 4)
+        assert dut.numUnscheduledCollections == 0
+    finally:
+        dut.stop()
+    assert gc.isenabled()
+
+
+def test_collects_in_update():
+    dut = GCController()
+    dut.freezeAfterLoops = 0
+    try:
+        # Robot is disabled in tests, so the first update does a full collection
+        dut.update()
+        assert dut.numCollections[2] == 1
+
+        for _ in range(10):
+            _makeCycles(dut.gen0Threshold)
+            dut.stt.loopStartTime = wpilib.Timer.getFPGATimestamp() # Plenty of slack left in this loop
+            dut.update()
+        assert dut.numCollections[0] + dut.numCollections[1] > 0
+        assert gc.get_count()[0] < dut.gen0Threshold
+        assert dut.maxPauseNs > 0
+        assert dut.numUnscheduledCollections == 0
+    finally:
+        dut.stop()
+
+
+def test_gen0_growth_across_collections():
+    dut = GCController()
+    dut.freezeAfterLoops = 0
+    try:
+        dut.update()
+        dut.stt.loopStartTime = wpilib.Timer.getFPGATimestamp()
+        _makeCycles(dut.gen0Threshold * 2)
+        dut.update()
+        # A collection ran during the update, but everything allocated since the last one still counts
+        assert dut.numCollections[0] + dut.numCollections[1] > 0
+        assert dut.loopGen0Growth >= dut.gen0Threshold * 2
+    finally:
+        dut.stop()
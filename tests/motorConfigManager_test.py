@@ -0,0 +1,77 @@
+# pylint: disable-all
+import threading
+import time
+from wrappers.motorConfigManager import MotorConfigManager
+
+
+class _Device:
+    # Stands in for a motor controller that shows up on the bus after some number of attempts
+    def __init__(self, name, attemptsToConnect):
+        self.name = name
+        self.attemptsToConnect = attemptsToConnect
+        self.configAttempts = 0
+
+        self.publishedAttempts = 0
+        self.publishThreads = set()
+
+    def tryConfigure(self):
+        self.configAttempts += 1
+        return self.configAttempts >= self.attemptsToConnect
+
+    def publishConfigStatus(self):
+        self.publishedAttempts = self.configAttempts
+        self.publishThreads.add(threading.get_ident())
+
+
+def test_configures_all_in_passes():
+    dut = MotorConfigManager()
+    devices = [_Device("A", 1), _Device("B", 3), _Device("C", 1)]
+    for device in devices:
+        dut.add(device)
+    dut.configureAll()
+    dut.stop()
+    assert [device.configAttempts for device in devices] == [1, 3, 1]
+    lines = dut.report()
+    assert "3 of 3 configured" in lines[0]
+    assert "B: configured after 3 attempt(s)" in lines[2]
+
+
+def test_retries_in_background():
+    dut = MotorConfigManager()
+    dut.startupBudgetS = 0.0
+    dut.retryPeriodS = 0.01
+    missing = _Device("Missing", 5)
+    dut.add(missing)
+    dut.configureAll()
+    assert "0 of 1 configured" in dut.report()[0]
+
+    # Added after startup, still gets configured
+    late = _Device("Late", 1)
+    dut.add(late)
+
+    startTime = time.perf_counter()
+    while dut.pending and time.perf_counter() - startTime < 2.0:
+        time.sleep(0.01)
+    dut.stop()
+    assert not dut.pending
+    assert missing.configAttempts == 5
+    assert late.configAttempts == 1
+
+    # Results from the background thread only get published from the main loop
+    assert missing.publishedAttempts == 1
+    assert late.publishedAttempts == 0
+    dut.update()
+    assert missing.publishedAttempts == 5
+    assert late.publishedAttempts == 1
+    assert missing.publishThreads == {threading.get_ident()}
+    assert late.publishThreads == {threading.get_ident()}
+
+
+def test_warns_if_never_configured(capsys):
+    dut = MotorConfigManager()
+    device = _Device("Forgotten", 1)
+    dut.add(device)
+    dut.update()
+    dut.update()
+    assert capsys.readouterr().out.count("configureAll() was never called") == 1
+    assert device.configAttempts == 0
@@ -0,0 +1,56 @@
+# pylint: disable-all
+import math
+from drivetrain.poseEstimation.poseHistory import PoseHistory
+
+
+def test_empty():
+    dut = PoseHistory()
+    assert not dut.lookup(1.0)
+    assert dut.getOldestTime() is None
+    assert dut.getNewestPose() is None
+
+
+def test_interpolates_between_entries():
+    dut = PoseHistory()
+    dut.add(1.00, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    dut.add(1.02, 0.02, 0.0, 0.1, 1.0, 0.0, 5.0)
+    dut.add(1.04, 0.04, 0.01, 0.2, 1.0, 0.5, 5.0)
+
+    assert dut.lookup(1.03)
+    assert math.isclose(dut.outX, 0.03)
+    assert math.isclose(dut.outY, 0.005)
+    assert math.isclose(dut.outTheta, 0.15)
+    assert math.isclose(dut.outVy, 0.25)
+
+    # Exact hits, and clamping at both ends
+    dut.lookup(1.02)
+    assert math.isclose(dut.outX, 0.02)
+    dut.lookup(0.5)
+    assert dut.outX == 0.0
+    dut.lookup(2.0)
+    assert dut.outX == 0.04
+    assert dut.getNewestPose() == (0.04, 0.01, 0.2)
+
+
+def test_heading_wraps():
+    dut = PoseHistory()
+    dut.add(0.0, 0.0, 0.0, math.pi - 0.1, 0.0, 0.0, 0.0)
+    dut.add(1.0, 0.0, 0.0, -math.pi + 0.1, 0.0, 0.0, 0.0)
+    dut.lookup(0.5)
+    assert math.isclose(abs(dut.outTheta), math.pi)
+
+
+def test_ring_overwrites_oldest():
+    dut = PoseHistory(capacity=8)
+    assert dut.capacity == 8
+    for idx in range(20):
+        dut.add(idx * 0.02, float(idx), 0.0, 0.0, 0.0, 0.0, 0.0)
+    assert dut.count == 8
+    assert math.isclose(dut.getOldestTime(), 12 * 0.02)
+    assert math.isclose(dut.getNewestTime(), 19 * 0.02)
+    for idx in range(12, 19):
+        dut.lookup(idx * 0.02 + 0.01)
+        assert math.isclose(dut.outX, idx + 0.5)
+
+    dut.clear()
+    assert not dut.lookup(0.3)
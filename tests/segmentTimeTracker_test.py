@@ -0,0 +1,83 @@
+# pylint: disable-all
+import time
+from utils.segmentTimeTracker import SegmentTimeTracker, LOOP_SEGMENT_NAME
+
+
+def test_profiler_segments():
+    dut = SegmentTimeTracker()
+    markA = dut.makePaddedMarkName("segmentA")
+    markB = dut.makePaddedMarkName("segmentB")
+    dut.trackingEnabled = True
+
+    for _ in range(3):
+        dut.start()
+        time.sleep(0.002)
+        dut.mark(markA)
+        dut.perhapsMark(markB)
+        dut.end()
+
+    # Nothing is aggregated until the histograms are published
+    assert markA not in dut.segmentHists
+    dut._aggregateRing()
+
+    assert dut.segmentHists[markA].maxSample >= 0.002
+    assert dut.segmentHists[markB].count == 3
+    assert dut.segmentHists[markB].maxSample < dut.segmentHists[markA].maxSample
+    assert dut.segmentHists[LOOP_SEGMENT_NAME].count >= 1
+
+
+def test_profiler_ring_wraps():
+    dut = SegmentTimeTracker()
+    mark = dut.makePaddedMarkName("wrap")
+    dut.trackingEnabled = True
+
+    # More marks in total than the ring holds, but never in one loop
+    for _ in range(100):
+        dut.start()
+        for _ in range(50):
+            dut.mark(mark)
+        dut.end()
+
+    dut._aggregateRing()
+    assert dut.segmentHists[mark].count == 100 * 50
+
+
+def test_profiler_aggregates_on_publish():
+    dut = SegmentTimeTracker()
+    mark = dut.makePaddedMarkName("publish")
+    dut.trackingEnabled = True
+    dut.histWindowLoops = 10
+    published = []
+    dut._publishSegmentHists = lambda: published.append(dut.segmentHists[mark].count)
+
+    for _ in range(10):
+        dut.start()
+        dut.mark(mark)
+        dut.end()
+
+    assert published == [10]
+
+
+class _Node:
+    pass
+
+
+def test_allocation_tracking():
+    dut = SegmentTimeTracker()
+    markLeaky = dut.makePaddedMarkName("leaky")
+    markClean = dut.makePaddedMarkName("clean")
+    dut.trackingEnabled = True
+    tracker = dut.enableAllocationTracking()
+    kept = []
+    try:
+        for _ in range(5):
+            dut.start()
+            kept.append([_Node() for _ in range(50)])
+            dut.mark(markLeaky)
+            dut.mark(markClean)
+            dut.end()
+    finally:
+        tracker.stop()
+
+    assert tracker.segments[markLeaky].meanGcObjs() >= 50
+    assert tracker.segments[markClean].maxGcObjs <= 0
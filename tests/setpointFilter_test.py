@@ -0,0 +1,31 @@
+# pylint: disable-all
+from wrappers.setpointFilter import SetpointFilter
+
+MODE_VOLTAGE = 1
+MODE_VELOCITY = 2
+
+
+def test_suppresses_repeats():
+    dut = SetpointFilter(keepaliveLoops=25)
+    sent = [dut.shouldSend(MODE_VOLTAGE, 0.0, 0.01, 0.0, 0.01, loopNum) for loopNum in range(10)]
+    assert sent == [True] + [False] * 9
+
+
+def test_sends_changes():
+    dut = SetpointFilter()
+    assert dut.shouldSend(MODE_VELOCITY, 100.0, 0.5, 1.0, 0.01, 0)
+    assert not dut.shouldSend(MODE_VELOCITY, 100.4, 0.5, 1.0, 0.01, 1)
+    # Compared against the last sent value, so drift adds up
+    assert dut.shouldSend(MODE_VELOCITY, 100.8, 0.5, 1.0, 0.01, 2)
+    assert dut.shouldSend(MODE_VELOCITY, 100.8, 0.5, 1.5, 0.01, 3)
+    # Same value, different control mode
+    assert dut.shouldSend(MODE_VOLTAGE, 100.8, 0.5, 1.5, 0.01, 4)
+
+
+def test_keepalive_and_invalidate():
+    dut = SetpointFilter(keepaliveLoops=5)
+    sent = [dut.shouldSend(MODE_VOLTAGE, 3.0, 0.01, 0.0, 0.01, loopNum) for loopNum in range(11)]
+    assert [loopNum for loopNum, wasSent in enumerate(sent) if wasSent] == [0, 5, 10]
+
+    dut.invalidate()
+    assert dut.shouldSend(MODE_VOLTAGE, 3.0, 0.01, 0.0, 0.01, 11)
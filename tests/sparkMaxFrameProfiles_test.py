@@ -0,0 +1,48 @@
+# pylint: disable-all
+import math
+from wrappers.sparkMaxFrameProfiles import (
+    FRAME_PROFILES,
+    FRAME_PROFILE_ODOMETRY_WHEEL,
+    FRAME_PROFILE_AZIMUTH,
+    FRAME_PROFILE_VELOCITY_FLYWHEEL,
+    FRAME_PROFILE_IDLE_MECHANISM,
+    CAN_FRAME_BITS,
+    CAN_BUS_BITS_PER_SEC,
+    CANBusLoadEstimator,
+    framesPerSec,
+)
+
+
+def test_profiles_cover_all_frames():
+    for periods in FRAME_PROFILES.values():
+        assert len(periods) == 7
+        assert all(1 <= periodMs <= 65535 for periodMs in periods)
+
+
+def test_odometry_wheel_sends_position():
+    # Odometry needs position (status 2) at least as fast as we loop
+    assert FRAME_PROFILES[FRAME_PROFILE_ODOMETRY_WHEEL][2] <= 20
+    assert framesPerSec(FRAME_PROFILE_IDLE_MECHANISM) < framesPerSec(FRAME_PROFILE_ODOMETRY_WHEEL)
+
+
+def test_bus_load_estimate():
+    est = CANBusLoadEstimator()
+    assert est.getEstBusUtilization() == 0.0
+
+    for module in ("FL", "FR", "BL", "BR"):
+        est.addMotor(module + "_wheel", FRAME_PROFILE_ODOMETRY_WHEEL)
+        est.addMotor(module + "_azmth", FRAME_PROFILE_AZIMUTH)
+    drivetrainOnly = est.getEstBusUtilization()
+    expectedFramesPerSec = 4 * (framesPerSec(FRAME_PROFILE_ODOMETRY_WHEEL) + framesPerSec(FRAME_PROFILE_AZIMUTH) + 2 * 50.0)
+    assert math.isclose(drivetrainOnly, expectedFramesPerSec * CAN_FRAME_BITS / CAN_BUS_BITS_PER_SEC)
+
+    est.addMotor("Shooter1", FRAME_PROFILE_VELOCITY_FLYWHEEL)
+    est.addMotor("Intake1", FRAME_PROFILE_IDLE_MECHANISM)
+    assert est.getEstBusUtilization() > drivetrainOnly
+    # Well under what the bus can carry
+    assert est.getEstBusUtilization() < 0.5
+
+    lines = est.report()
+    assert len(lines) == 10
+    assert lines[0].startswith("FL_wheel")
+    assert lines[-1].startswith("Intake1")
@@ -0,0 +1,77 @@
+# pylint: disable-all
+import math
+import random
+import time
+from wpimath.geometry import Translation2d
+from wpimath.kinematics import ChassisSpeeds, SwerveDrive4Kinematics
+from drivetrain.swerveKinematicsKernel import SwerveKinematicsKernel
+
+MODULE_TRANSLATIONS = [(0.3, 0.25), (0.3, -0.25), (-0.3, 0.25), (-0.3, -0.25)]
+MAX_WHEEL_SPEED_MPS = 4.5
+
+
+def _makeKinematics():
+    return SwerveDrive4Kinematics(*[Translation2d(x, y) for x, y in MODULE_TRANSLATIONS])
+
+
+def _wpimathStates(kinematics, vx, vy, omega):
+    states = kinematics.toSwerveModuleStates(ChassisSpeeds(vx, vy, omega))
+    # Returns new, scaled states - the ones passed in aren't changed
+    return kinematics.desaturateWheelSpeeds(states, MAX_WHEEL_SPEED_MPS)
+
+
+def test_matches_wpimath():
+    kinematics = _makeKinematics()
+    dut = SwerveKinematicsKernel(MODULE_TRANSLATIONS, MAX_WHEEL_SPEED_MPS)
+    rng = random.Random(1234)
+    for _ in range(500):
+        # Plenty of these go over the max wheel speed, so desaturation is covered too
+        vx = rng.uniform(-6.0, 6.0)
+        vy = rng.uniform(-6.0, 6.0)
+        omega = rng.uniform(-8.0, 8.0)
+        dut.calculate(vx, vy, omega)
+        for idx, expected in enumerate(_wpimathStates(kinematics, vx, vy, omega)):
+            assert math.isclose(dut.speedsMps[idx], expected.speed, abs_tol=1e-9)
+            angleErr = math.remainder(dut.anglesRad[idx] - expected.angle.radians(), 2.0 * math.pi)
+            assert abs(angleErr) < 1e-9
+
+
+def test_stopped_keeps_angles():
+    dut = SwerveKinematicsKernel(MODULE_TRANSLATIONS, MAX_WHEEL_SPEED_MPS)
+    dut.calculate(0.0, 1.0, 0.0)
+    dut.calculate(0.0, 0.0, 0.0)
+    assert all(speed == 0.0 for speed in dut.speedsMps)
+    assert all(math.isclose(angle, math.pi / 2.0) for angle in dut.anglesRad)
+
+
+def test_single_stopped_module_matches_wpimath():
+    kinematics = _makeKinematics()
+    dut = SwerveKinematicsKernel(MODULE_TRANSLATIONS, MAX_WHEEL_SPEED_MPS)
+    dut.calculate(0.0, 1.0, 0.0)
+    _wpimathStates(kinematics, 0.0, 1.0, 0.0)
+    # Spinning about the front-left module - it has no speed, but the robot is still moving
+    vx, vy, omega = 0.25 * 2.0, -0.3 * 2.0, 2.0
+    dut.calculate(vx, vy, omega)
+    expectedStates = _wpimathStates(kinematics, vx, vy, omega)
+    assert dut.speedsMps[0] < 1e-9
+    for idx, expected in enumerate(expectedStates):
+        assert math.isclose(dut.speedsMps[idx], expected.speed, abs_tol=1e-9)
+        assert math.isclose(dut.anglesRad[idx], expected.angle.radians(), abs_tol=1e-9)
+
+
+def test_faster_than_wpimath():
+    kinematics = _makeKinematics()
+    dut = SwerveKinematicsKernel(MODULE_TRANSLATIONS, MAX_WHEEL_SPEED_MPS)
+    numLoops = 5000
+
+    startTime = time.perf_counter()
+    for idx in range(numLoops):
+        _wpimathStates(kinematics, 1.0 + idx * 1e-4, 0.5, 2.0)
+    wpimathDur = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    for idx in range(numLoops):
+        dut.calculate(1.0 + idx * 1e-4, 0.5, 2.0)
+    kernelDur = time.perf_counter() - startTime
+
+    assert kernelDur < wpimathDur
@@ -53,3 +53,30 @@ def test_timingHist_thirdLevel():
         m = statistics.mean(collector.listFilter.getWallTimes())
         print(f"mean wallS={m}")
 
+
+
+def test_logHistogram_percentiles():
+    dut = LogHistogram()
+    for i in range(1, 1001):
+        dut.append(i * 1.0e-5)  # 10us to 10ms
+
+    assert dut.count == 1000
+    assert dut.maxSample == 1000 * 1.0e-5
+    for pct in (50, 90, 99):
+        expected = pct * 10 * 1.0e-5
+        assert abs(dut.percentile(pct) - expected) / expected < 0.13
+    assert dut.percentile(100) == dut.maxSample
+
+    dut.reset()
+    assert dut.count == 0
+    assert dut.percentile(50) == 0.0
+    assert sum(dut.counts) == 0
+
+
+def test_logHistogram_out_of_range():
+    dut = LogHistogram(minValue=1.0e-6, maxValue=1.0)
+    dut.append(0.0)
+    dut.append(5.0)
+    assert dut.counts[0] == 1
+    assert dut.counts[dut.numBuckets - 1] == 1
+    assert dut.percentile(100) == 5.0
@@ -0,0 +1,42 @@
+# pylint: disable-all
+import math
+from wpimath.geometry import Pose2d, Rotation2d
+from drivetrain.trajectoryTrackingStats import TrajectoryTrackingStats
+from jormungandr.choreoTrajectory import ChoreoTrajectoryState
+
+
+def test_along_and_cross_track_split():
+    stats = TrajectoryTrackingStats()
+    stats.reset("test")
+    # Driving +Y, robot is 0.1m behind and 0.2m to the right of the path
+    for idx in range(10):
+        cmd = ChoreoTrajectoryState(idx * 0.02, 1.0, 2.0, 0.0, 0.0, 1.0, 0.0)
+        stats.update(cmd, Pose2d(1.2, 1.9, Rotation2d(0.0)), False)
+    assert math.isclose(stats.alongTrack.rms(), 0.1)
+    assert math.isclose(stats.crossTrack.rms(), 0.2)
+    assert math.isclose(stats.crossTrack.maxAbs, 0.2)
+    assert stats.heading.rms() == 0.0
+
+
+def test_heading_error_wraps():
+    stats = TrajectoryTrackingStats()
+    stats.reset("test")
+    cmd = ChoreoTrajectoryState(0.0, 0.0, 0.0, math.pi - 0.05, 0.0, 0.0, 0.0)
+    stats.update(cmd, Pose2d(0.0, 0.0, Rotation2d(-math.pi + 0.05)), False)
+    assert math.isclose(stats.heading.maxAbs, 0.1)
+    # Not moving, so no direction to split position error along
+    assert stats.alongTrack.count == 0
+
+
+def test_saturated_time():
+    stats = TrajectoryTrackingStats()
+    stats.reset("test")
+    for idx in range(11):
+        cmd = ChoreoTrajectoryState(idx * 0.1, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+        stats.update(cmd, Pose2d(), idx > 5)
+    assert math.isclose(stats.durationS, 1.0)
+    assert math.isclose(stats.saturatedS, 0.5)
+
+    stats.reset("next")
+    assert stats.saturatedS == 0.0
+    assert stats.crossTrack.count == 0
@@ -0,0 +1,125 @@
+# pylint: disable-all
+import struct
+import time
+import pytest
+from logAnalysis.wpilogReader import WpilogReader
+
+
+# Minimal writer, just enough to produce files shaped like the ones DataLogManager writes
+class _TestLogWriter:
+    def __init__(self):
+        self.data = bytearray(b"WPILOG" + struct.pack("<HI", 0x0100, 0))
+        self.nextId = 1
+
+    def _record(self, entryId, timestampUs, payload):
+        # Like DataLogManager, each header field only gets as many bytes as it needs
+        idLen = max(1, (entryId.bit_length() + 7) // 8)
+        sizeLen = max(1, (len(payload).bit_length() + 7) // 8)
+        timeLen = max(1, (timestampUs.bit_length() + 7) // 8)
+        bitfield = (idLen - 1) | ((sizeLen - 1) << 2) | ((timeLen - 1) << 4)
+        self.data += bytes([bitfield]) + entryId.to_bytes(idLen, "little") \
+            + len(payload).to_bytes(sizeLen, "little") + timestampUs.to_bytes(timeLen, "little") + payload
+
+    def _control(self, controlType, entryId, strVals):
+        payload = bytearray(struct.pack("<BI", controlType, entryId))
+        for strVal in strVals:
+            encoded = strVal.encode("utf-8")
+            payload += struct.pack("<I", len(encoded)) + encoded
+        self._record(0, 0, bytes(payload))
+
+    def start(self, name, typeStr):
+        entryId = self.nextId
+        self.nextId += 1
+        self._control(0, entryId, (name, typeStr, ""))
+        return entryId
+
+    def finish(self, entryId):
+        self._control(1, entryId, ())
+
+    def append(self, entryId, timestampUs, fmt, value):
+        self._record(entryId, timestampUs, struct.pack(fmt, value))
+
+
+def _writeTestLog(tmp_path):
+    writer = _TestLogWriter()
+    loopDur = writer.start("/SmartDashboard/LoopDuration", "double")
+    flCurrent = writer.start("/SmartDashboard/FL_wheel_outputCurrent", "double")
+    frCurrent = writer.start("/SmartDashboard/FR_wheel_outputCurrent", "double")
+    zeroed = writer.start("/SmartDashboard/Climber Control Zeroed", "boolean")
+    messages = writer.start("messages", "string")
+    for loopIdx in range(50):
+        timeUs = loopIdx * 20000
+        writer.append(loopDur, timeUs, "<d", 10.0 + loopIdx)
+        writer.append(flCurrent, timeUs, "<d", 1.5 * loopIdx)
+        writer.append(frCurrent, timeUs, "<d", -1.5 * loopIdx)
+        if loopIdx % 10 == 0:
+            writer.append(zeroed, timeUs, "<?", loopIdx >= 20)
+    writer._record(messages, 0, b"hello")
+    logPath = tmp_path / "test.wpilog"
+    logPath.write_bytes(bytes(writer.data))
+    return logPath
+
+
+def test_index_and_read(tmp_path):
+    with WpilogReader(_writeTestLog(tmp_path)) as reader:
+        assert len(reader.getEntryNames()) == 5
+        times, values = reader.readColumns("/SmartDashboard/LoopDuration")
+        assert len(times) == 50
+        assert times[1] == 0.02
+        assert values[49] == 59.0
+
+        times, values = reader.readColumns("/SmartDashboard/Climber Control Zeroed")
+        assert list(values) == [0.0, 0.0, 1.0, 1.0, 1.0]
+
+
+def test_find_entries(tmp_path):
+    with WpilogReader(_writeTestLog(tmp_path)) as reader:
+        names = [x.name for x in reader.findEntries(["*_outputCurrent"])]
+        assert names == ["/SmartDashboard/FL_wheel_outputCurrent", "/SmartDashboard/FR_wheel_outputCurrent"]
+        assert len(reader.findEntries(["LoopDuration"])) == 1
+
+
+def test_export_csv(tmp_path):
+    with WpilogReader(_writeTestLog(tmp_path)) as reader:
+        writtenFiles = reader.exportCsv(["*"], tmp_path / "out")
+    # The string entry is skipped
+    assert len(writtenFiles) == 4
+    with open(writtenFiles[0], encoding="utf-8") as csvFile:
+        lines = csvFile.read().splitlines()
+    assert lines[0] == "time_s,/SmartDashboard/LoopDuration"
+    assert len(lines) == 51
+
+
+def test_reused_entry_ids(tmp_path):
+    writer = _TestLogWriter()
+    first = writer.start("first", "double")
+    writer.append(first, 0, "<d", 1.0)
+    writer.finish(first)
+    writer.nextId = first
+    second = writer.start("second", "double")
+    writer.append(second, 20000, "<d", 2.0)
+    writer.append(second, 40000, "<d", 3.0)
+    logPath = tmp_path / "test.wpilog"
+    logPath.write_bytes(bytes(writer.data))
+    with WpilogReader(logPath) as reader:
+        assert list(reader.readColumns("first")[1]) == [1.0]
+        assert list(reader.readColumns("second")[1]) == [2.0, 3.0]
+
+
+def test_index_speed(tmp_path):
+    pytest.importorskip("numpy")
+    # About a full match worth of records from a few hundred signals
+    writer = _TestLogWriter()
+    entryIds = [writer.start(f"/SmartDashboard/signal{idx}", "double") for idx in range(300)]
+    loopStart = len(writer.data)
+    for entryId in entryIds:
+        writer.append(entryId, 20000, "<d", 1.0)
+    writer.data += writer.data[loopStart:] * 7499
+    logPath = tmp_path / "match.wpilog"
+    logPath.write_bytes(bytes(writer.data))
+
+    startTime = time.perf_counter()
+    with WpilogReader(logPath) as reader:
+        indexTime = time.perf_counter() - startTime
+        assert len(reader.entries["/SmartDashboard/signal299"]) == 7500
+    assert indexTime < 1.0
@@ -0,0 +1,89 @@
+# pylint: disable-all
+from rev import REVLibError
+from wrappers.wrapperedSparkMax import WrapperedSparkMax
+
+
+class _StubSparkMax:
+    # Accepts every configuration call, and remembers what it was sent
+    def __init__(self):
+        self.inverted = None
+        self.curLimitA = None
+        self.onSetInverted = None
+
+    def restoreFactoryDefaults(self):
+        return REVLibError.kOk
+
+    def setIdleMode(self, mode):
+        return REVLibError.kOk
+
+    def setSmartCurrentLimit(self, curLimitA):
+        self.curLimitA = curLimitA
+        return REVLibError.kOk
+
+    def setPeriodicFramePeriod(self, frame, periodMs):
+        return REVLibError.kOk
+
+    def setInverted(self, isInverted):
+        self.inverted = isInverted
+        if self.onSetInverted is not None:
+            self.onSetInverted()
+            self.onSetInverted = None
+
+
+class _StubPIDController:
+    def __init__(self):
+        self.gains = [None, None, None]
+        self.numGainWrites = 0
+
+    def setP(self, kP):
+        self.gains[0] = kP
+        self.numGainWrites += 1
+
+    def setI(self, kI):
+        self.gains[1] = kI
+
+    def setD(self, kD):
+        self.gains[2] = kD
+
+
+def _makeDut():
+    dut = WrapperedSparkMax(10, "test")
+    dut.ctrl = _StubSparkMax()
+    dut.pidCtrl = _StubPIDController()
+    return dut
+
+
+def test_config_changed_while_configuring():
+    dut = _makeDut()
+    dut.setPID(1.0, 0.0, 0.0)
+
+    # Main loop changes things while the background thread is partway through sending the old values
+    def changeConfig():
+        dut.setPID(2.0, 0.0, 0.0)
+        dut.setSmartCurrentLimit(20)
+        dut.setInverted(True)
+    dut.ctrl.onSetInverted = changeConfig
+    assert dut.tryConfigure()
+
+    assert dut.pidCtrl.gains == [2.0, 0.0, 0.0]
+    assert dut.ctrl.curLimitA == 20
+    assert dut.ctrl.inverted
+    dut.setPID(2.0, 0.0, 0.0)
+    assert dut.numWritesSent == 0
+    assert dut.numWritesSuppressed == 1
+
+
+def test_pid_writes_counted():
+    dut = _makeDut()
+    # Not configured yet - nothing would have been sent, so nothing is suppressed either
+    dut.setPID(1.0, 0.0, 0.0)
+    dut.setPID(1.0, 0.0, 0.0)
+    assert (dut.numWritesSent, dut.numWritesSuppressed) == (0, 0)
+
+    assert dut.tryConfigure()
+    assert dut.pidCtrl.numGainWrites == 1
+    dut.setPID(1.0, 0.0, 0.0)
+    assert (dut.numWritesSent, dut.numWritesSuppressed) == (0, 1)
+    dut.setPID(1.5, 0.0, 0.0)
+    assert (dut.numWritesSent, dut.numWritesSuppressed) == (1, 1)
+    assert dut.pidCtrl.numGainWrites == 2
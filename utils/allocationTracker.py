@@ -0,0 +1,124 @@
+import gc
+import sys
+import tracemalloc
+
+
+class SegmentAllocStats:
+    """Net allocations made in one code segment, accumulated over many loops"""
+
+    __slots__ = "count", "totalBytes", "maxBytes", "totalBlocks", "maxBlocks", "totalGcObjs", "maxGcObjs"
+
+    def __init__(self):
+        self.count = 0
+        self.totalBytes = 0
+        self.maxBytes = 0
+        self.totalBlocks = 0
+        self.maxBlocks = 0
+        self.totalGcObjs = 0
+        self.maxGcObjs = 0
+
+    def reset(self):
+        self.count = 0
+        self.totalBytes = 0
+        self.maxBytes = 0
+        self.totalBlocks = 0
+        self.maxBlocks = 0
+        self.totalGcObjs = 0
+        self.maxGcObjs = 0
+
+    def append(self, numBytes, numBlocks, numGcObjs):
+        self.count += 1
+        self.totalBytes += numBytes
+        self.maxBytes = max(self.maxBytes, numBytes)
+        self.totalBlocks += numBlocks
+        self.maxBlocks = max(self.maxBlocks, numBlocks)
+        self.totalGcObjs += numGcObjs
+        self.maxGcObjs = max(self.maxGcObjs, numGcObjs)
+
+    def meanBytes(self):
+        return self.totalBytes / self.count if self.count > 0 else 0.0
+
+    def meanBlocks(self):
+        return self.totalBlocks / self.count if self.count > 0 else 0.0
+
+    def meanGcObjs(self):
+        return self.totalGcObjs / self.count if self.count > 0 else 0.0
+
+
+class AllocationTracker:
+    """
+    Attributes memory allocations to the code between two marks.
+    At every sample, three counters are read, and the change since the last sample
+    is charged to the segment that just ended:
+     - bytes: memory traced by tracemalloc (only if useTracemalloc is set - it's slow)
+     - blocks: sys.getallocatedblocks(), all memory blocks Python has handed out
+     - gc objects: gc.get_count()[0], container objects the garbage collector has to track.
+       These are the ones that can end up as cyclic garbage that only a collection will free.
+    All three are net numbers - objects created and freed inside the same segment don't show up,
+    so a hot path with a positive number here is leaving something behind every loop.
+    Python keeps small free lists of recently freed objects (floats, tuples, dicts...)
+    which can shift a few objects between segments, so judge the steady state, not the first loop.
+    A garbage collection resets the gc object count, so automatic collection is
+    turned off while tracking (GCController already does this on the robot).
+    Usually driven by SegmentTimeTracker (see enableAllocationTracking()), but can
+    also be used directly, for example to put allocation budgets on code in unit tests.
+    """
+
+    def __init__(self, useTracemalloc=False):
+        self.useTracemalloc = useTracemalloc
+        self.startedTracemalloc = False
+        self.gcWasEnabled = False
+        self.segments = {}
+        self.lastBytes = 0
+        self.lastBlocks = 0
+        self.lastGcObjs = 0
+
+    def start(self):
+        self.gcWasEnabled = gc.isenabled()
+        gc.disable()
+        if self.useTracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.startedTracemalloc = True
+
+    def stop(self):
+        if self.startedTracemalloc:
+            tracemalloc.stop()
+            self.startedTracemalloc = False
+        if self.gcWasEnabled:
+            gc.enable()
+            self.gcWasEnabled = False
+
+    def _read(self):
+        numBytes = tracemalloc.get_traced_memory()[0] if self.useTracemalloc else 0
+        return numBytes, sys.getallocatedblocks(), gc.get_count()[0]
+
+    def beginLoop(self):
+        """Reset the baseline - allocations before this aren't charged to any segment"""
+        self.lastBytes, self.lastBlocks, self.lastGcObjs = self._read()
+
+    def sample(self, name):
+        """Charge everything allocated since the last sample to segment `name`"""
+        numBytes, numBlocks, numGcObjs = self._read()
+        stats = self.segments.get(name)
+        if stats is None:
+            stats = SegmentAllocStats()
+            self.segments[name] = stats
+        stats.append(numBytes - self.lastBytes, numBlocks - self.lastBlocks, numGcObjs - self.lastGcObjs)
+        # Re-read so the stats bookkeeping above isn't charged to the next segment
+        self.lastBytes, self.lastBlocks, self.lastGcObjs = self._read()
+
+    def reset(self):
+        for stats in self.segments.values():
+            stats.reset()
+
+    def report(self):
+        """
+        Returns:
+            list[str]: one line per segment, most gc objects per loop first
+        """
+        lines = []
+        for name, stats in sorted(self.segments.items(), key=lambda item: -item[1].meanGcObjs()):
+            lines.append(f"{name.rstrip('_')}: {stats.meanBytes():.0f} bytes, {stats.meanBlocks():.1f} blocks, "
+                         f"{stats.meanGcObjs():.1f} gc objects per loop (max {stats.maxGcObjs}) "
+                         f"over {stats.count} loops")
+        return lines
@@ -2,6 +2,7 @@ import wpilib
 import ntcore as nt
 
 from utils.singleton import Singleton
+from utils.calibrationStore import CalibrationStore
 
 
 class CalibrationWrangler(metaclass=Singleton):
@@ -12,6 +13,12 @@ class CalibrationWrangler(metaclass=Singleton):
 
     def __init__(self):
         self.calDict = {}
+        self.calByListener = {}
+        # Desired value updates come in as events, so quiet loops don't
+        # have to touch any calibrations at all
+        self.poller = nt.NetworkTableListenerPoller(nt.NetworkTableInstance.getDefault())
+        # Values tuned on previous boots, loaded all at once
+        self.store = CalibrationStore()
 
     def register(self, cal):
         """Record that a new calibration is present and should be processed in the future
@@ -20,11 +27,41 @@ class CalibrationWrangler(metaclass=Singleton):
             cal (Calibration): the calibration to register
         """
         self.calDict[cal.name] = cal
+        # kImmediate also picks up a desired value that was published before we started listening
+        listener = self.poller.addListener(cal.desValueSubscriber,
+                                           nt.EventFlags.kValueAll | nt.EventFlags.kImmediate)
+        self.calByListener[listener] = cal
+
+        savedVal = self.store.get(cal.name)
+        if savedVal is not None:
+            cal.restore(savedVal)
 
     def update(self):
-        """Update all calibrations. Should be called every 20ms"""
-        for cal in self.calDict.values():
-            cal.update()
+        """Apply any desired values sent over NT since the last call. Should be called every 20ms.
+        Only calibrations whose desired value actually changed are touched."""
+        for event in self.poller.readQueue():
+            cal = self.calByListener.get(event.listener)
+            if cal is not None:
+                newVal = event.data.value.getDouble()
+                if cal.set(newVal):
+                    self.store.put(cal.name, newVal)
+
+    def clearSaved(self, name=None):
+        """Forget saved values and go back to the coded defaults
+
+        Args:
+            name (str | None): The calibration to clear, or None to clear all of them
+        """
+        self.store.clear(name)
+        names = list(self.calDict) if name is None else [name]
+        for calName in names:
+            cal = self.calDict.get(calName)
+            if cal is not None:
+                cal.revertToDefault()
+
+    def stop(self):
+        """Flush any calibration values that haven't been saved yet"""
+        self.store.stop()
 
 
 ###########################################
@@ -45,12 +82,12 @@ class Calibration:
         self.name = name
         self.units = units
         self._default = float(default)
-        self._lastUpdateTime = 0
         self.min = minVal
         self.max = maxVal
         self._desValue = self._default
         self._curValue = self._default
         self._changed = False
+        self.curValuePublisher = None
 
         self.reset()
 
@@ -79,25 +116,42 @@ class Calibration:
         self._desValue = self._default
         self._curValue = self._default
         self._changed = False
+        if self.curValuePublisher is not None:
+            self._publishState()
 
     # Provides a new value to the calibration. This value will be returned on the next
     # call to `get()`. The `isChanged()` flag will return True until `get()` is called.
+    # Returns False if the value was out of range and skipped.
     def set(self, newVal):
         if self.max >= newVal >= self.min:
             self._changed = True
             self._desValue = newVal
+            self._publishState()
+            return True
         else:
             wpilib.reportWarning(
                 f"[Calibration] Skipping value update for {self.name},"
                 + " value {newVal} is out of range [{self.min},{self.max}]"
             )
-
-    # Periodic update to read from the desired value on NT, and publish the current value
-    def update(self):
-        val = self.desValueSubscriber.getAtomic()
-        if val.time > self._lastUpdateTime:
-            self.set(val.value)
-            self._lastUpdateTime = val.time
+            return False
+
+    # Goes back to the default value. Like `set()`, the `isChanged()` flag
+    # will return True until `get()` is called.
+    def revertToDefault(self):
+        self.set(self._default)
+
+    # Starts the calibration at a previously saved value instead of its default,
+    # without flagging it as changed. Out of range values are ignored.
+    def restore(self, savedVal):
+        if self.max >= savedVal >= self.min:
+            self._desValue = savedVal
+            self._curValue = savedVal
+            self._changed = False
+            self._publishState()
+
+    # Publish the current value and pending state. Only needed when they change,
+    # NT keeps the last value around for the calibration webpage.
+    def _publishState(self):
         self.curValuePublisher.set(self._curValue)
         self.curValTopic.setProperty("pending", self._changed)
 
@@ -108,6 +162,8 @@ class Calibration:
     # Gets the current value of the calibration, resetting state internally with
     # the assumption the user's code is consuming the value and doing something useful with it.
     def get(self):
-        self._curValue = self._desValue
-        self._changed = False
+        if self._changed:
+            self._curValue = self._desValue
+            self._changed = False
+            self._publishState()
         return self._curValue
@@ -0,0 +1,127 @@
+import json
+import os
+import time
+from threading import Event, Lock, Thread
+from utils.extDriveManager import ExtDriveManager
+from utils.robotIdentification import RobotIdentification
+
+
+class CalibrationStore:
+    """
+    Saves calibration values tuned over NT to the USB drive, so they survive a reboot.
+    One file per robot (keyed by roboRIO serial number), read once at startup.
+    Writes happen on a background thread, never in the periodic loop.
+    """
+
+    def __init__(self, filePath=None, saveDelayS=1.0):
+        """
+        Args:
+            filePath (str | None): where to keep the saved values. Defaults to a
+            per-robot file on the USB drive, or no saving at all if there is no drive
+            (or in simulation).
+            saveDelayS (float): how long to wait after a change before writing, so a
+            burst of edits from the calibration webpage turns into a single write
+        """
+        self.values = {}
+        self.saveDelayS = saveDelayS
+        self.numSaves = 0
+        self.lock = Lock()
+        self.saveRequested = Event()
+        self.runCmd = True
+        self.thread = None
+
+        if filePath is None and ExtDriveManager().isConnected() and ExtDriveManager().getCalStoragePath() is not None:
+            serial = RobotIdentification().getRobotSerialNumber()
+            if not serial:
+                serial = "unknown"
+            filePath = os.path.join(ExtDriveManager().getCalStoragePath(), f"calibrations_{serial}.json")
+        self.filePath = filePath
+
+        if self.filePath is not None:
+            self._load()
+
+    def _load(self):
+        # One read for all calibrations
+        try:
+            with open(self.filePath, "r", encoding="utf-8") as calFile:
+                loaded = json.load(calFile)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as err:
+            print(f"Could not load saved calibrations from {self.filePath}: {err}")
+            return
+
+        if isinstance(loaded, dict):
+            self.values = {
+                str(name): float(val) for name, val in loaded.items() if isinstance(val, (int, float))
+            }
+
+    def get(self, name):
+        """
+        Returns:
+            float | None: the saved value of the named calibration, or None if nothing was saved
+        """
+        return self.values.get(name)
+
+    def put(self, name, value):
+        """Record a new value for a calibration, and schedule it to be written to disk.
+        Safe to call from the periodic loop - this never touches the disk itself, unless
+        stop() was already called, in which case the value is written immediately."""
+        if self.filePath is None:
+            return
+        with self.lock:
+            self.values[name] = float(value)
+        self._requestSave()
+
+    def clear(self, name=None):
+        """Forget a saved value, or all of them if name is None, and schedule the file to be re-written"""
+        if self.filePath is None:
+            return
+        with self.lock:
+            if name is None:
+                self.values.clear()
+            else:
+                self.values.pop(name, None)
+        self._requestSave()
+
+    def _requestSave(self):
+        if not self.runCmd:
+            # Writer thread already stopped (robot is shutting down) - write now, rather than lose the change
+            with self.lock:
+                snapshot = dict(self.values)
+            self._save(snapshot)
+            return
+        if self.thread is None:
+            # Only start the writer thread once there's something to write
+            self.thread = Thread(target=self._saveThreadMain, daemon=True)
+            self.thread.start()
+        self.saveRequested.set()
+
+    def stop(self):
+        """Write any pending changes and stop the writer thread"""
+        self.runCmd = False
+        if self.thread is not None:
+            self.saveRequested.set()
+            self.thread.join()
+            self.thread = None
+
+    def _saveThreadMain(self):
+        while self.runCmd:
+            self.saveRequested.wait()
+            if self.runCmd:
+                time.sleep(self.saveDelayS)
+            self.saveRequested.clear()
+            with self.lock:
+                snapshot = dict(self.values)
+            self._save(snapshot)
+
+    def _save(self, snapshot):
+        # Write to a temporary file first, so a brownout mid-write can't corrupt the saved values
+        tmpPath = self.filePath + ".tmp"
+        try:
+            with open(tmpPath, "w", encoding="utf-8") as calFile:
+                json.dump(snapshot, calFile, separators=(",", ":"))
+            os.replace(tmpPath, self.filePath)
+            self.numSaves += 1
+        except OSError as err:
+            print(f"Could not save calibrations to {self.filePath}: {err}")
@@ -13,12 +13,18 @@ class ExtDriveManager(metaclass=Singleton):
             self.logDir = (
                 "./.simulationLogs"  # .prefix makes sure it doesn't get deployed
             )
+            # Simulation and tests always start from the coded calibration defaults,
+            # so nothing is saved between runs
+            self.calDir = None
         else:
             self.logDir = "/U/logs"
+            self.calDir = "/U/calibrations"
 
         try:
             if not os.path.isdir(self.logDir):
                 os.makedirs(self.logDir)
+            if self.calDir is not None and not os.path.isdir(self.calDir):
+                os.makedirs(self.calDir)
         except PermissionError as err:
             print("Logging disabled!")
             print(err)
@@ -30,5 +36,12 @@ class ExtDriveManager(metaclass=Singleton):
     def getLogStoragePath(self):
         return self.logDir
 
+    def getCalStoragePath(self):
+        """
+        Returns:
+            str | None: Where to save calibration values, or None if they shouldn't be saved
+        """
+        return self.calDir
+
     def isConnected(self):
         return self.conn
\ No newline at end of file
@@ -15,6 +15,7 @@ class FaultWrangler(metaclass=Singleton):
     def __init__(self):
         self.faultList = []
         self.activeFaultCount = 0
+        self.numFaultActivations = 0  # Bumped every time any fault goes from inactive to active
         self.loopCounter = 0
         self.statusUpdateLoops = 40  # Only update the status every 40 loops
         self.curDisplayedFaultIdx = 0
@@ -91,14 +92,17 @@ class Fault:
 
     def __init__(self, message):
         self.message = message
-        FaultWrangler().register(self)
+        self.wrangler = FaultWrangler()
+        self.wrangler.register(self)
         self.isActive = False
 
     def set(self, isActive):
+        if isActive and not self.isActive:
+            self.wrangler.numFaultActivations += 1
         self.isActive = isActive
 
     def setFaulted(self):
-        self.isActive = True
+        self.set(True)
 
     def setNoFault(self):
         self.isActive = False
@@ -0,0 +1,206 @@
+import gc
+import os
+import queue
+import struct
+import time
+from array import array
+from threading import Thread
+
+# Compact binary dump layout, all little-endian:
+#   header:   magic, version, number of mark names, number of loops, number of marks
+#   reason:   uint16 length + utf-8 string
+#   names:    for each mark name, uint16 length + utf-8 string (index = mark ID)
+#   per-loop: int64 start time ns, int64 duration ns, int64 CPU time ns,
+#             int32 gc gen0/gen1/gen2 counts, int32 number of marks in the loop
+#   marks:    int32 mark IDs, then int64 mark timestamps ns
+DUMP_MAGIC = b"FLTREC"
+DUMP_VERSION = 1
+DUMP_HEADER = struct.Struct("<6sHIII")
+DUMP_STR_LEN = struct.Struct("<H")
+
+LOOP_RING_SIZE = 256 # must be a power of two
+# The mark ring is sized to hold a full window of loops with up to this many marks each.
+# Loops with more marks than this shorten the window that fits in a dump.
+MAX_MARKS_PER_LOOP = 96
+MARK_RING_SIZE = 1 << (LOOP_RING_SIZE * MAX_MARKS_PER_LOOP - 1).bit_length()
+
+
+def _zeros(typecode, size):
+    return array(typecode, bytes(array(typecode).itemsize * size))
+
+
+def _unroll(buf, mask, first, count):
+    # Pull `count` entries, oldest first, out of a circular buffer starting at running index `first`
+    start = first & mask
+    end = start + count
+    if end <= len(buf):
+        return buf[start:end]
+    return buf[start:] + buf[:end - len(buf)]
+
+
+class FlightRecorderRings:
+    """One set of circular buffers holding the recorded loops and their marks"""
+
+    def __init__(self):
+        self.loopStartNs = _zeros("q", LOOP_RING_SIZE)
+        self.loopDurNs = _zeros("q", LOOP_RING_SIZE)
+        self.loopCpuNs = _zeros("q", LOOP_RING_SIZE)
+        self.loopGc0 = _zeros("i", LOOP_RING_SIZE)
+        self.loopGc1 = _zeros("i", LOOP_RING_SIZE)
+        self.loopGc2 = _zeros("i", LOOP_RING_SIZE)
+        self.loopMarkStart = _zeros("q", LOOP_RING_SIZE)
+        self.loopMarkCount = _zeros("i", LOOP_RING_SIZE)
+        self.numLoops = 0
+
+        self.markIds = _zeros("i", MARK_RING_SIZE)
+        self.markTimesNs = _zeros("q", MARK_RING_SIZE)
+        self.numMarks = 0
+
+    def reset(self):
+        self.numLoops = 0
+        self.numMarks = 0
+
+    def copyMarks(self, ringIds, ringTimesNs, ringStartIdx, ringMask, markCount):
+        markIds = self.markIds
+        markTimesNs = self.markTimesNs
+        markMask = MARK_RING_SIZE - 1
+        numMarks = self.numMarks
+        srcIdx = ringStartIdx
+        for _ in range(markCount):
+            dstIdx = numMarks & markMask
+            markIds[dstIdx] = ringIds[srcIdx]
+            markTimesNs[dstIdx] = ringTimesNs[srcIdx]
+            numMarks += 1
+            srcIdx = (srcIdx + 1) & ringMask
+        self.numMarks = numMarks
+
+    def unrollWindow(self, windowLoops):
+        """
+        Returns:
+            tuple: (number of loops, number of marks, per-loop arrays, mark arrays), oldest first,
+            for up to the last windowLoops loops whose marks are all still in the ring
+        """
+        loopMask = LOOP_RING_SIZE - 1
+        numLoops = min(self.numLoops, windowLoops)
+        firstLoop = self.numLoops - numLoops
+        # Older loops may have had their marks overwritten already, skip those
+        while numLoops > 0 and self.loopMarkStart[firstLoop & loopMask] < self.numMarks - MARK_RING_SIZE:
+            firstLoop += 1
+            numLoops -= 1
+
+        loopArrays = [
+            _unroll(buf, loopMask, firstLoop, numLoops)
+            for buf in (self.loopStartNs, self.loopDurNs, self.loopCpuNs,
+                        self.loopGc0, self.loopGc1, self.loopGc2, self.loopMarkCount)
+        ]
+        firstMark = self.loopMarkStart[firstLoop & loopMask] if numLoops > 0 else self.numMarks
+        numMarks = self.numMarks - firstMark
+        markArrays = [
+            _unroll(buf, MARK_RING_SIZE - 1, firstMark, numMarks)
+            for buf in (self.markIds, self.markTimesNs)
+        ]
+        return numLoops, numMarks, loopArrays, markArrays
+
+
+class FlightRecorder:
+    """
+    Keeps the last few seconds of per-loop segment timing, garbage collector
+    counts and CPU time in circular buffers. When something goes wrong (a loop
+    overrun or a new fault), the filled buffers are handed to a background thread
+    to be written to disk, and recording carries on in a spare set, so we can see
+    what led up to the problem without the robot loop copying anything.
+    Fed by SegmentTimeTracker's profiler ring. Use logAnalysis/flightRecorderTimeline.py
+    to look at the dumps.
+    """
+
+    def __init__(self, markNames, dumpDir):
+        """
+        Args:
+            markNames (list[str]): Mark names indexed by mark ID. Shared with the
+            SegmentTimeTracker, so names registered later still show up.
+            dumpDir (str | None): Directory to write dumps to, or None to never write them
+        """
+        self.markNames = markNames
+        self.dumpDir = dumpDir
+        self.windowLoops = LOOP_RING_SIZE - 6 # ~5 seconds
+
+        self.rings = FlightRecorderRings()
+        # Only allocated once there's somewhere to dump to. Given back by the writer thread when it's done.
+        self.spareRings = queue.Queue()
+        if dumpDir is not None:
+            self.spareRings.put(FlightRecorderRings())
+
+        self.curLoopCpuStartNs = time.process_time_ns()
+
+        self.loopsSinceDump = LOOP_RING_SIZE
+        self.numDumps = 0
+        self.numSuppressedTriggers = 0
+        self.dumpQueue = queue.Queue()
+        self.thread = None
+
+    def startLoop(self):
+        self.curLoopCpuStartNs = time.process_time_ns()
+
+    def recordLoop(self, ringIds, ringTimesNs, ringStartIdx, ringEndIdx, ringMask, loopDurNs):
+        """Copy one loop's marks out of the SegmentTimeTracker's profiler ring.
+        Call once per loop, after the loop's duration is known."""
+        rings = self.rings
+        loopIdx = rings.numLoops & (LOOP_RING_SIZE - 1)
+        markCount = (ringEndIdx - ringStartIdx) & ringMask
+        rings.loopStartNs[loopIdx] = ringTimesNs[ringStartIdx]
+        rings.loopDurNs[loopIdx] = loopDurNs
+        rings.loopCpuNs[loopIdx] = time.process_time_ns() - self.curLoopCpuStartNs
+        rings.loopGc0[loopIdx], rings.loopGc1[loopIdx], rings.loopGc2[loopIdx] = gc.get_count()
+        rings.loopMarkStart[loopIdx] = rings.numMarks
+        rings.loopMarkCount[loopIdx] = markCount
+        rings.copyMarks(ringIds, ringTimesNs, ringStartIdx, ringMask, markCount)
+        rings.numLoops += 1
+        self.loopsSinceDump += 1
+
+    def trigger(self, reason):
+        """Hand the recorded window to the writer thread to be written to disk.
+        Triggers that come before a full new window has been recorded since the
+        last dump are counted, but ignored, so a burst of overruns only makes one file."""
+        if self.dumpDir is None:
+            return
+        if self.loopsSinceDump < self.windowLoops:
+            self.numSuppressedTriggers += 1
+            return
+
+        try:
+            spareRings = self.spareRings.get_nowait()
+        except queue.Empty:
+            # Still writing the last dump
+            self.numSuppressedTriggers += 1
+            return
+        self.loopsSinceDump = 0
+        self.dumpQueue.put((reason, self.rings))
+        self.rings = spareRings
+
+        if self.thread is None:
+            self.thread = Thread(target=self._writerThreadMain, daemon=True)
+            self.thread.start()
+
+    def _writerThreadMain(self):
+        while True:
+            reason, rings = self.dumpQueue.get()
+            try:
+                self._writeDump(reason, rings)
+            except OSError as err:
+                print(f"Could not write flight recorder dump: {err}")
+            rings.reset()
+            self.spareRings.put(rings)
+
+    def _writeDump(self, reason, rings):
+        numLoops, numMarks, loopArrays, markArrays = rings.unrollWindow(self.windowLoops)
+        markNames = list(self.markNames)
+        fileName = f"flightRecorder_{time.strftime('%Y%m%d_%H%M%S')}_{self.numDumps}.bin"
+        self.numDumps += 1
+        with open(os.path.join(self.dumpDir, fileName), "wb") as dumpFile:
+            dumpFile.write(DUMP_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, len(markNames), numLoops, numMarks))
+            for text in [reason] + markNames:
+                encoded = text.encode("utf-8")
+                dumpFile.write(DUMP_STR_LEN.pack(len(encoded)))
+                dumpFile.write(encoded)
+            for buf in loopArrays + markArrays:
+                dumpFile.write(buf.tobytes())
@@ -0,0 +1,132 @@
+import gc
+import time
+import wpilib
+
+from utils.segmentTimeTracker import SegmentTimeTracker
+from utils.signalLogging import Signal
+from utils.singleton import Singleton
+
+
+class GCController(metaclass=Singleton):
+    """
+    Takes garbage collection scheduling away from Python. Automatic collection is
+    disabled, so a collection can never start in the middle of a time-critical
+    part of the loop. Instead, call update() at the end of every loop - small
+    (generation 0 and 1) collections are run there, but only when the loop has
+    enough time left before the next one starts. Full collections only happen
+    while the robot is disabled.
+    """
+
+    def __init__(self):
+        self.stt = SegmentTimeTracker()
+        self.loopPeriodS = 0.02
+        self.gen0MinSlackS = 0.004
+        self.gen1MinSlackS = 0.008
+        # If allocations keep piling up with no slack to collect them in, collect anyway
+        # once they reach this many times the normal generation 0 threshold
+        self.maxDeferFactor = 8
+        # Objects allocated in the first few loops (lazy init) are frozen too, so they never get scanned again
+        self.freezeAfterLoops = 10
+        self.disabledFullCollectLoops = 250
+        self.gen0Threshold, self.gen1Threshold, _ = gc.get_threshold()
+
+        self.loopCount = 0
+        self.disabledLoopCount = 0
+        self.prevGen0Count = 0
+        self.gen0GrowthBeforeCollects = 0
+        self.loopGen0Growth = 0
+        self.inScheduledCollect = False
+        self.collectStartNs = 0
+        self.numCollections = [0, 0, 0]
+        self.numForcedCollections = 0
+        self.numUnscheduledCollections = 0
+        self.loopPauseNs = 0
+        self.maxPauseNs = 0
+
+        self.gen0GrowthSig = Signal("GC Gen0 Growth Per Loop", "count")
+        self.gen0CollectionsSig = Signal("GC Gen0 Collections", "count", deadband=0)
+        self.gen1CollectionsSig = Signal("GC Gen1 Collections", "count", deadband=0)
+        self.fullCollectionsSig = Signal("GC Full Collections", "count", deadband=0)
+        self.forcedCollectionsSig = Signal("GC Forced Collections", "count", deadband=0)
+        self.unscheduledCollectionsSig = Signal("GC Unscheduled Collections", "count", deadband=0)
+        self.loopPauseSig = Signal("GC Loop Pause", "ms", deadband=0)
+        self.maxPauseSig = Signal("GC Max Pause", "ms", deadband=0)
+
+        gc.disable()
+        # Time every collection, including any we didn't start ourselves
+        gc.callbacks.append(self._gcCallback)
+
+    def stop(self):
+        """Hand garbage collection back to Python"""
+        if self._gcCallback in gc.callbacks:
+            gc.callbacks.remove(self._gcCallback)
+        gc.enable()
+
+    def freeze(self):
+        """Collect everything, then move all surviving objects into the permanent generation,
+        so future collections don't have to look at them. Call once at the end of robotInit()."""
+        self._collect(2)
+        gc.freeze()
+
+    def _gcCallback(self, phase, info):
+        if phase == "start":
+            self.collectStartNs = time.perf_counter_ns()
+            # Growth up to this collection - afterward, the count starts over from whatever survived
+            self.gen0GrowthBeforeCollects += gc.get_count()[0] - self.prevGen0Count
+        else:
+            self.prevGen0Count = gc.get_count()[0]
+            pauseNs = time.perf_counter_ns() - self.collectStartNs
+            self.loopPauseNs += pauseNs
+            self.maxPauseNs = max(self.maxPauseNs, pauseNs)
+            self.numCollections[info["generation"]] += 1
+            if not self.inScheduledCollect:
+                self.numUnscheduledCollections += 1
+
+    def _collect(self, generation):
+        self.inScheduledCollect = True
+        gc.collect(generation)
+        self.inScheduledCollect = False
+
+    def update(self):
+        """Run any collections needed this loop. Call as late in the loop as possible."""
+        self.loopCount += 1
+        if self.loopCount == self.freezeAfterLoops:
+            self.freeze()
+
+        if wpilib.DriverStation.isDisabled():
+            # Nothing time-critical is running, so clean up everything now and then
+            if self.disabledLoopCount % self.disabledFullCollectLoops == 0:
+                self._collect(2)
+            self.disabledLoopCount += 1
+        else:
+            self.disabledLoopCount = 0
+
+        gen0Count, gen1Count, _ = gc.get_count()
+        if gen0Count >= self.gen0Threshold:
+            # Same measurement as SegmentTimeTracker's curLoopExecDur, but taken up to now
+            loopExecDurS = wpilib.Timer.getFPGATimestamp() - self.stt.loopStartTime
+            slackS = self.loopPeriodS - loopExecDurS
+            if gen1Count >= self.gen1Threshold and slackS >= self.gen1MinSlackS:
+                self._collect(1)
+            elif slackS >= self.gen0MinSlackS:
+                self._collect(0)
+            elif gen0Count >= self.gen0Threshold * self.maxDeferFactor:
+                self.numForcedCollections += 1
+                self._collect(0)
+
+        # Net change in objects the collector tracks (allocations minus frees) since the last
+        # update, with any collections in between taken out
+        gen0Count = gc.get_count()[0]
+        self.loopGen0Growth = self.gen0GrowthBeforeCollects + gen0Count - self.prevGen0Count
+        self.gen0GrowthSig.set(self.loopGen0Growth)
+        self.gen0GrowthBeforeCollects = 0
+        self.prevGen0Count = gen0Count
+
+        self.gen0CollectionsSig.set(self.numCollections[0])
+        self.gen1CollectionsSig.set(self.numCollections[1])
+        self.fullCollectionsSig.set(self.numCollections[2])
+        self.forcedCollectionsSig.set(self.numForcedCollections)
+        self.unscheduledCollectionsSig.set(self.numUnscheduledCollections)
+        self.loopPauseSig.set(self.loopPauseNs * 1.0e-6)
+        self.maxPauseSig.set(self.maxPauseNs * 1.0e-6)
+        self.loopPauseNs = 0
@@ -10,6 +10,7 @@ from utils.signalLogging import log
 from utils.singleton import Singleton
 from utils.segmentTimeTracker import SegmentTimeTracker
 from utils.timingHist import CodeTimer, CollectWallAndCpuTimeData, WindowedStats
+from wrappers.sparkMaxFrameProfiles import CANBusLoadEstimator
 
 class MemStats:
     __slots__ = 'log', 'fileStatsCollector', 'procStatsCollector'
@@ -296,10 +297,14 @@ class RIOMonitor(metaclass=Singleton):
     def _updateCANStats(self):
         status = RobotController.getCANStatus()
         log("RIO CAN Bus Usage", status.percentBusUtilization, "pct")
+        # What the Spark Max frame profiles should be using, and everything else on the bus
+        estSparkMaxUsage = CANBusLoadEstimator().getEstBusUtilization()
+        log("RIO CAN Bus Usage Est Spark Max", estSparkMaxUsage, "pct")
+        log("RIO CAN Bus Usage Other", status.percentBusUtilization - estSparkMaxUsage, "pct")
         log("RIO CAN Bus Err Count", status.txFullCount + 
                                      status.receiveErrorCount + 
                                      status.transmitErrorCount, 
-                                     "count")
+                                     "count", deadband=0)
     def _updateVoltages(self):
         log("RIO Supply Voltage", RobotController.getInputVoltage(), "V")
         if(not RobotController.isBrownedOut()):
@@ -1,8 +1,21 @@
+import time
+from array import array
 import wpilib
 
-from utils.signalLogging import log
+from utils.allocationTracker import AllocationTracker
+from utils.extDriveManager import ExtDriveManager
+from utils.faults import FaultWrangler
+from utils.flightRecorder import FlightRecorder
+from utils.signalLogging import Signal
 from utils.singleton import Singleton
-from utils.timingHist import GeometricMean
+from utils.timingHist import GeometricMean, LogHistogram
+
+LOOP_SEGMENT_NAME = "Loop"
+LOOP_START_MARK_NAME = "loopStart"
+LOOP_START_MARK_ID = 0
+PROFILER_RING_SIZE = 4096 # must be a power of two
+# Same as wpilib.Tracer - at most one long loop printout per second
+EPOCHS_MIN_PRINT_PERIOD_S = 1.0
 
 # Utilties for tracking how long certain chunks of code take
 # including logging overall loop execution time
@@ -24,13 +37,66 @@ class SegmentTimeTracker(metaclass=Singleton):
         self.numLoops = 0
         self.numLoopsMod = self.numLoops
         self.trackingEnabled = False
+        self.loopPeriodSig = Signal("LoopPeriod", "ms")
+        self.loopDurationSig = Signal("LoopDuration", "ms")
+        self.loopOverRunCountSig = Signal("LoopOverRunCount", "count", deadband=0)
+        self.loopEndTimeSig = Signal("LoopEndTime", "ms")
+        self.loopCountSig = Signal("LoopCount", "count")
+        self.loopCountModSig = Signal("LoopCountMod", "count")
+        self.loopDurationSmoothSig = Signal("LoopDurationSmooth", "ms")
+
+        # Per-segment duration histograms, keyed by mark name, reported every histWindowLoops
+        self.histWindowLoops = 250
+        self.histWindowCount = 0
+        self.segmentHists = {}
+        self.segmentHistSigs = {}
+        self.lastMarkTime = time.perf_counter()
+
+        # Profiler mode - marks only record an integer ID and a timestamp into a
+        # preallocated ring buffer, instead of going through wpilib.Tracer.
+        # It's cheap enough that perhapsMark()'s are always recorded.
+        # Turning the ring into per-segment durations is put off until the histograms
+        # are published, or the ring is half full, whichever comes first.
+        self.useProfiler = True
+        self.markIds = {LOOP_START_MARK_NAME: LOOP_START_MARK_ID}
+        self.markNames = [LOOP_START_MARK_NAME]
+        self.ringMask = PROFILER_RING_SIZE - 1
+        self.ringIds = array("i", bytes(array("i").itemsize * PROFILER_RING_SIZE))
+        self.ringTimesNs = array("q", bytes(array("q").itemsize * PROFILER_RING_SIZE))
+        self.ringIdx = 0
+        self.loopStartRingIdx = 0
+        self.ringAggregatedIdx = 0
+        self.lastEpochsPrintTime = 0.0
+
+        # Flight recorder - keeps the last few seconds of profiler data, and dumps it
+        # to the log drive whenever a loop overruns or a new fault goes active.
+        # Only runs in profiler mode. Simulation isn't real-time, so nearly every loop
+        # "overruns" there - dumps are only written on a real robot.
+        dumpDir = None
+        if ExtDriveManager().isConnected() and not wpilib.RobotBase.isSimulation():
+            dumpDir = ExtDriveManager().getLogStoragePath()
+        self.flightRecorder = FlightRecorder(self.markNames, dumpDir)
+        self.faultWrangler = FaultWrangler()
+        self.lastNumFaultActivations = self.faultWrangler.numFaultActivations
+
+        # Optional allocation tracking - see enableAllocationTracking()
+        self.allocTracker = None
+        self.allocSigs = {}
 
     def start(self):
-        self.tracer.clearEpochs()
+        if self.useProfiler:
+            self.loopStartRingIdx = self.ringIdx
+            self._recordMark(LOOP_START_MARK_ID)
+            self.flightRecorder.startLoop()
+        else:
+            self.tracer.clearEpochs()
         self.prevLoopStartTime = self.loopStartTime
         self.loopStartTime = wpilib.Timer.getFPGATimestamp()
+        self.lastMarkTime = time.perf_counter()
+        if self.allocTracker is not None:
+            self.allocTracker.beginLoop()
         self.curPeriod = self.loopStartTime - self.prevLoopStartTime
-        log("LoopPeriod", self.curPeriod * 1000.0, "ms")
+        self.loopPeriodSig.set(self.curPeriod * 1000.0)
         if self.numLoops >= self.minLoopsToEnableTracking and self.curPeriod >= self.minLoopPeriodToEnableTracking:
             self.trackingEnabled = True
 
@@ -87,16 +153,146 @@ class SegmentTimeTracker(metaclass=Singleton):
             name = name[:self.markNamePadLen]
         elif len(name)<self.markNamePadLen:
             name = name.ljust(self.markNamePadLen, '_')
+        self._getMarkId(name)
         return name
-        
+
+    def _getMarkId(self, name):
+        # Registers new mark names as they are seen - normally all in makePaddedMarkName() at init
+        markId = self.markIds.get(name)
+        if markId is None:
+            markId = len(self.markNames)
+            self.markIds[name] = markId
+            self.markNames.append(name)
+        return markId
+
+    def _recordMark(self, markId):
+        idx = self.ringIdx
+        self.ringIds[idx] = markId
+        self.ringTimesNs[idx] = time.perf_counter_ns()
+        self.ringIdx = (idx + 1) & self.ringMask
+
     def mark(self, name):
         if self.trackingEnabled:
-            self.tracer.addEpoch(name)
+            if self.useProfiler:
+                # Hot path - same as _recordMark(), inlined to save a call
+                markId = self.markIds.get(name)
+                if markId is None:
+                    markId = self._getMarkId(name)
+                idx = self.ringIdx
+                self.ringIds[idx] = markId
+                self.ringTimesNs[idx] = time.perf_counter_ns()
+                self.ringIdx = (idx + 1) & self.ringMask
+            else:
+                self.tracer.addEpoch(name)
+                now = time.perf_counter()
+                self._recordSegment(name, now - self.lastMarkTime)
+                self.lastMarkTime = now
+            if self.allocTracker is not None:
+                self.allocTracker.sample(name)
+
+    def _recordSegment(self, name, durationS):
+        hist = self.segmentHists.get(name)
+        if hist is None:
+            hist = LogHistogram()
+            self.segmentHists[name] = hist
+        hist.append(durationS)
+
+    def _publishSegmentHists(self):
+        # Report p50/p90/p99/max for every segment over the last window, then start a new window
+        for name, hist in self.segmentHists.items():
+            if hist.count == 0:
+                continue # Segment wasn't marked this window
+            sigs = self.segmentHistSigs.get(name)
+            if sigs is None:
+                segName = name.rstrip("_")
+                sigs = tuple(Signal(f"STT {segName} {statName}", "ms") for statName in ("p50", "p90", "p99", "max"))
+                self.segmentHistSigs[name] = sigs
+            sigs[0].set(hist.percentile(50) * 1000.0)
+            sigs[1].set(hist.percentile(90) * 1000.0)
+            sigs[2].set(hist.percentile(99) * 1000.0)
+            sigs[3].set(hist.maxSample * 1000.0)
+            hist.reset()
+
+    def enableAllocationTracking(self, useTracemalloc=False):
+        """
+        Instrumentation mode for finding out which code allocates memory every loop.
+        Every mark also charges the allocations made since the previous mark to its segment,
+        and the per-loop averages are logged as `STT <mark name> alloc ...` signals.
+        Slows down every mark, and tracemalloc slows down all of Python, so this is meant
+        for simulation and tests, not the field.
+
+        Returns:
+            AllocationTracker: the tracker, for inspecting per-segment stats directly
+        """
+        if self.allocTracker is None:
+            self.allocTracker = AllocationTracker(useTracemalloc)
+            self.allocTracker.start()
+        return self.allocTracker
+
+    def _publishAllocStats(self):
+        for name, stats in self.allocTracker.segments.items():
+            if stats.count == 0:
+                continue
+            sigs = self.allocSigs.get(name)
+            if sigs is None:
+                segName = name.rstrip("_")
+                sigs = (Signal(f"STT {segName} alloc bytes", "bytes"),
+                        Signal(f"STT {segName} alloc blocks", "count"),
+                        Signal(f"STT {segName} alloc gcObjs", "count"))
+                self.allocSigs[name] = sigs
+            sigs[0].set(stats.meanBytes())
+            sigs[1].set(stats.meanBlocks())
+            sigs[2].set(stats.meanGcObjs())
+        self.allocTracker.reset()
 
     def perhapsMark(self, name):
-        if self.trackingEnabled and self.doOptionalPerhapsMarks:
+        if self.trackingEnabled and (self.doOptionalPerhapsMarks or self.useProfiler):
             self.mark(name)
 
+    def _getRingSegments(self, startIdx, endIdx):
+        # Walk the ring entries from startIdx (a loop start) up to endIdx, yielding
+        # (mark name, duration in seconds) for each segment. The gaps between loops are skipped.
+        ringIds = self.ringIds
+        ringTimesNs = self.ringTimesNs
+        ringMask = self.ringMask
+        if startIdx == endIdx:
+            return
+        prevTimeNs = ringTimesNs[startIdx]
+        idx = (startIdx + 1) & ringMask
+        while idx != endIdx:
+            curTimeNs = ringTimesNs[idx]
+            markId = ringIds[idx]
+            if markId != LOOP_START_MARK_ID:
+                yield self.markNames[markId], (curTimeNs - prevTimeNs) * 1.0e-9
+            prevTimeNs = curTimeNs
+            idx = (idx + 1) & ringMask
+
+    def _aggregateRing(self):
+        # Add every segment recorded since the last call to the histograms
+        for name, durationS in self._getRingSegments(self.ringAggregatedIdx, self.ringIdx):
+            self._recordSegment(name, durationS)
+        self.ringAggregatedIdx = self.ringIdx
+
+    def _printRingEpochs(self):
+        # Same output and rate limit as wpilib.Tracer.printEpochs(), from the ring instead of Tracer epochs
+        now = wpilib.Timer.getFPGATimestamp()
+        if now - self.lastEpochsPrintTime < EPOCHS_MIN_PRINT_PERIOD_S:
+            return
+        self.lastEpochsPrintTime = now
+        lines = [f"\t{name}: {durationS:.6f}s\n"
+                 for name, durationS in self._getRingSegments(self.loopStartRingIdx, self.ringIdx)]
+        wpilib.reportWarning("".join(lines), False)
+
+    def _updateFlightRecorder(self, isOverRun):
+        self.flightRecorder.recordLoop(self.ringIds, self.ringTimesNs, self.loopStartRingIdx,
+                                       self.ringIdx, self.ringMask, int(self.curLoopExecDur * 1.0e9))
+        numFaultActivations = self.faultWrangler.numFaultActivations
+        if isOverRun:
+            self.flightRecorder.trigger(f"overrun {self.curLoopExecDur * 1000.0:.1f}ms")
+        elif numFaultActivations != self.lastNumFaultActivations:
+            self.flightRecorder.trigger("fault")
+        self.lastNumFaultActivations = numFaultActivations
+
     def end(self):
         self.loopEndTime = wpilib.Timer.getFPGATimestamp()
         self.curLoopExecDur = self.loopEndTime - self.loopStartTime
@@ -104,16 +300,36 @@ class SegmentTimeTracker(metaclass=Singleton):
         self.numLoopsMod = (self.numLoopsMod + 1) % 50
         if self.trackingEnabled:
             loopDurationMs = self.curLoopExecDur * 1000.0
-            if(self.curLoopExecDur > self.longLoopThresh):
+            isOverRun = self.curLoopExecDur > self.longLoopThresh
+            if isOverRun:
                 self.numOverRuns += 1
-                self.tracer.printEpochs()
+                if self.useProfiler:
+                    self._printRingEpochs()
+                else:
+                    self.tracer.printEpochs()
+            if self.useProfiler:
+                if ((self.ringIdx - self.ringAggregatedIdx) & self.ringMask) > (self.ringMask >> 1):
+                    self._aggregateRing()
+                self._updateFlightRecorder(isOverRun)
             self.smoothLoopDurationMs.append(loopDurationMs)
-            log("LoopDuration", loopDurationMs, "ms")
-            log("LoopOverRunCount", self.numOverRuns, "count")
+            self._recordSegment(LOOP_SEGMENT_NAME, self.curLoopExecDur)
+            self.histWindowCount += 1
+            if self.histWindowCount >= self.histWindowLoops:
+                self.histWindowCount = 0
+                if self.useProfiler:
+                    self._aggregateRing()
+                self._publishSegmentHists()
+                if self.allocTracker is not None:
+                    self._publishAllocStats()
+            self.loopDurationSig.set(loopDurationMs)
+            self.loopOverRunCountSig.set(self.numOverRuns)
+        else:
+            # Nothing worth keeping in the ring yet
+            self.ringAggregatedIdx = self.ringIdx
 
         # Logging loopEndTime helps when aligning events in graphed plots with netconsole messages by time stamps.
-        log("LoopEndTime", self.loopEndTime*1000.0, "ms")
-        log("LoopCount", self.numLoops, "count")
-        log("LoopCountMod", self.numLoopsMod, "count")
+        self.loopEndTimeSig.set(self.loopEndTime*1000.0)
+        self.loopCountSig.set(self.numLoops)
+        self.loopCountModSig.set(self.numLoopsMod)
         if self.trackingEnabled:
-            log("LoopDurationSmooth", self.smoothLoopDurationMs.value, "ms")
+            self.loopDurationSmoothSig.set(self.smoothLoopDurationMs.value)
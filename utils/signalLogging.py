@@ -1,3 +1,6 @@
+from array import array
+from threading import Thread
+import queue
 import wpilib
 import ntcore as nt
 import wpiutil._wpiutil.log as wpilog # pylint: disable=import-error,no-name-in-module
@@ -5,6 +8,31 @@ from utils.extDriveManager import ExtDriveManager
 from utils.singleton import Singleton
 
 BASE_TABLE = "SmartDashboard"
+INITIAL_SIGNAL_CAPACITY = 512
+
+# Publishing policies, chosen per-signal at registration time
+POLICY_EVERY_LOOP = 0
+POLICY_ON_CHANGE = 1
+POLICY_EVERY_NTH_LOOP = 2
+
+# One loop's worth of samples, handed from the robot loop to the writer thread
+class _SampleBlock:
+    __slots__ = 'capacity', 'sigIds', 'values', 'numSamples', 'time'
+
+    def __init__(self, capacity):
+        self.capacity = 0
+        self.sigIds = array("i")
+        self.values = array("d")
+        self.numSamples = 0
+        self.time = 0
+        self.grow(capacity)
+
+    def grow(self, newCapacity):
+        extra = newCapacity - self.capacity
+        self.sigIds.frombytes(bytes(self.sigIds.itemsize * extra))
+        self.values.frombytes(bytes(self.values.itemsize * extra))
+        self.capacity = newCapacity
+
 
 # Wrangler for coordinating the set of all signals
 class SignalWrangler(metaclass=Singleton):
@@ -14,9 +42,43 @@ class SignalWrangler(metaclass=Singleton):
     def __init__(self):
         # Default to publishing things under Shuffleboard, which makes things more available
         self.table = nt.NetworkTableInstance.getDefault().getTable(BASE_TABLE)
-        self.publishedSigDict = {}
-        self.sigUnitsDict = {}
-        self.sampleList = []
+
+        # Interned signals, looked up by name only by the legacy `log()` API
+        self.sigByNameDict = {}
+
+        # Per-signal slots, indexed by each Signal's integer ID.
+        # Sample storage is preallocated, and only ever grows when new
+        # signals are registered (normally all at robotInit), so steady-state
+        # logging never creates Python objects that need garbage collection.
+        self.sigList = []
+        self.sigPubList = []
+        self.sigLogList = []
+        self.capacity = 0
+        self.sampleValues = array("d")
+        self.sampleDirty = bytearray()
+        self.dirtyIds = array("i")
+        self.numDirty = 0
+        self.sigPolicy = array("b")
+        self.sigDeadband = array("d")
+        self.sigDivisor = array("i")
+        self.lastPubValues = array("d")
+        self.loopCount = 0
+        self._growCapacity(INITIAL_SIGNAL_CAPACITY)
+
+        # Samples published by the last publishPeriodic() call, and since startup
+        self.loopSamplesPublished = 0
+        self.totalSamplesPublished = 0
+
+        # Optional background writer, see `enableWriterThread()`
+        self.writerThread = None
+        self.freeBlocks = None
+        self.filledBlocks = None
+        self.writerDroppedLoops = 0
+        self.writerMaxQueueDepth = 0
+        self.writerDrainTimeMs = 0.0
+        self.writerQueueDepthSig = None
+        self.writerDroppedLoopsSig = None
+        self.writerDrainTimeSig = None
 
         self.log = None
         if(ExtDriveManager().isConnected()):
@@ -24,65 +86,264 @@ class SignalWrangler(metaclass=Singleton):
             wpilib.DataLogManager.logNetworkTables(False) # We have a lot of things in NT that don't need to be logged
             self.log = wpilib.DataLogManager.getLog()
 
+    def register(self, sig):
+        """Bind NT and log file handles for a new signal, and allocate its sample slot
+
+        Args:
+            sig (Signal): the signal to register
+
+        Returns:
+            int: the ID of the signal's slot
+        """
+        # Set up NT publishing
+        sigPub = None
+        if sig.publishNt:
+            sigTopic = self.table.getDoubleTopic(sig.name)
+            sigPub = sigTopic.publish(nt.PubSubOptions(
+                sendAll=True, keepDuplicates=True))
+            sigPub.setDefault(0)
+
+            if sig.units is not None:
+                sigTopic.setProperty("units", str(sig.units))
+
+        # Set up log file publishing if enabled
+        if self.log is not None:
+            sigLog = wpilog.DoubleLogEntry(log=self.log, name=sigNameToNT4TopicName(sig.name))
+        else:
+            sigLog = None
+
+        sigId = len(self.sigList)
+        if sigId >= self.capacity:
+            self._growCapacity(self.capacity * 2)
+        self.sigList.append(sig)
+        self.sigPubList.append(sigPub)
+        self.sigLogList.append(sigLog)
+        self.sigByNameDict[sig.name] = sig
+
+        if sig.deadband is not None:
+            self.sigPolicy[sigId] = POLICY_ON_CHANGE
+            self.sigDeadband[sigId] = sig.deadband
+        elif sig.divisor > 1:
+            self.sigPolicy[sigId] = POLICY_EVERY_NTH_LOOP
+            self.sigDivisor[sigId] = sig.divisor
+        return sigId
+
+    def _growCapacity(self, newCapacity):
+        # Only called at registration time, never from the periodic loop
+        extra = newCapacity - self.capacity
+        self.sampleValues.frombytes(bytes(self.sampleValues.itemsize * extra))
+        self.sampleDirty.extend(bytes(extra))
+        self.dirtyIds.frombytes(bytes(self.dirtyIds.itemsize * extra))
+        self.sigPolicy.frombytes(bytes(self.sigPolicy.itemsize * extra))
+        self.sigDeadband.frombytes(bytes(self.sigDeadband.itemsize * extra))
+        self.sigDivisor.extend([1] * extra)
+        # NaN never compares equal, so the first sample of an on-change signal always goes out
+        self.lastPubValues.extend([float("nan")] * extra)
+        self.capacity = newCapacity
+
+    def getSignal(self, name, units=None, publishNt=True, deadband=None, divisor=1):
+        """Look up a signal by name, creating it on first use"""
+        sig = self.sigByNameDict.get(name)
+        if sig is None:
+            sig = Signal(name, units, publishNt, deadband, divisor)
+        return sig
+
+    def enableWriterThread(self, numBlocks=2):
+        """Move NT and log file I/O off of the periodic loop and onto a background thread.
+        `publishPeriodic()` will then only copy this loop's samples into a preallocated block.
+
+        Args:
+            numBlocks (int): Number of sample blocks to cycle between the robot loop and
+            the writer thread. 2 is double-buffered. If the writer falls this many loops
+            behind, new loops are dropped (and counted) rather than blocking the robot loop.
+        """
+        if self.writerThread is not None:
+            return
+
+        self.freeBlocks = queue.Queue()
+        self.filledBlocks = queue.Queue()
+        for _ in range(numBlocks):
+            self.freeBlocks.put(_SampleBlock(self.capacity))
+
+        self.writerQueueDepthSig = Signal("SignalWrangler Writer Queue Depth", "count", deadband=0)
+        self.writerDroppedLoopsSig = Signal("SignalWrangler Writer Dropped Loops", "count", deadband=0)
+        self.writerDrainTimeSig = Signal("SignalWrangler Writer Drain Time", "ms")
+
+        self.writerThread = Thread(target=self._writerThreadMain, daemon=True)
+        self.writerThread.start()
+
+    def stopWriterThread(self):
+        if self.writerThread is not None:
+            self.filledBlocks.put(None)
+            self.writerThread.join()
+            self.writerThread = None
+
     # Periodic value update
     # Should be called once per periodic loop
-    # Synchronously puts all `log()`'ed numbers to both disc and
-    # Will empty all the samples from the sampleList and put them into NT and disk
-
+    # Puts all `set()`'ed numbers to both disc and NT, either synchronously or
+    # by handing them off to the writer thread
+    # Resets the dirty bitmap by index, so nothing is reallocated for the next loop
     def publishPeriodic(self):
         time = nt._now() # pylint: disable=W0212
-        for sample in self.sampleList:
-            name, value, publishNt = sample
-
-            if not name in self.publishedSigDict:
-                # New signal found!
-
-                # Set up NT publishing
-                sigPub = None
-                if publishNt:
-                    sigTopic = self.table.getDoubleTopic(name)
-                    sigPub = sigTopic.publish(nt.PubSubOptions(
-                        sendAll=True, keepDuplicates=True))
-                    sigPub.setDefault(0)
-
-                    if name in self.sigUnitsDict:
-                        unitsStr = self.sigUnitsDict[name]
-                        sigTopic.setProperty("units", str(unitsStr))
-
-                # Set up log file publishing if enabled
-                if self.log is not None:
-                    sigLog = wpilog.DoubleLogEntry(log=self.log, name=sigNameToNT4TopicName(name))
-                else:
-                    sigLog = None
-
-                # Remember handles for both
-                self.publishedSigDict[name] = (sigPub, sigLog)
-
-            sigPub, sigLog = self.publishedSigDict[name]
+        if self.writerThread is not None:
+            numDirty = self._snapshotForWriter(time)
+        else:
+            numDirty = self._publishNow(time)
+
+        # Reset the sample store back to empty for next loop
+        self.numDirty = 0
+        self.loopCount += 1
+        self.loopSamplesPublished = numDirty
+        self.totalSamplesPublished += numDirty
+
+    def _publishNow(self, time):
+        sampleValues = self.sampleValues
+        sampleDirty = self.sampleDirty
+        dirtyIds = self.dirtyIds
+        sigPubList = self.sigPubList
+        sigLogList = self.sigLogList
+        lastPubValues = self.lastPubValues
+        numDirty = self.numDirty
+        for dirtyIdx in range(numDirty):
+            sigId = dirtyIds[dirtyIdx]
+            value = sampleValues[sigId]
             # Publish value to NT
+            sigPub = sigPubList[sigId]
             if sigPub is not None:
                 sigPub.set(value, time)
             # Put value to log file
+            sigLog = sigLogList[sigId]
             if sigLog is not None:
                 sigLog.append(value, time)
+            lastPubValues[sigId] = value
+            sampleDirty[sigId] = 0
+        return numDirty
+
+    def _snapshotForWriter(self, time):
+        # Backpressure metrics go out with this loop's samples
+        queueDepth = self.filledBlocks.qsize()
+        self.writerMaxQueueDepth = max(self.writerMaxQueueDepth, queueDepth)
+        self.writerQueueDepthSig.set(queueDepth)
+        self.writerDroppedLoopsSig.set(self.writerDroppedLoops)
+        self.writerDrainTimeSig.set(self.writerDrainTimeMs)
+
+        try:
+            block = self.freeBlocks.get_nowait()
+        except queue.Empty:
+            # Writer thread is behind - drop this loop rather than wait on it
+            block = None
+            self.writerDroppedLoops += 1
+
+        sampleValues = self.sampleValues
+        sampleDirty = self.sampleDirty
+        dirtyIds = self.dirtyIds
+        lastPubValues = self.lastPubValues
+        numDirty = self.numDirty
 
-        # Reset sample list back to empty for next loop
-        self.sampleList = []
+        if block is None:
+            for dirtyIdx in range(numDirty):
+                sampleDirty[dirtyIds[dirtyIdx]] = 0
+            return numDirty
 
-    # Tack on a new floating point number sample
-    def addSampleForThisLoop(self, name, value, publishNt):
-        self.sampleList.append((name, value, publishNt))
+        if block.capacity < self.capacity:
+            block.grow(self.capacity)
+        blockIds = block.sigIds
+        blockValues = block.values
+        for dirtyIdx in range(numDirty):
+            sigId = dirtyIds[dirtyIdx]
+            value = sampleValues[sigId]
+            blockIds[dirtyIdx] = sigId
+            blockValues[dirtyIdx] = value
+            lastPubValues[sigId] = value
+            sampleDirty[sigId] = 0
+        block.numSamples = numDirty
+        block.time = time
+        self.filledBlocks.put(block)
+        return numDirty
+
+    def _writerThreadMain(self):
+        while True:
+            block = self.filledBlocks.get()
+            if block is None:
+                return
+            startTime = wpilib.Timer.getFPGATimestamp()
+            sigPubList = self.sigPubList
+            sigLogList = self.sigLogList
+            blockIds = block.sigIds
+            blockValues = block.values
+            time = block.time
+            for sampleIdx in range(block.numSamples):
+                sigId = blockIds[sampleIdx]
+                value = blockValues[sampleIdx]
+                sigPub = sigPubList[sigId]
+                if sigPub is not None:
+                    sigPub.set(value, time)
+                sigLog = sigLogList[sigId]
+                if sigLog is not None:
+                    sigLog.append(value, time)
+            self.writerDrainTimeMs = (wpilib.Timer.getFPGATimestamp() - startTime) * 1000.0
+            self.freeBlocks.put(block)
+
+    # Record a new floating point number sample into a signal's preallocated slot
+    # Samples which the signal's publishing policy says to skip are dropped here,
+    # so they never cost anything in `publishPeriodic()`
+    def addSampleForThisLoop(self, sigId, value):
+        if self.sampleDirty[sigId]:
+            # Already going out this loop, just take the newest value
+            self.sampleValues[sigId] = value
+            return
+
+        policy = self.sigPolicy[sigId]
+        if policy == POLICY_ON_CHANGE:
+            if abs(value - self.lastPubValues[sigId]) <= self.sigDeadband[sigId]:
+                return
+        elif policy == POLICY_EVERY_NTH_LOOP:
+            if self.loopCount % self.sigDivisor[sigId] != 0:
+                return
+
+        self.sampleValues[sigId] = value
+        self.sampleDirty[sigId] = 1
+        self.dirtyIds[self.numDirty] = sigId
+        self.numDirty += 1
 
 
 ###########################################
 # Public API
 ###########################################
 
+class Signal:
+    """
+    A handle to one named, logged value.
+    Create it once (usually in a constructor), then call `set()` in periodic code.
+    The NT publisher and log file entry are bound when the signal is created, so
+    `set()` only has to write the value into the signal's preallocated slot.
+
+    By default every value is published every loop. Optionally:
+     - `publishNt=False` records the signal to disk only, skipping NT
+     - `deadband` only publishes when the value moves more than this far
+       from the last published value (use 0 for "any change")
+     - `divisor` only publishes on every Nth loop
+    """
+
+    def __init__(self, name, units=None, publishNt=True, deadband=None, divisor=1):
+        self.name = name
+        self.units = units
+        self.publishNt = publishNt
+        self.deadband = deadband
+        self.divisor = divisor
+        self._wrangler = SignalWrangler()
+        self._id = self._wrangler.register(self)
+
+    def set(self, value):
+        """Record a new value for this signal, to be published at the end of the loop"""
+        self._wrangler.addSampleForThisLoop(self._id, value)
+
+
 # Log a new named value
-def log(name, value, units=None, publishNt=True):
-    SignalWrangler().addSampleForThisLoop(name, value, publishNt)
-    if units is not None :
-        SignalWrangler().sigUnitsDict[name] = units
+# Prefer creating a `Signal` up front in hot code paths - this looks up the signal by name on every call
+# Publishing options only take effect the first time a name is logged
+def log(name, value, units=None, publishNt=True, deadband=None, divisor=1):
+    SignalWrangler().getSignal(name, units, publishNt, deadband, divisor).set(value)
 
 def sigNameToNT4TopicName(name):
-    return f"/{BASE_TABLE}/{name}"
\ No newline at end of file
+    return f"/{BASE_TABLE}/{name}"
@@ -3,6 +3,8 @@ import timeit
 import collections
 import time
 import statistics
+import math
+from array import array
 
 class CollectedTimeRec():
     __slots__ = 'startedWallS', 'startCpuS', 'durationS', 'cpuS'
@@ -57,6 +59,64 @@ class GeometricMean():
         self.max = max(self.max, givenValue)
 
 
+class LogHistogram():
+    """
+    Fixed-bucket histogram with logarithmically spaced buckets (HDR-style).
+    Tracks the distribution of many durations without storing every sample,
+    so tail latencies (p99, max) can be reported cheaply.
+    Recording is O(1) and allocates nothing. With the default 20 buckets per
+    decade, reported percentiles are within about 12% of the true value.
+    """
+
+    def __init__(self, minValue=1.0e-6, maxValue=1.0, bucketsPerDecade=20):
+        self.minValue = minValue
+        self.logMinValue = math.log10(minValue)
+        self.bucketsPerDecade = bucketsPerDecade
+        # Bucket 0 holds everything at or below minValue, the last bucket everything above maxValue
+        self.numBuckets = int(math.ceil((math.log10(maxValue) - self.logMinValue) * bucketsPerDecade)) + 2
+        self.counts = array("l", bytes(array("l").itemsize * self.numBuckets))
+        self._zeroCounts = array("l", self.counts)
+        self.count = 0
+        self.maxSample = 0.0
+
+    def append(self, value):
+        if value <= self.minValue:
+            idx = 0
+        else:
+            idx = int((math.log10(value) - self.logMinValue) * self.bucketsPerDecade) + 1
+            if idx >= self.numBuckets:
+                idx = self.numBuckets - 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.maxSample = max(self.maxSample, value)
+
+    def bucketUpperBound(self, idx):
+        return 10.0 ** (self.logMinValue + idx / self.bucketsPerDecade)
+
+    def percentile(self, pct):
+        """
+        Returns:
+            float: the upper bound of the bucket holding the given percentile
+            (0-100) of samples, but never more than the largest sample seen
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(pct / 100.0 * self.count))
+        cumulative = 0
+        for idx, bucketCount in enumerate(self.counts):
+            cumulative += bucketCount
+            if cumulative >= target:
+                if idx == self.numBuckets - 1:
+                    return self.maxSample # overflow bucket has no upper bound
+                return min(self.bucketUpperBound(idx), self.maxSample)
+        return self.maxSample
+
+    def reset(self):
+        self.counts[:] = self._zeroCounts
+        self.count = 0
+        self.maxSample = 0.0
+
+
 class GeometricMeanStats():
 
     def __init__(self, pointsToKeep=100):
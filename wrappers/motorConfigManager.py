@@ -0,0 +1,137 @@
+import time
+from threading import Event, Lock, Thread
+from utils.signalLogging import Signal
+from utils.singleton import Singleton
+
+
+class MotorConfigManager(metaclass=Singleton):
+    """
+    Configures all motor controllers together, instead of each one blocking in its
+    own constructor. Controllers add themselves as they're constructed, then
+    configureAll() runs once at the end of robotInit(). It makes passes over every
+    controller not configured yet - one attempt each per pass, so a controller that
+    isn't on the bus can't hold up the rest. Anything still not configured when the
+    startup time budget runs out keeps getting retried by a background thread,
+    including after the robot is enabled.
+
+    Signals and Faults aren't thread-safe, so devices don't touch them while being
+    configured. Instead, every device that was tried is queued up, and update() has
+    them publish their status from the main loop.
+
+    A device is anything with:
+     - name (str)
+     - configAttempts (int): number of calls to tryConfigure() so far
+     - tryConfigure(): sends its whole configuration once, returns True on success.
+       May be called from the background thread.
+     - publishConfigStatus(): updates its signals and faults with the result of the last
+       tryConfigure(). Only called from the main loop.
+    """
+
+    def __init__(self):
+        self.startupBudgetS = 2.0
+        self.retryPeriodS = 1.0
+
+        self.lock = Lock()
+        self.devices = []
+        self.pending = []
+        self.triedDevices = []
+        self.configureAllCalled = False
+        self.warnedNotConfigured = False
+        self.configTimeS = 0.0
+        self.runCmd = True
+        self.wakeEvent = Event()
+        self.thread = None
+
+        self.configTimeSig = Signal("Motor Config Time", "sec", deadband=0)
+        self.numUnconfiguredSig = Signal("Motor Config Unconfigured", "count", deadband=0)
+
+    def add(self, device):
+        """Queue up a device to be configured"""
+        with self.lock:
+            self.devices.append(device)
+            self.pending.append(device)
+        if self.thread is not None:
+            self.wakeEvent.set()
+
+    def _configPass(self):
+        # Try everything pending once. Returns the number of devices still not configured.
+        with self.lock:
+            toTry = self.pending
+            self.pending = []
+        failed = [device for device in toTry if not device.tryConfigure()]
+        with self.lock:
+            self.pending.extend(failed)
+            self.triedDevices.extend(toTry)
+            numPending = len(self.pending)
+        return numPending
+
+    def update(self):
+        """Publish the results of any configuration attempts since the last call. Call once per loop."""
+        if not self.configureAllCalled:
+            if len(self.devices) > 0 and not self.warnedNotConfigured:
+                print(f"Warning: {len(self.devices)} motor controller(s) were created, "
+                      "but MotorConfigManager().configureAll() was never called - they won't do anything")
+                self.warnedNotConfigured = True
+            return
+        if len(self.triedDevices) == 0:
+            return
+        with self.lock:
+            triedDevices = self.triedDevices
+            self.triedDevices = []
+            numPending = len(self.pending)
+        for device in triedDevices:
+            device.publishConfigStatus()
+        self.numUnconfiguredSig.set(numPending)
+
+    def configureAll(self):
+        """Configure every device added so far, then keep retrying any failures in the background.
+        Call once, after all subsystems are constructed."""
+        self.configureAllCalled = True
+        startTime = time.perf_counter()
+        numPending = self._configPass()
+        while numPending > 0 and time.perf_counter() - startTime < self.startupBudgetS:
+            numPending = self._configPass()
+        self.configTimeS = time.perf_counter() - startTime
+        self.configTimeSig.set(self.configTimeS)
+        self.update()
+
+        for line in self.report():
+            print(line)
+
+        if self.thread is None:
+            self.thread = Thread(target=self._retryThreadMain, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop background retries"""
+        self.runCmd = False
+        if self.thread is not None:
+            self.wakeEvent.set()
+            self.thread.join()
+            self.thread = None
+
+    def _retryThreadMain(self):
+        while self.runCmd:
+            self.wakeEvent.wait(self.retryPeriodS)
+            self.wakeEvent.clear()
+            if not self.runCmd:
+                break
+            with self.lock:
+                numPending = len(self.pending)
+            if numPending > 0:
+                self._configPass()
+
+    def report(self):
+        """
+        Returns:
+            list[str]: Total configuration time, then one line per device
+        """
+        with self.lock:
+            devices = list(self.devices)
+            pending = list(self.pending)
+        lines = [f"Motor configuration took {self.configTimeS * 1000.0:.0f}ms, "
+                 f"{len(devices) - len(pending)} of {len(devices)} configured"]
+        for device in devices:
+            status = "NOT configured" if device in pending else "configured"
+            lines.append(f"  {device.name}: {status} after {device.configAttempts} attempt(s)")
+        return lines
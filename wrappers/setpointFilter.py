@@ -0,0 +1,50 @@
+# Re-send an unchanged setpoint this often anyway (in robot loops), in case the
+# motor controller reset and forgot it (ex: brownout)
+SETPOINT_KEEPALIVE_LOOPS = 25
+
+
+class SetpointFilter:
+    """
+    Decides whether a motor controller setpoint actually needs to be sent.
+    A setpoint is skipped if it's in the same control mode as the last one sent,
+    and within tolerance of it - except every so often, when it's re-sent anyway.
+    Compares against the last *sent* value, so slow drift still gets through once
+    it adds up to more than the tolerance.
+    """
+
+    __slots__ = "keepaliveLoops", "lastMode", "lastValue", "lastArbFF", "lastSentLoop"
+
+    def __init__(self, keepaliveLoops=SETPOINT_KEEPALIVE_LOOPS):
+        self.keepaliveLoops = keepaliveLoops
+        self.lastMode = None
+        self.lastValue = 0.0
+        self.lastArbFF = 0.0
+        self.lastSentLoop = 0
+
+    def invalidate(self):
+        """Forget the last setpoint, so the next one is always sent"""
+        self.lastMode = None
+
+    def shouldSend(self, mode, value, valueTol, arbFF, arbFFTol, loopNum):
+        """
+        Args:
+            mode: Control mode of the setpoint. Any change of mode is always sent.
+            value (float): The setpoint
+            valueTol (float): How far value can be from the last sent value and still be skipped
+            arbFF (float): Arbitrary feed-forward sent alongside the setpoint
+            arbFFTol (float): How far arbFF can be from the last sent one and still be skipped
+            loopNum (int): Incrementing robot loop counter
+
+        Returns:
+            bool: True if the setpoint should be sent. It's then remembered as the last sent one.
+        """
+        if (mode == self.lastMode
+                and abs(value - self.lastValue) <= valueTol
+                and abs(arbFF - self.lastArbFF) <= arbFFTol
+                and loopNum - self.lastSentLoop < self.keepaliveLoops):
+            return False
+        self.lastMode = mode
+        self.lastValue = value
+        self.lastArbFF = arbFF
+        self.lastSentLoop = loopNum
+        return True
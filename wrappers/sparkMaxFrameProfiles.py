@@ -0,0 +1,96 @@
+from utils.singleton import Singleton
+
+## Spark Max CAN Status Frame Profiles
+# Each Spark Max sends status frames back to the roboRIO on its own schedule.
+# Anything we don't actually read just loads up the bus, so each motor picks
+# a profile based on what it's used for.
+#
+# Status frames:
+#  0 - Applied output, faults, sticky faults, follower data
+#  1 - Motor velocity, temperature, voltage, current
+#  2 - Motor position
+#  3 - Analog sensor
+#  4 - Alternate encoder
+#  5 - Duty cycle absolute encoder position
+#  6 - Duty cycle absolute encoder velocity
+
+# Frames we never read are sent as slowly as the Spark Max allows
+FRAME_PERIOD_OFF_MS = 65500
+
+# Drivetrain wheel motor - fast velocity, and position at the odometry thread's rate
+FRAME_PROFILE_ODOMETRY_WHEEL = "odometry wheel"
+# Swerve azimuth motor - the angle comes from a separate absolute encoder, so only current is logged
+FRAME_PROFILE_AZIMUTH = "azimuth"
+# Closed-loop velocity mechanism whose speed we check (shooter, transfer)
+FRAME_PROFILE_VELOCITY_FLYWHEEL = "velocity flywheel"
+# Mechanism we mostly just command (intake, climber)
+FRAME_PROFILE_IDLE_MECHANISM = "idle mechanism"
+
+# Status frame periods in milliseconds, for status frames 0 through 6
+FRAME_PROFILES = {
+    FRAME_PROFILE_ODOMETRY_WHEEL: (20, 20, 10, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS,
+                                   FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS),
+    FRAME_PROFILE_AZIMUTH: (20, 60, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS,
+                            FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS),
+    FRAME_PROFILE_VELOCITY_FLYWHEEL: (20, 20, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS,
+                                      FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS),
+    FRAME_PROFILE_IDLE_MECHANISM: (100, 100, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS,
+                                   FRAME_PERIOD_OFF_MS, FRAME_PERIOD_OFF_MS),
+}
+
+# FRC CAN runs at 1 Mbit/s. A Spark Max frame is an extended-ID frame with 8 data bytes - 128 bits
+# plus inter-frame space and bit stuffing comes out to about this many bits on the wire.
+CAN_BUS_BITS_PER_SEC = 1.0e6
+CAN_FRAME_BITS = 150
+# Every loop we send each motor one setpoint frame
+COMMAND_FRAME_PERIOD_MS = 20
+
+
+def framesPerSec(profileName):
+    """
+    Returns:
+        float: Status frames per second a Spark Max sends with the given profile
+    """
+    return sum(1000.0 / periodMs for periodMs in FRAME_PROFILES[profileName])
+
+
+class CANBusLoadEstimator(metaclass=Singleton):
+    """
+    Adds up the CAN traffic every Spark Max is configured to generate, so it can
+    be compared with the bus utilization the roboRIO measures.
+    Whatever is left over is traffic from everything else on the bus
+    (power distribution, gyro, any other controllers).
+    """
+
+    def __init__(self):
+        self.motorProfiles = {}
+
+    def addMotor(self, name, profileName):
+        self.motorProfiles[name] = profileName
+
+    def getFramesPerSec(self):
+        """
+        Returns:
+            float: Total frames per second from all Spark Max's, status and command frames
+        """
+        commandFramesPerSec = 1000.0 / COMMAND_FRAME_PERIOD_MS
+        return sum(framesPerSec(profileName) + commandFramesPerSec
+                   for profileName in self.motorProfiles.values())
+
+    def getEstBusUtilization(self):
+        """
+        Returns:
+            float: Estimated fraction of the bus's capacity used by Spark Max's, same units as
+            RobotController.getCANStatus().percentBusUtilization
+        """
+        return self.getFramesPerSec() * CAN_FRAME_BITS / CAN_BUS_BITS_PER_SEC
+
+    def report(self):
+        """
+        Returns:
+            list[str]: One line per motor, busiest first
+        """
+        lines = []
+        for name, profileName in sorted(self.motorProfiles.items(), key=lambda item: -framesPerSec(item[1])):
+            lines.append(f"{name}: {profileName}, {framesPerSec(profileName):.1f} status frames/sec")
+        return lines
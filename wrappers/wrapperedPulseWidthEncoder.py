@@ -1,7 +1,7 @@
 import math
 from wpilib import DigitalInput, DutyCycle
 from utils.faults import Fault
-from utils.signalLogging import log
+from utils.signalLogging import Signal
 from utils.calibration import Calibration
 from utils.units import wrapAngleRad
 
@@ -38,6 +38,10 @@ class WrapperedPulseWidthEncoder:
         self.maxPulseTimeSec = maxPulseSec
         self.minAcceptableFreqHz = minAcceptableFreqHz
 
+        self.freqSig = Signal(f"{self.name}_freq", "Hz")
+        self.pulseTimeSig = Signal(f"{self.name}_pulseTime", "sec")
+        self.angleSig = Signal(f"{self.name}_angle", "rad")
+
     def update(self):
         """Return the raw angle reading from the sensor in radians"""
         freq = self.dutyCycle.getFrequency()
@@ -69,9 +73,9 @@ class WrapperedPulseWidthEncoder:
 
             self.curAngleRad = wrapAngleRad(rawAngle - self.mountOffsetCal.get())
 
-        log(f"{self.name}_freq", freq, "Hz")
-        log(f"{self.name}_pulseTime", pulseTime, "sec")
-        log(f"{self.name}_angle", self.curAngleRad, "rad")
+        self.freqSig.set(freq)
+        self.pulseTimeSig.set(pulseTime)
+        self.angleSig.set(self.curAngleRad)
 
     def getAngleRad(self):
         return self.curAngleRad
@@ -1,77 +1,193 @@
+from threading import Lock
 from rev import CANSparkMax, SparkMaxPIDController, REVLibError, CANSparkLowLevel
-from utils.signalLogging import log
+from utils.signalLogging import Signal
 from utils.units import rev2Rad, radPerSec2RPM, RPM2RadPerSec
 from utils.faults import Fault
+from wrappers.sparkMaxFrameProfiles import FRAME_PROFILES, FRAME_PROFILE_IDLE_MECHANISM, CANBusLoadEstimator
+from wrappers.motorConfigManager import MotorConfigManager
+from wrappers.setpointFilter import SetpointFilter
+
+# How long each configuration call waits for the Spark Max to acknowledge it
+CONFIG_CAN_TIMEOUT_MS = 20
+
+# Setpoint changes smaller than these aren't worth a CAN frame
+VOLTAGE_CMD_TOL_V = 0.01
+VEL_CMD_TOL_RPM = 0.5
+ARB_FF_TOL_V = 0.01
 
 
 ## Wrappered Spark Max
 # Wrappers REV's libraries to add the following functionality for spark max controllers:
 # Grouped PID controller, Encoder, and motor controller objects
 # Physical unit conversions into SI units (radians)
-# Retry logic for initial configuration
+# Retry logic for initial configuration, done alongside all other controllers by MotorConfigManager
 # Fault handling for not crashing code if the motor controller is disconnected
 # Fault annunciation logic to trigger warnings if a motor couldn't be configured
+# Status frame rates picked from a profile for what the motor is used for (see sparkMaxFrameProfiles)
+# Per-loop caching of sensor readings, so each one crosses into REV's library at most once per loop
+# Skipping setpoint and gain writes that wouldn't change anything (see SetpointFilter)
 
 class WrapperedSparkMax:
-    def __init__(self, canID, name, brakeMode=False, curLimitA=40):
+    # Incremented once per robot loop. Cached readings taken in an older loop get re-read.
+    loopGeneration = 0
+
+    @classmethod
+    def startNewLoop(cls):
+        """Mark all cached readings from every Spark Max as stale. Call once per loop."""
+        cls.loopGeneration += 1
+
+    def __init__(self, canID, name, brakeMode=False, curLimitA=40, frameProfile=FRAME_PROFILE_IDLE_MECHANISM):
         self.ctrl = CANSparkMax(canID, CANSparkLowLevel.MotorType.kBrushless)
         self.pidCtrl = self.ctrl.getPIDController()
         self.encoder = self.ctrl.getEncoder()
         self.name = name
+        self.canID = canID
         self.connected = False
         self.disconFault = Fault(f"Spark Max {name} ID {canID} disconnected")
+        self.configAttemptsSig = Signal(name + "_configAttempts", "count", deadband=0)
 
-        # Perform motor configuration, tracking errors and retrying until we have success
-        retryCounter = 0
-        while not self.connected and retryCounter < 10:
-            retryCounter += 1
-            errList = []
-            errList.append(self.ctrl.restoreFactoryDefaults())
-            mode = (
-                CANSparkMax.IdleMode.kBrake
-                if brakeMode
-                else CANSparkMax.IdleMode.kCoast
-            )
-            errList.append(self.ctrl.setIdleMode(mode))
-            errList.append(self.ctrl.setSmartCurrentLimit(curLimitA))
-            # Status 0 = Motor output and Faults
-            errList.append(
-                self.ctrl.setPeriodicFramePeriod(CANSparkMax.PeriodicFrame.kStatus0, 20)
-            )
-            # Status 1 = Motor velocity & electrical data
-            errList.append(
-                self.ctrl.setPeriodicFramePeriod(CANSparkMax.PeriodicFrame.kStatus1, 60)
-            )
-            # Status 2 = Motor Position
-            errList.append(
-                self.ctrl.setPeriodicFramePeriod(
-                    CANSparkMax.PeriodicFrame.kStatus2, 65500
-                )
-            )
-            # Status 3 = Analog Sensor Input
-            errList.append(
-                self.ctrl.setPeriodicFramePeriod(
-                    CANSparkMax.PeriodicFrame.kStatus3, 65500
-                )
-            )
-            if any(x != REVLibError.kOk for x in errList):
-                print(
-                    f"Failure configuring Spark Max {name} CAN ID {canID}, retrying..."
-                )
-            else:
-                self.connected = True
+        self.desVelSig = Signal(name + "_desVel", "RPM")
+        self.arbFFSig = Signal(name + "_arbFF", "V")
+        self.cmdVoltageSig = Signal(name + "_cmdVoltage", "V")
+        self.outputCurrentSig = Signal(name + "_outputCurrent", "A")
+        self.motorActPosSig = Signal(name + "_motorActPos", "rad")
+        self.motorActVelSig = Signal(name + "_motorActVel", "RPS")
+        self.estOutputVSig = Signal(name + "_estOutputV", "V")
+
+        # Most recent readings, and the loop generation they were read in
+        self.posRad = 0.0
+        self.posGen = -1
+        self.velRadPerSec = 0.0
+        self.velGen = -1
+        self.outputCurrentA = 0.0
+        self.outputCurrentGen = -1
+        self.appliedOutputV = 0.0
+        self.appliedOutputGen = -1
+
+        # Desired configuration - (re)sent as a whole whenever the controller gets configured.
+        # The main loop can change the inversion, current limit and gains while MotorConfigManager's
+        # thread is sending them - configLock guards those, and configVersion counts every change.
+        self.configLock = Lock()
+        self.configVersion = 0
+        self.brakeMode = brakeMode
+        self.curLimitA = curLimitA
+        self.frameProfile = frameProfile
+        self.inverted = False
+        self.pidGains = None
+        self.sentPidGains = None # What the controller actually has - only these can be skipped
+        self.configAttempts = 0
+
+        self.setpointFilter = SetpointFilter()
+        self.numWritesSent = 0
+        self.numWritesSuppressed = 0
+        self.writesSentSig = Signal(name + "_writesSent", "count", deadband=0)
+        self.writesSuppressedSig = Signal(name + "_writesSuppressed", "count", deadband=0)
+
+        CANBusLoadEstimator().addMotor(name, frameProfile)
+
+        # Don't wait for configuration here, MotorConfigManager does it along with all the other controllers
+        self.ctrl.setCANTimeout(CONFIG_CAN_TIMEOUT_MS)
+        MotorConfigManager().add(self)
+
+    def tryConfigure(self):
+        """Send the whole configuration once. Gives up at the first error - that usually means the
+        controller isn't on the bus, so every call after it would just time out too.
+        Can run on MotorConfigManager's background thread, so it doesn't log anything -
+        see publishConfigStatus().
+
+        Returns:
+            bool: True if the controller accepted everything
+        """
+        self.configAttempts += 1
+        self.sentPidGains = None
+        configVersion, curLimitA, inverted, pidGains = self._snapshotConfig()
+        statusFrames = (
+            CANSparkMax.PeriodicFrame.kStatus0,
+            CANSparkMax.PeriodicFrame.kStatus1,
+            CANSparkMax.PeriodicFrame.kStatus2,
+            CANSparkMax.PeriodicFrame.kStatus3,
+            CANSparkMax.PeriodicFrame.kStatus4,
+            CANSparkMax.PeriodicFrame.kStatus5,
+            CANSparkMax.PeriodicFrame.kStatus6,
+        )
+        mode = (
+            CANSparkMax.IdleMode.kBrake
+            if self.brakeMode
+            else CANSparkMax.IdleMode.kCoast
+        )
+        success = (
+            self.ctrl.restoreFactoryDefaults() == REVLibError.kOk
+            and self.ctrl.setIdleMode(mode) == REVLibError.kOk
+            and self.ctrl.setSmartCurrentLimit(curLimitA) == REVLibError.kOk
+            and all(self.ctrl.setPeriodicFramePeriod(frame, periodMs) == REVLibError.kOk
+                    for frame, periodMs in zip(statusFrames, FRAME_PROFILES[self.frameProfile]))
+        )
+        if success:
+            # Controller has been reset, so it doesn't have our last setpoint anymore
+            self.setpointFilter.invalidate()
+        while success:
+            # Restoring factory defaults cleared these, put them back
+            self.ctrl.setInverted(inverted)
+            if pidGains is not None:
+                self._sendPID(pidGains)
+            with self.configLock:
+                if configVersion == self.configVersion:
+                    # From here on, the setters send changes themselves
+                    self.connected = True
+                    return True
+            # Main loop changed something while it was being sent - send the new values
+            configVersion, curLimitA, inverted, pidGains = self._snapshotConfig()
+            self.ctrl.setSmartCurrentLimit(curLimitA)
+
+        self.connected = False
+        return False
+
+    def _snapshotConfig(self):
+        with self.configLock:
+            return self.configVersion, self.curLimitA, self.inverted, self.pidGains
 
+    def publishConfigStatus(self):
+        """Log the result of the last tryConfigure(). Main loop only - signals and faults aren't thread-safe."""
+        self.configAttemptsSig.set(self.configAttempts)
         self.disconFault.set(not self.connected)
 
     def setInverted(self, isInverted):
-        if self.connected:
+        with self.configLock:
+            self.inverted = isInverted
+            self.configVersion += 1
+            connected = self.connected
+        if connected:
             self.ctrl.setInverted(isInverted)
 
     def setPID(self, kP, kI, kD):
-        if self.connected:
-            self.pidCtrl.setP(kP)
-            self.pidCtrl.setI(kI)
-            self.pidCtrl.setD(kD)
+        gains = (kP, kI, kD)
+        with self.configLock:
+            if self.pidGains != gains:
+                self.pidGains = gains
+                self.configVersion += 1
+            connected = self.connected
+        if not connected:
+            return # Nothing would be sent - tryConfigure() will send the gains
+        if self.sentPidGains == gains:
+            self._countWrite(False)
+        else:
+            self._sendPID(gains)
+            self._countWrite(True)
+
+    def _countWrite(self, sent):
+        if sent:
+            self.numWritesSent += 1
+            self.writesSentSig.set(self.numWritesSent)
+        else:
+            self.numWritesSuppressed += 1
+            self.writesSuppressedSig.set(self.numWritesSuppressed)
+
+    def _sendPID(self, gains):
+        kP, kI, kD = gains
+        self.pidCtrl.setP(kP)
+        self.pidCtrl.setI(kI)
+        self.pidCtrl.setD(kD)
+        self.sentPidGains = gains
 
     def setVelCmd(self, velCmd, arbFF=0.0):
         """_summary_
@@ -83,16 +199,21 @@ class WrapperedSparkMax:
         velCmdRPM = radPerSec2RPM(velCmd)
 
         if self.connected:
-            self.pidCtrl.setReference(
-                velCmdRPM,
-                CANSparkMax.ControlType.kVelocity,
-                0,
-                arbFF,
-                SparkMaxPIDController.ArbFFUnits.kVoltage,
-            )
-
-        log(self.name + "_desVel", velCmdRPM, "RPM")
-        log(self.name + "_arbFF", arbFF, "V")
+            if self.setpointFilter.shouldSend(CANSparkMax.ControlType.kVelocity, velCmdRPM, VEL_CMD_TOL_RPM,
+                                              arbFF, ARB_FF_TOL_V, WrapperedSparkMax.loopGeneration):
+                self.pidCtrl.setReference(
+                    velCmdRPM,
+                    CANSparkMax.ControlType.kVelocity,
+                    0,
+                    arbFF,
+                    SparkMaxPIDController.ArbFFUnits.kVoltage,
+                )
+                self._countWrite(True)
+            else:
+                self._countWrite(False)
+
+        self.desVelSig.set(velCmdRPM)
+        self.arbFFSig.set(arbFF)
         self._logCurrent()
 
     def setVelRPS(self, speed, aff=0.0):
@@ -106,39 +227,69 @@ class WrapperedSparkMax:
         return rps
 
     def setVoltage(self, outputVoltageVolts):
-        log(self.name + "_cmdVoltage", outputVoltageVolts, "V")
+        self.cmdVoltageSig.set(outputVoltageVolts)
         if self.connected:
-            self.ctrl.setVoltage(outputVoltageVolts)
+            if self.setpointFilter.shouldSend(CANSparkMax.ControlType.kVoltage, outputVoltageVolts, VOLTAGE_CMD_TOL_V,
+                                              0.0, ARB_FF_TOL_V, WrapperedSparkMax.loopGeneration):
+                self.ctrl.setVoltage(outputVoltageVolts)
+                self._countWrite(True)
+            else:
+                self._countWrite(False)
             self._logCurrent()
 
     def _logCurrent(self):
-        log(self.name + "_outputCurrent", self.ctrl.getOutputCurrent(), "A")
+        if self.outputCurrentGen != WrapperedSparkMax.loopGeneration:
+            self.outputCurrentGen = WrapperedSparkMax.loopGeneration
+            self.outputCurrentA = self.ctrl.getOutputCurrent()
+            self.outputCurrentSig.set(self.outputCurrentA)
 
     def getMotorPositionRad(self):
+        if self.posGen != WrapperedSparkMax.loopGeneration:
+            self.posGen = WrapperedSparkMax.loopGeneration
+            if self.connected:
+                pos = rev2Rad(self.encoder.getPosition())
+            else:
+                pos = 0
+            self.posRad = pos
+            self.motorActPosSig.set(pos)
+        return self.posRad
+
+    def readMotorPositionRad(self):
+        """Read the position straight from the controller, bypassing the per-loop cache and logging.
+        Safe to call from outside the main loop (ex: an odometry thread) - unlike the cached getters,
+        it doesn't touch any state the main loop changes."""
         if self.connected:
-            pos = rev2Rad(self.encoder.getPosition())
-        else:
-            pos = 0
-        log(self.name + "_motorActPos", pos, "rad")
-        return pos
+            return rev2Rad(self.encoder.getPosition())
+        return 0.0
 
     def getMotorVelocityRadPerSec(self):
-        if self.connected:
-            vel = self.encoder.getVelocity()
-        else:
-            vel = 0
-        vel = vel/60
-        log(self.name + "_motorActVel", vel, "RPS")
-        return RPM2RadPerSec(vel)
+        if self.velGen != WrapperedSparkMax.loopGeneration:
+            self.velGen = WrapperedSparkMax.loopGeneration
+            if self.connected:
+                vel = self.encoder.getVelocity()
+            else:
+                vel = 0
+            vel = vel/60
+            self.motorActVelSig.set(vel)
+            self.velRadPerSec = RPM2RadPerSec(vel)
+        return self.velRadPerSec
 
     def getAppliedOutput(self):
-        if self.connected:
-            output = self.ctrl.getAppliedOutput()
-        else:
-            output = 0
-        output = 12 * output
-        log(self.name + "_estOutputV", output, "V")
-        return output
+        if self.appliedOutputGen != WrapperedSparkMax.loopGeneration:
+            self.appliedOutputGen = WrapperedSparkMax.loopGeneration
+            if self.connected:
+                output = self.ctrl.getAppliedOutput()
+            else:
+                output = 0
+            output = 12 * output
+            self.estOutputVSig.set(output)
+            self.appliedOutputV = output
+        return self.appliedOutputV
 
     def setSmartCurrentLimit(self, curLimitA: int):
-        self.ctrl.setSmartCurrentLimit(curLimitA)
+        with self.configLock:
+            self.curLimitA = curLimitA
+            self.configVersion += 1
+            connected = self.connected
+        if connected:
+            self.ctrl.setSmartCurrentLimit(curLimitA)